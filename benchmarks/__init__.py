@@ -0,0 +1,11 @@
+"""Suíte de benchmarks com dados sintéticos da fazenda.
+
+Uso (a partir da raiz do projeto):
+
+    python -m benchmarks --scale 100000 --output antes.json
+    python -m benchmarks --scale 100000 --output depois.json --baseline antes.json
+
+Por padrão usa o servidor PostgreSQL do .env, em um banco separado
+"<DB_NAME>_bench" (criado se necessário, e com as tabelas recriadas a cada
+geração de dados); --url sqlite:///bench.db roda sem servidor.
+"""
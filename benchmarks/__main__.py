@@ -0,0 +1,123 @@
+"""Executa a suíte de benchmarks: python -m benchmarks --help"""
+import argparse
+import datetime
+import json
+import logging
+import os
+import sys
+import time
+
+# Sem janelas na tela: o Qt desenha em memória
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt5.QtWidgets import QApplication, QMessageBox
+
+from .harness import (
+    BenchmarkContext, bind_database, compare, default_url, environment, run_benchmarks, write_results
+)
+from .datagen import FarmDataGenerator, reset_schema, row_counts
+from . import suite  # noqa: F401 (registra os benchmarks)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Gera dados sintéticos e mede a interface e as consultas da aplicação."
+    )
+    parser.add_argument(
+        "--url", default=os.getenv("BENCH_DATABASE_URL"),
+        help="banco dos benchmarks (padrão: BENCH_DATABASE_URL ou o servidor do .env, banco <DB_NAME>_bench). "
+             "Ex.: sqlite:///bench.db. ATENÇÃO: as tabelas são recriadas."
+    )
+    parser.add_argument("--scale", type=int, default=10000, help="número de despesas geradas (1000 a 1000000)")
+    parser.add_argument("--seed", type=int, default=42, help="semente do gerador de dados")
+    parser.add_argument(
+        "--reference", type=datetime.date.fromisoformat, default=datetime.date.today(),
+        help="data final dos lançamentos gerados, AAAA-MM-DD (padrão: hoje)"
+    )
+    parser.add_argument("--skip-seed", action="store_true", help="reaproveita os dados já gravados no banco")
+    parser.add_argument("--repeat", type=int, default=5, help="execuções medidas de cada benchmark")
+    parser.add_argument("--warmup", type=int, default=1, help="execuções descartadas antes da medição")
+    parser.add_argument("--only", action="append", help="roda só os benchmarks cujo nome contém o texto (repetível)")
+    parser.add_argument("--timeout", type=float, default=120, help="espera máxima por uma carga, em segundos")
+    parser.add_argument("--output", default="benchmark_results.json", help="arquivo JSON com os resultados")
+    parser.add_argument("--baseline", help="JSON de uma execução anterior, para comparar as medianas")
+    parser.add_argument(
+        "--threshold", type=float, default=10,
+        help="aumento da mediana (%%) considerado regressão na comparação"
+    )
+    return parser.parse_args(argv)
+
+
+def unattended(context):
+    """Substitui as caixas de mensagem modais; avisos e erros são atribuídos ao benchmark em execução."""
+    def fail(parent, title, message, *args, **kwargs):
+        context.errors.append(f"{title}: {message}")
+        return QMessageBox.Ok
+
+    QMessageBox.information = staticmethod(lambda *args, **kwargs: QMessageBox.Ok)
+    QMessageBox.question = staticmethod(lambda *args, **kwargs: QMessageBox.Yes)
+    QMessageBox.warning = staticmethod(fail)
+    QMessageBox.critical = staticmethod(fail)
+
+
+def log(message):
+    print(message, file=sys.stderr, flush=True)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.WARNING, format="%(name)s - %(levelname)s - %(message)s")
+
+    url = args.url or default_url()
+    engine = bind_database(url)
+    meta = {
+        "dialect": engine.dialect.name,
+        "scale": args.scale,
+        "seed": args.seed,
+        "reference_date": args.reference.isoformat(),
+        "repeat": args.repeat,
+        **environment(),
+    }
+
+    if args.skip_seed:
+        meta["rows"] = None
+    else:
+        log(f"Gerando dados (escala {args.scale}): {row_counts(args.scale)}")
+        start = time.perf_counter()
+        reset_schema(engine)
+        generator = FarmDataGenerator(args.scale, args.seed, args.reference)
+        meta["rows"] = generator.generate(engine)
+        meta["seed_seconds"] = {
+            table: round(seconds, 3) for table, seconds in generator.timings.items()
+        }
+        log(f"Dados gerados em {time.perf_counter() - start:.1f}s")
+
+    app = QApplication(sys.argv[:1])
+    context = BenchmarkContext(app, timeout=args.timeout)
+    unattended(context)
+    results = run_benchmarks(context, args.repeat, args.warmup, args.only, log=log)
+    if context.window is not None:
+        context.window.close()
+
+    write_results(args.output, meta, results)
+    log(f"Resultados gravados em {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = 0
+        for name, before, after, change, regressed in compare(
+            baseline, {"results": results}, args.threshold / 100
+        ):
+            regressions += regressed
+            flag = "  REGRESSÃO" if regressed else ""
+            print(f"{name:45} {before:10.1f} ms -> {after:10.1f} ms  {change:+7.1%}{flag}")
+        return 1 if regressions else 0
+
+    errors = [name for name, result in results.items() if "error" in result]
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
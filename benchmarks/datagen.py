@@ -0,0 +1,188 @@
+"""Gerador determinístico de dados sintéticos da fazenda para os benchmarks.
+
+A mesma semente, escala e data de referência produzem sempre os mesmos
+registros. A escala é o número de despesas; as demais tabelas crescem na
+proporção de uma fazenda típica (ver PROPORCOES). As linhas são gravadas com
+INSERT em lote, sem passar pelo ORM.
+"""
+import datetime
+import random
+import time
+
+from sqlalchemy import insert, select, text
+
+from database.models import (
+    Base, Maquinario, Manutencao, Funcionario, Pagamento, Despesa, Entrada, Producao,
+    Fornecedor, Cliente, search_key
+)
+from database.migrations import run_migrations
+
+# Linhas de cada tabela por despesa gerada (com um mínimo para escalas pequenas)
+PROPORCOES = {
+    "fornecedor": (0.01, 5),
+    "cliente": (0.005, 5),
+    "maquinario": (0.002, 3),
+    "funcionario": (0.005, 5),
+    "despesa": (1, 1),
+    "entrada": (0.5, 1),
+    "manutencao": (0.02, 1),
+    "pagamento": (0.06, 1),
+    "producao": (0.02, 1),
+}
+
+# Período coberto pelos lançamentos, terminando na data de referência
+ANOS = 3
+
+LOTE = 5000
+
+CATEGORIAS_DESPESA = ["Insumos", "Combustível", "Manutenção", "Salários", "Impostos", "Aluguel", "Serviços", "Outros"]
+CATEGORIAS_ENTRADA = ["Venda de Produção", "Prestação de Serviços", "Aluguel", "Subsídios", "Outros"]
+FORMAS_PAGAMENTO = ["Dinheiro", "Cartão de Crédito", "Cartão de Débito", "Transferência", "PIX", "Boleto", "Cheque"]
+PRODUTOS = ["Soja", "Milho", "Trigo", "Feijão", "Algodão", "Café", "Cana-de-açúcar"]
+UNIDADES = ["kg", "ton", "sacos"]
+CARGOS = ["Gerente", "Administrador", "Operador", "Motorista", "Trabalhador Rural", "Técnico"]
+STATUS_MAQUINARIO = ["Ativo", "Ativo", "Ativo", "Em manutenção", "Inativo"]
+NOMES = ["Ana", "Bruno", "Carla", "Diego", "Élida", "Fábio", "Gustavo", "Helena", "Íris", "João", "Lúcia", "Márcio"]
+SOBRENOMES = ["Silva", "Souza", "Oliveira", "Pereira", "Gonçalves", "Araújo", "Conceição", "Fagundes"]
+EMPRESAS = ["Agro", "Comercial", "Cooperativa", "Distribuidora", "Insumos", "Máquinas", "Sementes"]
+
+
+def row_counts(escala):
+    """Número de linhas de cada tabela para a escala informada."""
+    return {
+        tabela: max(int(escala * fator), minimo)
+        for tabela, (fator, minimo) in PROPORCOES.items()
+    }
+
+
+def reset_schema(engine):
+    """Recria todas as tabelas vazias e aplica as migrações (índices incluídos)."""
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    run_migrations(engine)
+
+
+class FarmDataGenerator:
+    """Gera e grava os registros de todas as tabelas, na ordem das chaves estrangeiras."""
+
+    def __init__(self, escala, seed=42, referencia=None):
+        self.escala = escala
+        self.seed = seed
+        self.referencia = referencia or datetime.date.today()
+        self.counts = row_counts(escala)
+        self.random = random.Random(seed)
+        self.timings = {}  # tabela -> segundos gastos no INSERT
+
+    def data(self):
+        """Uma data aleatória dentro do período coberto."""
+        return self.referencia - datetime.timedelta(days=self.random.randrange(365 * ANOS))
+
+    def valor(self, minimo, maximo):
+        return round(self.random.uniform(minimo, maximo), 2)
+
+    def nome_pessoa(self, i):
+        return f"{self.random.choice(NOMES)} {self.random.choice(SOBRENOMES)} {i}"
+
+    def generate(self, engine):
+        """Grava todos os registros (as tabelas devem estar vazias, ver reset_schema)."""
+        with engine.begin() as connection:
+            fornecedores = self.insert_names(connection, Fornecedor, [
+                f"{self.random.choice(EMPRESAS)} {self.random.choice(SOBRENOMES)} {i}"
+                for i in range(self.counts["fornecedor"])
+            ])
+            clientes = self.insert_names(connection, Cliente, [
+                self.nome_pessoa(i) for i in range(self.counts["cliente"])
+            ])
+            maquinarios = self.insert_rows(connection, Maquinario, (
+                {
+                    "nome": f"Máquina {i}", "modelo": f"Modelo {self.random.randrange(50)}",
+                    "ano": self.random.randrange(1990, self.referencia.year + 1),
+                    "valor_aquisicao": self.valor(20000, 900000), "data_aquisicao": self.data(),
+                    "status": self.random.choice(STATUS_MAQUINARIO),
+                }
+                for i in range(self.counts["maquinario"])
+            ))
+            funcionarios = self.insert_rows(connection, Funcionario, (
+                {
+                    "nome": self.nome_pessoa(i), "cpf": f"{i:011d}", "cargo": self.random.choice(CARGOS),
+                    "data_contratacao": self.data(), "salario": self.valor(1500, 9000),
+                    "ativo": self.random.random() < 0.9,
+                }
+                for i in range(self.counts["funcionario"])
+            ))
+
+            self.insert_rows(connection, Despesa, (
+                self.despesa(i, fornecedores) for i in range(self.counts["despesa"])
+            ))
+            self.insert_rows(connection, Entrada, (
+                {
+                    "descricao": f"Entrada {i}", "valor": self.valor(100, 50000), "data": self.data(),
+                    "categoria": self.random.choice(CATEGORIAS_ENTRADA),
+                    "cliente_id": self.random.choice(clientes) if self.random.random() < 0.8 else None,
+                    "forma_pagamento": self.random.choice(FORMAS_PAGAMENTO),
+                    "recebido": self.random.random() < 0.85,
+                }
+                for i in range(self.counts["entrada"])
+            ))
+            self.insert_rows(connection, Manutencao, (
+                {
+                    "maquinario_id": self.random.choice(maquinarios), "data": self.data(),
+                    "descricao": f"Manutenção {i}", "custo": self.valor(50, 20000),
+                    "responsavel": self.random.choice(NOMES),
+                }
+                for i in range(self.counts["manutencao"])
+            ))
+            self.insert_rows(connection, Pagamento, (
+                {
+                    "funcionario_id": self.random.choice(funcionarios), "data": self.data(),
+                    "valor": self.valor(200, 9000), "tipo": self.random.choice(["Salário", "Adiantamento", "Bônus"]),
+                }
+                for i in range(self.counts["pagamento"])
+            ))
+            self.insert_rows(connection, Producao, (self.producao() for i in range(self.counts["producao"])))
+
+        if engine.dialect.name == "postgresql":
+            # Estatísticas atualizadas, para que os planos reflitam o volume gerado
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                connection.execute(text("ANALYZE"))
+        return self.counts
+
+    def despesa(self, i, fornecedores):
+        data = self.data()
+        pago = self.random.random() < 0.8
+        return {
+            "descricao": f"Despesa {i}", "valor": self.valor(10, 30000), "data": data,
+            "categoria": self.random.choice(CATEGORIAS_DESPESA),
+            "forma_pagamento": self.random.choice(FORMAS_PAGAMENTO), "pago": pago,
+            "fornecedor_id": self.random.choice(fornecedores) if self.random.random() < 0.9 else None,
+            "data_pagamento": data if pago else data + datetime.timedelta(days=self.random.randrange(60)),
+            "data_adicionou": data, "data_registro": datetime.datetime.combine(data, datetime.time(12)),
+        }
+
+    def producao(self):
+        inicio = self.data()
+        area = self.random.choice([None, round(self.random.uniform(1, 500), 1)])
+        return {
+            "produto": self.random.choice(PRODUTOS), "unidade": self.random.choice(UNIDADES),
+            "quantidade": round(self.random.uniform(10, 100000), 1), "area": area,
+            "data_inicio": inicio, "data_fim": inicio + datetime.timedelta(days=self.random.randrange(60, 200)),
+            "custo_total": self.valor(1000, 500000), "valor_venda": self.valor(1000, 900000),
+        }
+
+    def insert_names(self, connection, entity, nomes):
+        """Grava cadastros com nome (e nome_busca); retorna os ids gerados."""
+        return self.insert_rows(connection, entity, ({"nome": nome, "nome_busca": search_key(nome)} for nome in nomes))
+
+    def insert_rows(self, connection, entity, rows):
+        """Grava as linhas em lotes de LOTE e retorna os ids da tabela."""
+        start = time.perf_counter()
+        lote = []
+        for row in rows:
+            lote.append(row)
+            if len(lote) == LOTE:
+                connection.execute(insert(entity.__table__), lote)
+                lote = []
+        if lote:
+            connection.execute(insert(entity.__table__), lote)
+        self.timings[entity.__tablename__] = time.perf_counter() - start
+        return connection.execute(select(entity.id).order_by(entity.id)).scalars().all()
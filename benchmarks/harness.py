@@ -0,0 +1,174 @@
+"""Infraestrutura dos benchmarks: banco alvo, medição, espera pela interface e resultados em JSON."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+
+from sqlalchemy.engine import make_url
+
+import database.db as db
+
+# Registro dos benchmarks, na ordem em que são declarados (ver suite.py)
+BENCHMARKS = []
+
+
+def benchmark(name, repeat=None):
+    """Registra a função como benchmark; repeat fixa o número de execuções medidas."""
+    def register(fn):
+        BENCHMARKS.append((name, fn, repeat))
+        return fn
+    return register
+
+
+def default_url():
+    """Banco dos benchmarks: o banco configurado no .env com o sufixo '_bench' (ex.: fazenda_bench)."""
+    url = make_url(db.DATABASE_URL)
+    if not db.is_sqlite(db.DATABASE_URL):
+        return url.set(database=f"{url.database}_bench").render_as_string(hide_password=False)
+    if url.database in (None, "", ":memory:"):
+        return "sqlite:///fazenda_bench.db"
+    name, extension = os.path.splitext(url.database)
+    return url.set(database=f"{name}_bench{extension}").render_as_string(hide_password=False)
+
+
+def bind_database(url):
+    """Aponta o engine e a Session de database.db para o banco dos benchmarks."""
+    if not db.is_sqlite(url):
+        from sqlalchemy_utils import database_exists, create_database
+        if not database_exists(url):
+            create_database(url)
+    engine = db.create_engine_for(url)
+    db.engine = engine
+    db.Session.configure(bind=engine)
+    db.install_pool_counters(engine)
+    db.install_query_monitor(engine)
+    return engine
+
+
+class BenchmarkContext:
+    """Estado compartilhado pelos benchmarks de uma execução da suíte."""
+
+    def __init__(self, app, timeout=120):
+        self.app = app
+        self.timeout = timeout
+        self.window = None  # MainWindow usada pelos benchmarks das abas
+        self.samples = []
+        self.errors = []    # Mensagens de erro exibidas pela interface durante o benchmark
+        self.counter = 0    # Para gerar valores únicos (ex.: CPF) a cada execução
+
+    @contextmanager
+    def measure(self):
+        """Mede o bloco como uma execução do benchmark atual."""
+        start = time.perf_counter()
+        yield
+        self.samples.append(time.perf_counter() - start)
+
+    def wait(self, condition):
+        """Processa os eventos do Qt até condition() ser verdadeira (TimeoutError após timeout)."""
+        deadline = time.perf_counter() + self.timeout
+        while not condition():
+            if time.perf_counter() > deadline:
+                raise TimeoutError(f"Tempo esgotado após {self.timeout}s")
+            self.app.processEvents()
+            time.sleep(0.0005)
+        self.app.processEvents()
+
+    def wait_idle(self, *loaders):
+        """Aguarda os BackgroundLoader (ou modelos, pelo seu loader) terminarem."""
+        loaders = [getattr(loader, "loader", loader) for loader in loaders]
+        self.wait(lambda: not any(loader.is_busy() for loader in loaders))
+
+    def run(self, fn):
+        """Executa uma vez o benchmark; um erro exibido pela interface conta como falha."""
+        self.errors = []
+        fn(self)
+        if self.errors:
+            raise RuntimeError(self.errors[0])
+
+    def next_id(self):
+        self.counter += 1
+        return self.counter
+
+
+def summarize(samples):
+    """Estatísticas em milissegundos de uma lista de durações em segundos."""
+    runs = [round(sample * 1000, 3) for sample in samples]
+    return {
+        "runs_ms": runs,
+        "min_ms": min(runs),
+        "median_ms": round(statistics.median(runs), 3),
+        "mean_ms": round(statistics.mean(runs), 3),
+        "max_ms": max(runs),
+    }
+
+
+def run_benchmarks(context, repeat, warmup=1, selected=None, log=None):
+    """Executa os benchmarks registrados; retorna {nome: estatísticas ou {"error": ...}}."""
+    results = {}
+    for name, fn, fixed_repeat in BENCHMARKS:
+        if selected and not any(pattern in name for pattern in selected):
+            continue
+        try:
+            for _ in range(warmup):
+                context.run(fn)
+            context.samples = []
+            for _ in range(fixed_repeat or repeat):
+                context.run(fn)
+            if not context.samples:
+                raise RuntimeError("O benchmark não mediu nenhum trecho")
+            results[name] = summarize(context.samples)
+        except Exception as e:
+            results[name] = {"error": f"{type(e).__name__}: {e}"}
+        finally:
+            context.samples = []
+        if log:
+            result = results[name]
+            log(f"{name}: " + (f"{result['median_ms']:.1f} ms" if "median_ms" in result else result["error"]))
+    return results
+
+
+def git_commit():
+    """Commit atual do repositório, se disponível."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(os.path.dirname(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Dados da máquina e do código em que os benchmarks rodaram."""
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def write_results(path, meta, results):
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump({"meta": meta, "results": results}, output, indent=2, ensure_ascii=False)
+
+
+def compare(baseline, current, threshold=0.10):
+    """Compara as medianas de duas execuções; retorna [(nome, antes, depois, variação, regrediu)].
+
+    Uma variação acima de threshold (fração, 0.10 = 10%) conta como regressão.
+    Benchmarks com erro ou presentes em só uma das execuções ficam de fora.
+    """
+    rows = []
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name, {}).get("median_ms")
+        after = result.get("median_ms")
+        if before is None or after is None:
+            continue
+        change = (after - before) / before if before else 0.0
+        rows.append((name, before, after, change, change > threshold))
+    return rows
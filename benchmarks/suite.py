@@ -0,0 +1,272 @@
+"""Benchmarks da aplicação: janela principal, carregamento das abas, diálogos e relatórios.
+
+Cada benchmark mede com context.measure() apenas a ação do usuário e espera
+as consultas em segundo plano terminarem, como o usuário esperaria a tabela
+aparecer. Preparação e limpeza ficam fora da medição.
+"""
+import datetime
+
+from PyQt5.QtCore import Qt
+from sqlalchemy import select
+
+from database import session_scope, Fornecedor, Cliente
+from database.payroll import preview_payroll
+from database.reports import financial_summary, production_analytics
+from ui import MainWindow
+from ui.tabs.financeiro_tab import DespesaDialog, EntradaDialog
+from ui.tabs.maquinario_tab import MaquinarioDialog
+from ui.tabs.producao_tab import ProducaoDialog, AnalyticsDialog, INICIO_SAFRA
+from ui.tabs.funcionarios_tab import FuncionarioDialog, PayrollDialog
+from .harness import benchmark
+
+
+def first_name(entity):
+    with session_scope() as session:
+        return session.scalar(select(entity.nome).order_by(entity.id).limit(1))
+
+
+def financeiro_idle(context, tab):
+    context.wait_idle(tab.entradas_model, tab.despesas_model, tab.resumo_loader)
+
+
+def window(context):
+    """MainWindow compartilhada, com todas as abas construídas e carregadas."""
+    if context.window is None:
+        context.window = MainWindow(prefetch_tabs=False)
+        context.window.show()
+        financeiro_idle(context, context.window.financeiro_tab)
+        for tab in (context.window.maquinario_tab, context.window.producao_tab, context.window.funcionarios_tab):
+            context.wait_idle(tab.model)
+    return context.window
+
+
+def close_dialog(dialog):
+    dialog.close()
+    dialog.deleteLater()
+
+
+# Janela principal
+
+@benchmark("MainWindow.__init__")
+def main_window(context):
+    with context.measure():
+        main = MainWindow(prefetch_tabs=False)
+        main.show()
+        financeiro_idle(context, main.financeiro_tab)
+    main.close()
+    main.deleteLater()
+
+
+# Abas
+
+@benchmark("FinanceiroTab.load_despesas")
+def load_despesas(context):
+    tab = window(context).financeiro_tab
+    with context.measure():
+        tab.load_despesas()
+        financeiro_idle(context, tab)
+
+
+@benchmark("FinanceiroTab.load_entradas")
+def load_entradas(context):
+    tab = window(context).financeiro_tab
+    with context.measure():
+        tab.load_entradas()
+        financeiro_idle(context, tab)
+
+
+@benchmark("FinanceiroTab.load_resumo")
+def load_resumo(context):
+    tab = window(context).financeiro_tab
+    for periodo in range(tab.periodo_input.count()):
+        tab.periodo_input.blockSignals(True)
+        tab.periodo_input.setCurrentIndex(periodo)
+        tab.periodo_input.blockSignals(False)
+        with context.measure():
+            tab.load_resumo()
+            context.wait_idle(tab.resumo_loader)
+
+
+@benchmark("FinanceiroTab.despesas_scroll")
+def despesas_scroll(context):
+    """Rolagem até o décimo bloco de despesas, sem filtro de período."""
+    model = window(context).financeiro_tab.despesas_model
+    model.set_filters([])
+    context.wait_idle(model)
+    with context.measure():
+        for _ in range(9):
+            if not model.canFetchMore():
+                break
+            model.fetchMore()
+            context.wait_idle(model)
+    window(context).financeiro_tab.load_despesas()
+    context.wait_idle(model)
+
+
+@benchmark("FinanceiroTab.despesas_sort")
+def despesas_sort(context):
+    """Ordenação das despesas pelo valor, alternando crescente e decrescente."""
+    model = window(context).financeiro_tab.despesas_model
+    column = [column.title for column in model.columns].index("Valor (R$)")
+    for order in (Qt.DescendingOrder, Qt.AscendingOrder):
+        with context.measure():
+            model.sort(column, order)
+            context.wait_idle(model)
+
+
+@benchmark("MaquinarioTab.load_maquinarios")
+def load_maquinarios(context):
+    tab = window(context).maquinario_tab
+    with context.measure():
+        tab.load_maquinarios()
+        context.wait_idle(tab.model)
+
+
+@benchmark("MaquinarioTab.load_manutencoes")
+def load_manutencoes(context):
+    tab = window(context).maquinario_tab
+    for row in (0, 1):
+        with context.measure():
+            tab.table.selectRow(row)
+            context.wait_idle(tab.manutencoes_model)
+
+
+@benchmark("ProducaoTab.load_producoes")
+def load_producoes(context):
+    tab = window(context).producao_tab
+    with context.measure():
+        tab.load_producoes()
+        context.wait_idle(tab.model)
+
+
+@benchmark("FuncionariosTab.load_funcionarios")
+def load_funcionarios(context):
+    tab = window(context).funcionarios_tab
+    with context.measure():
+        tab.load_funcionarios()
+        context.wait_idle(tab.model)
+
+
+# Diálogos (abrir e salvar um registro novo, na sessão da aba)
+
+@benchmark("DespesaDialog.open")
+def despesa_open(context):
+    tab = window(context).financeiro_tab
+    with context.measure():
+        dialog = DespesaDialog(tab, db=tab.db)
+        dialog.show()
+        context.app.processEvents()
+    close_dialog(dialog)
+
+
+@benchmark("DespesaDialog.save")
+def despesa_save(context):
+    tab = window(context).financeiro_tab
+    dialog = DespesaDialog(tab, db=tab.db)
+    dialog.descricao_input.setText(f"Benchmark {context.next_id()}")
+    dialog.valor_input.setText("1.234,56")
+    dialog.fornecedor_input.setText(first_name(Fornecedor))
+    with context.measure():
+        dialog.save_despesa()
+    close_dialog(dialog)
+
+
+@benchmark("EntradaDialog.save")
+def entrada_save(context):
+    tab = window(context).financeiro_tab
+    dialog = EntradaDialog(tab, db=tab.db)
+    dialog.descricao_input.setText(f"Benchmark {context.next_id()}")
+    dialog.valor_input.setText("987,65")
+    dialog.cliente_input.setText(first_name(Cliente))
+    with context.measure():
+        dialog.save_entrada()
+    close_dialog(dialog)
+
+
+@benchmark("MaquinarioDialog.save")
+def maquinario_save(context):
+    tab = window(context).maquinario_tab
+    dialog = MaquinarioDialog(tab, db=tab.db)
+    dialog.nome_input.setText(f"Benchmark {context.next_id()}")
+    dialog.ano_input.setText("2020")
+    with context.measure():
+        dialog.save_maquinario()
+    close_dialog(dialog)
+
+
+@benchmark("ProducaoDialog.save")
+def producao_save(context):
+    tab = window(context).producao_tab
+    dialog = ProducaoDialog(tab, db=tab.db)
+    dialog.quantidade_input.setText("1.500")
+    dialog.area_input.setText("12,5")
+    with context.measure():
+        dialog.save_producao()
+    close_dialog(dialog)
+
+
+@benchmark("FuncionarioDialog.save")
+def funcionario_save(context):
+    tab = window(context).funcionarios_tab
+    dialog = FuncionarioDialog(tab, db=tab.db)
+    numero = context.next_id()
+    dialog.nome_input.setText(f"Benchmark {numero}")
+    dialog.cpf_input.setText(f"B{numero:010d}")
+    dialog.salario_input.setText("2.500,00")
+    with context.measure():
+        dialog.save_funcionario()
+    close_dialog(dialog)
+
+
+@benchmark("AnalyticsDialog.open")
+def analytics_open(context):
+    tab = window(context).producao_tab
+    with context.measure():
+        dialog = AnalyticsDialog(tab)
+        dialog.show()
+        context.wait_idle(dialog.loader)
+    close_dialog(dialog)
+
+
+@benchmark("PayrollDialog.load_preview")
+def payroll_preview_dialog(context):
+    tab = window(context).funcionarios_tab
+    dialog = PayrollDialog(tab)
+    dialog.show()
+    context.wait_idle(dialog.loader)
+    with context.measure():
+        dialog.load_preview()
+        context.wait_idle(dialog.loader)
+    close_dialog(dialog)
+
+
+# Relatórios (consultas diretas, sem a interface)
+
+@benchmark("reports.financial_summary (mês)")
+def summary_month(context):
+    hoje = datetime.date.today()
+    with context.measure():
+        with session_scope() as session:
+            financial_summary(session, hoje.replace(day=1), hoje)
+
+
+@benchmark("reports.financial_summary (12 meses)")
+def summary_year(context):
+    hoje = datetime.date.today()
+    with context.measure():
+        with session_scope() as session:
+            financial_summary(session, hoje - datetime.timedelta(days=365), hoje)
+
+
+@benchmark("reports.production_analytics")
+def analytics(context):
+    with context.measure():
+        with session_scope() as session:
+            production_analytics(session, datetime.date.today().year - 3, INICIO_SAFRA)
+
+
+@benchmark("payroll.preview_payroll")
+def payroll_preview(context):
+    with context.measure():
+        with session_scope() as session:
+            preview_payroll(session, datetime.date.today())
@@ -1,4 +1,18 @@
-from .db import init_db, get_session
+from .db import (
+    init_db,
+    get_session,
+    session_scope,
+    TabSession,
+    pool_status,
+    check_connection,
+    schema_is_current,
+    record_schema_fingerprint,
+    create_change_listener,
+    is_sqlite,
+    DATABASE_URL,
+    APP_DATABASE_URL,
+    REPLICA_URL
+)
 from .models import (
     Maquinario, 
     Manutencao, 
@@ -7,5 +21,6 @@ from .models import (
     Despesa, 
     Entrada, 
     Producao,
-    Fornecedor
+    Fornecedor,
+    Cliente
 ) 
\ No newline at end of file
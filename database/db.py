@@ -1,10 +1,19 @@
 import os
+import hashlib
 import logging
-from sqlalchemy import create_engine
+import threading
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.schema import CreateTable
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.ext.declarative import declarative_base
 from dotenv import load_dotenv
 from .models import Base
+from .migrations import run_migrations, head_version
+from .notifications import ChangeListener
+from .sync import SyncEngine, configure_replica_metadata, prepare_replica
+from .instrumentation import install_query_monitor
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -20,30 +29,235 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME", "fazenda")
 
-# String de conexão
-DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+# String de conexão: DATABASE_URL escolhe o banco (ex.: sqlite:///fazenda.db para uma
+# instalação monousuário, sem servidor); sem ela, o PostgreSQL das variáveis DB_*
+DATABASE_URL = os.getenv("DATABASE_URL") or f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
 
-# Criar engine com opções de pool para melhor gerenciamento de conexões
-engine = create_engine(
-    DATABASE_URL,
-    pool_pre_ping=True,  # Verifica se a conexão é válida antes de usar
-    pool_recycle=3600,   # Recicla conexões após 1 hora
-    echo=False           # Se True, habilita log SQL para debugging
-)
+# Ajustes de cada conexão SQLite: WAL permite ler enquanto outra conexão grava
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",    # Seguro com WAL; só o último commit pode se perder numa queda de energia
+    "foreign_keys": "ON",       # Como no PostgreSQL, as chaves estrangeiras são verificadas
+    "busy_timeout": "5000",     # Espera (ms) por um lock de escrita em vez de falhar na hora
+    "cache_size": "-20000",     # 20 MB de cache de páginas por conexão
+    "temp_store": "MEMORY",
+    "mmap_size": "268435456",   # Leitura do arquivo mapeada em memória (256 MB)
+}
 
-# Criar sessão
-Session = sessionmaker(bind=engine)
+def is_sqlite(url):
+    return make_url(url).get_backend_name() == "sqlite"
+
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma} = {value}")
+    cursor.close()
+
+def create_engine_for(url, connect_args=None):
+    """Cria o engine do banco informado, com as opções adequadas a cada backend.
+    
+    No SQLite cada conexão é usada por uma thread de cada vez (as consultas
+    das abas rodam no QThreadPool), com os pragmas de SQLITE_PRAGMAS; um
+    banco em memória (sqlite://) usa uma única conexão compartilhada.
+    """
+    if is_sqlite(url):
+        options = {"connect_args": {"check_same_thread": False}}
+        if make_url(url).database in (None, "", ":memory:"):
+            options["poolclass"] = StaticPool
+        target_engine = create_engine(url, echo=False, **options)
+        event.listen(target_engine, "connect", set_sqlite_pragmas)
+        return target_engine
+    # Opções de pool para melhor gerenciamento de conexões
+    return create_engine(
+        url,
+        pool_pre_ping=True,  # Verifica se a conexão é válida antes de usar
+        pool_recycle=3600,   # Recicla conexões após 1 hora
+        echo=False,          # Se True, habilita log SQL para debugging
+        connect_args=connect_args or {}
+    )
+
+# Réplica local para trabalhar sem conexão: com REPLICA_URL (ex.: sqlite:///fazenda_local.db),
+# a interface lê e grava nesse arquivo e o SyncEngine o sincroniza com o banco de DATABASE_URL
+REPLICA_URL = os.getenv("REPLICA_URL")
+
+# Banco em que a interface lê e grava
+APP_DATABASE_URL = REPLICA_URL or DATABASE_URL
+
+# Segundos entre os ciclos de sincronização da réplica
+SYNC_INTERVAL = float(os.getenv("SYNC_INTERVAL_S", "15"))
+
+if REPLICA_URL:
+    configure_replica_metadata(Base.metadata)
+
+engine = create_engine_for(APP_DATABASE_URL)
+
+# Banco central, usado só pela sincronização no modo réplica (sem esperar um servidor inacessível)
+central_engine = create_engine_for(DATABASE_URL, connect_args={"connect_timeout": 10}) if REPLICA_URL else engine
+
+# Criar sessão (os registros continuam utilizáveis após o commit, sem nova consulta)
+Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+# Contadores de conexões retiradas e devolvidas ao pool, para detectar vazamentos
+_pool_lock = threading.Lock()
+_pool_counters = {"checkouts": 0, "checkins": 0}
+
+def install_pool_counters(target_engine):
+    """Passa a contar as conexões retiradas e devolvidas ao pool do engine."""
+    @event.listens_for(target_engine, "checkout")
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        with _pool_lock:
+            _pool_counters["checkouts"] += 1
+    
+    @event.listens_for(target_engine, "checkin")
+    def on_checkin(dbapi_connection, connection_record):
+        with _pool_lock:
+            _pool_counters["checkins"] += 1
+
+install_pool_counters(engine)
+install_query_monitor(engine)
+
+def pool_status():
+    """Retorna os contadores do pool; checked_out deve voltar a zero quando nada está em uso."""
+    with _pool_lock:
+        checkouts, checkins = _pool_counters["checkouts"], _pool_counters["checkins"]
+    return {"checkouts": checkouts, "checkins": checkins, "checked_out": checkouts - checkins}
+
+# Arquivo onde é registrada a impressão digital do esquema já preparado
+SCHEMA_STAMP_FILE = os.getenv("SCHEMA_STAMP_FILE", "fazenda.schema")
 
 def init_db():
-    """Inicializa o banco de dados, criando as tabelas se não existirem."""
+    """Inicializa o banco de dados, criando as tabelas e aplicando as migrações pendentes."""
     try:
         Base.metadata.create_all(engine)
+        run_migrations(engine)
+        if REPLICA_URL:
+            prepare_replica(engine)
         logger.info("Banco de dados inicializado com sucesso.")
         return True
     except Exception as e:
         logger.error(f"Erro ao inicializar banco de dados: {str(e)}")
         raise
     
+def check_connection():
+    """Verifica rapidamente se o banco de dados responde."""
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+
+def schema_fingerprint():
+    """Calcula uma impressão digital do banco alvo e do esquema declarado nos modelos."""
+    target = engine.url.render_as_string(hide_password=True)
+    digest = hashlib.sha256(f"{target}:{head_version()}".encode())
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=engine.dialect)).encode())
+    return digest.hexdigest()
+
+def schema_is_current():
+    """Indica se o esquema atual já foi preparado com sucesso em uma execução anterior."""
+    try:
+        with open(SCHEMA_STAMP_FILE, encoding="utf-8") as stamp:
+            return stamp.read().strip() == schema_fingerprint()
+    except OSError:
+        return False
+
+def record_schema_fingerprint():
+    """Registra a impressão digital do esquema após uma preparação bem-sucedida."""
+    try:
+        with open(SCHEMA_STAMP_FILE, "w", encoding="utf-8") as stamp:
+            stamp.write(schema_fingerprint())
+    except OSError as e:
+        logger.warning(f"Não foi possível registrar a impressão digital do esquema: {str(e)}")
+    
+def create_change_listener(callback):
+    """Cria o ouvinte das alterações feitas por outros terminais (None se o banco não suportar).
+    
+    No modo réplica, o ouvinte é o SyncEngine, que entrega as alterações
+    trazidas do servidor central para a réplica.
+    """
+    if REPLICA_URL:
+        if not SyncEngine.is_supported(central_engine):
+            logger.warning("A réplica local só sincroniza com um banco central PostgreSQL; trabalhando sem sincronização.")
+            return None
+        return SyncEngine(engine, central_engine, callback, interval=SYNC_INTERVAL)
+    if not ChangeListener.is_supported(engine):
+        return None
+    return ChangeListener(engine, callback)
+    
+@contextmanager
+def session_scope():
+    """Unidade de trabalho curta: confirma ao final, desfaz em caso de erro e sempre fecha a sessão."""
+    session = Session()
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+class TabSession:
+    """Sessão de longa duração de uma aba e dos diálogos abertos por ela.
+    
+    Os registros lidos ficam no identity map e são reaproveitados ao editar
+    de novo; os diálogos alteram e gravam os objetos na mesma sessão em que
+    foram carregados. Cada leitura ou gravação termina sua transação, de modo
+    que nenhuma conexão fica retida entre uma ação e outra.
+    """
+    
+    def __init__(self):
+        self.session = Session()
+    
+    def get(self, entity, entity_id, options=()):
+        """Retorna o registro pelo id, sem consulta se já estiver carregado (None se não existir).
+
+        options (ex.: joinedload(Despesa.fornecedor)) carrega junto os
+        relacionamentos que serão lidos depois: acessá-los sem estarem
+        carregados abriria outra transação, que reteria a conexão. Com
+        options o registro é sempre relido, pois um relacionamento já
+        carregado pode ter ficado desatualizado (ex.: só a chave
+        estrangeira foi alterada).
+        """
+        try:
+            return self.session.get(entity, entity_id, options=options, populate_existing=bool(options))
+        finally:
+            self.session.commit()  # Devolve a conexão, se a leitura usou uma
+    
+    def attach(self, obj):
+        """Coloca o objeto nesta sessão: novos são adicionados e os carregados em outra
+        sessão são mesclados (sem consulta se o registro já estiver no identity map)."""
+        if obj in self.session:
+            return obj
+        if inspect(obj).transient:
+            self.session.add(obj)
+            return obj
+        return self.session.merge(obj)
+    
+    def commit(self):
+        """Grava as alterações pendentes; os objetos continuam carregados."""
+        self.session.commit()
+    
+    def rollback(self):
+        """Desfaz as alterações pendentes (os objetos são recarregados no próximo acesso)."""
+        self.session.rollback()
+    
+    def delete(self, obj):
+        """Exclui o registro e grava a exclusão."""
+        try:
+            self.session.delete(obj)
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+    
+    def expire(self, entity, entity_id):
+        """Descarta a cópia carregada de um registro alterado por outro terminal."""
+        obj = self.session.identity_map.get(self.session.identity_key(entity, entity_id))
+        if obj is not None:
+            self.session.expire(obj)
+    
+    def close(self):
+        self.session.close()
+    
 def get_session():
     """Retorna uma nova sessão do banco de dados."""
     try:
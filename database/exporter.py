@@ -0,0 +1,94 @@
+import os
+import csv
+from sqlalchemy import select, func
+
+# Linhas lidas do cursor do servidor por vez
+EXPORT_BATCH_SIZE = 2000
+
+
+class ExportCancelled(Exception):
+    """Exportação interrompida pelo usuário; o arquivo não é criado."""
+
+
+class CsvWriter:
+    """Grava as linhas em CSV com ';', como o Excel em português espera."""
+
+    def __init__(self, path, columns):
+        self.file = open(path, "w", newline="", encoding="utf-8-sig")
+        self.writer = csv.writer(self.file, delimiter=";")
+        self.formatters = [formatter for _, formatter in columns]
+        self.writer.writerow([title for title, _ in columns])
+
+    def write(self, row):
+        self.writer.writerow([
+            formatter(value) if formatter else ("" if value is None else value)
+            for formatter, value in zip(self.formatters, row)
+        ])
+
+    def close(self):
+        self.file.close()
+
+    def abort(self):
+        self.file.close()
+
+
+class XlsxWriter:
+    """Grava as linhas em XLSX no modo somente escrita (memória constante)."""
+
+    def __init__(self, path, columns):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise RuntimeError("Instale o pacote openpyxl para exportar em XLSX.")
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet()
+        self.sheet.append([title for title, _ in columns])
+
+    def write(self, row):
+        # Valores brutos: números e datas continuam utilizáveis na planilha
+        self.sheet.append(list(row))
+
+    def close(self):
+        self.workbook.save(self.path)
+
+    def abort(self):
+        self.workbook.close()
+
+
+def export_rows(session, query, path, columns, progress=None, cancelled=None):
+    """Exporta o resultado de query para path (.csv ou .xlsx) sem carregá-lo na memória.
+
+    columns é a lista [(título, formatador)] das colunas selecionadas em
+    query; o formatador é usado apenas no CSV. As linhas são lidas com um
+    cursor do lado do servidor (yield_per) e gravadas em um arquivo
+    temporário, renomeado para path apenas ao final. Retorna o número de
+    linhas exportadas.
+    """
+    total = session.execute(select(func.count()).select_from(query.subquery())).scalar() or 1
+    writer_class = XlsxWriter if path.lower().endswith(".xlsx") else CsvWriter
+
+    temp_path = f"{path}.parcial"
+    writer = writer_class(temp_path, columns)
+    exported = 0
+    try:
+        result = session.execute(query.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        for partition in result.partitions():
+            if cancelled and cancelled():
+                raise ExportCancelled()
+            for row in partition:
+                writer.write(row)
+            exported += len(partition)
+            if progress:
+                progress(min(99, exported * 100 // total), exported)
+        writer.close()
+        os.replace(temp_path, path)
+    except BaseException:
+        writer.abort()
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+    if progress:
+        progress(100, exported)
+    return exported
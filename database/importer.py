@@ -0,0 +1,354 @@
+import io
+import os
+import csv
+import datetime
+import unicodedata
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import insert, select
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import Despesa, Entrada, Fornecedor, Cliente, search_key, utcnow
+
+# Linhas validadas e gravadas de uma vez
+BATCH_SIZE = 5000
+
+# Codificações tentadas, em ordem (planilhas do Excel costumam vir em cp1252)
+ENCODINGS = ["utf-8-sig", "cp1252"]
+
+
+class ImportCancelled(Exception):
+    """Importação interrompida pelo usuário; nada foi gravado."""
+
+
+class ImportResult:
+    """Resultado de uma importação: registros gravados e linhas rejeitadas."""
+
+    def __init__(self):
+        self.imported = 0
+        self.errors = []  # [(número da linha no arquivo, mensagem)]
+
+    def write_report(self, path):
+        """Grava as linhas rejeitadas em um CSV (linha;erro)."""
+        with open(path, "w", newline="", encoding="utf-8-sig") as report:
+            writer = csv.writer(report, delimiter=";")
+            writer.writerow(["linha", "erro"])
+            writer.writerows(self.errors)
+
+    def __repr__(self):
+        return f"<ImportResult(imported='{self.imported}', errors='{len(self.errors)}')>"
+
+
+def normalize_header(text):
+    """Normaliza um cabeçalho: sem acentos, minúsculo e com '_' entre as palavras."""
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    words = "".join(c if c.isalnum() else " " for c in text.lower()).split()
+    return "_".join(w for w in words if w not in ("de", "da", "do"))
+
+
+def parse_text(text):
+    return text.strip() or None
+
+
+def parse_valor(text):
+    """Converte valores como '1.234,56', 'R$ 10,00' ou '1234.56'."""
+    text = text.replace("R$", "").replace(" ", "").strip()
+    if not text:
+        return None
+    if "," in text:
+        text = text.replace(".", "").replace(",", ".")
+    try:
+        valor = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"valor inválido '{text}'")
+    if valor <= 0:
+        raise ValueError("o valor deve ser maior que zero")
+    return valor.quantize(Decimal("0.01"))
+
+
+def parse_date(text):
+    """Converte datas nos formatos dd/mm/aaaa, dd/mm/aa ou aaaa-mm-dd."""
+    text = text.strip()
+    if not text:
+        return None
+    for fmt in ("%d/%m/%Y", "%d/%m/%y", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(text, fmt).date()
+        except ValueError:
+            pass
+    raise ValueError(f"data inválida '{text}'")
+
+
+TRUE_VALUES = {"sim", "s", "true", "t", "1", "x", "pago", "recebido"}
+FALSE_VALUES = {"nao", "n", "false", "f", "0", "pendente"}
+
+
+def parse_bool(text):
+    text = normalize_header(text)
+    if not text:
+        return None
+    if text in TRUE_VALUES:
+        return True
+    if text in FALSE_VALUES:
+        return False
+    raise ValueError(f"valor sim/não inválido '{text}'")
+
+
+class ImportField:
+    """Uma coluna aceita no arquivo importado."""
+
+    def __init__(self, name, parser, required=False, max_length=None, aliases=()):
+        self.name = name
+        self.parser = parser
+        self.required = required
+        self.max_length = max_length
+        self.aliases = {name, *aliases}
+
+    def parse(self, text):
+        value = self.parser(text)
+        if value is None and self.required:
+            raise ValueError(f"'{self.name}' é obrigatório")
+        if self.max_length and value is not None and len(value) > self.max_length:
+            raise ValueError(f"'{self.name}' tem mais de {self.max_length} caracteres")
+        return value
+
+
+class ImportSpec:
+    """Colunas aceitas e valores padrão da importação de uma entidade."""
+
+    def __init__(self, entity, fields, defaults):
+        self.entity = entity
+        self.fields = fields
+        self.defaults = defaults
+
+    def map_header(self, header):
+        """Associa cada coluna do arquivo ao campo correspondente (ou None)."""
+        by_alias = {alias: field for field in self.fields for alias in field.aliases}
+        columns = [by_alias.get(normalize_header(title)) for title in header]
+
+        missing = [f.name for f in self.fields if f.required and f not in columns]
+        if missing:
+            raise ValueError(f"Colunas obrigatórias ausentes no arquivo: {', '.join(missing)}")
+        return columns
+
+    def parse_row(self, row, columns, now, updated_at):
+        """Converte uma linha do arquivo nos valores do registro (ValueError se inválida)."""
+        values = {field.name: None for field in self.fields}
+        errors = []
+        for field, text in zip(columns, row):
+            if field is None:
+                continue
+            try:
+                values[field.name] = field.parse(text)
+            except ValueError as e:
+                errors.append(str(e))
+
+        for field in self.fields:
+            if field.required and values[field.name] is None and field in columns[len(row):]:
+                errors.append(f"'{field.name}' é obrigatório")
+        if errors:
+            raise ValueError("; ".join(errors))
+
+        self.defaults(values, now)
+        values["updated_at"] = updated_at
+        return values
+
+
+def despesa_defaults(values, now):
+    if values["pago"] is None:
+        values["pago"] = True
+    if values["produto_retirado"] is None:
+        values["produto_retirado"] = False
+    if values["data_pagamento"] is None:
+        values["data_pagamento"] = values["data"]
+    values["data_adicionou"] = now.date()
+    values["data_registro"] = now
+
+
+def entrada_defaults(values, now):
+    if values["recebido"] is None:
+        values["recebido"] = True
+
+
+IMPORT_SPECS = {
+    Despesa: ImportSpec(Despesa, [
+        ImportField("descricao", parse_text, required=True, max_length=200),
+        ImportField("valor", parse_valor, required=True),
+        ImportField("data", parse_date, required=True),
+        ImportField("categoria", parse_text, max_length=100),
+        ImportField("forma_pagamento", parse_text, max_length=100),
+        ImportField("pago", parse_bool, aliases=("status", "situacao")),
+        ImportField("fornecedor", parse_text, max_length=200),
+        ImportField("data_pagamento", parse_date),
+        ImportField("data_retirada", parse_date),
+        ImportField("produto_retirado", parse_bool, aliases=("retirado",)),
+        ImportField("usuario_adicionou", parse_text, max_length=100, aliases=("usuario",)),
+        ImportField("observacoes", parse_text, aliases=("observacao", "obs")),
+    ], despesa_defaults),
+    Entrada: ImportSpec(Entrada, [
+        ImportField("descricao", parse_text, required=True, max_length=200),
+        ImportField("valor", parse_valor, required=True),
+        ImportField("data", parse_date, required=True),
+        ImportField("categoria", parse_text, max_length=100),
+        ImportField("cliente", parse_text, max_length=100),
+        ImportField("forma_pagamento", parse_text, max_length=100),
+        ImportField("recebido", parse_bool, aliases=("status", "situacao")),
+        ImportField("observacoes", parse_text, aliases=("observacao", "obs")),
+    ], entrada_defaults),
+}
+
+
+# Campos de nome que viram chave estrangeira: entidade -> (campo, coluna do id, cadastro)
+LINKED_NAMES = {
+    Despesa: ("fornecedor", "fornecedor_id", Fornecedor),
+    Entrada: ("cliente", "cliente_id", Cliente),
+}
+
+
+def detect_encoding(path):
+    """Escolhe a codificação do arquivo a partir do seu início."""
+    with open(path, "rb") as f:
+        sample = f.read(65536)
+    for encoding in ENCODINGS:
+        try:
+            sample.decode(encoding)
+            return encoding
+        except UnicodeDecodeError as e:
+            if e.start >= len(sample) - 3:
+                return encoding  # Caractere cortado no fim da amostra
+    return ENCODINGS[-1]
+
+
+def upsert_by_name(connection, entity, nomes):
+    """Cadastra em entity (Fornecedor ou Cliente) os nomes que ainda não existem e retorna {nome: id}.
+
+    Um nome que difere de um cadastro existente só em maiúsculas ou
+    acentos é associado a ele, sem criar outro.
+    """
+    if not nomes:
+        return {}
+    chaves = {nome: search_key(nome) for nome in nomes}
+    existentes = {}
+    for id, nome_busca in connection.execute(
+        select(entity.id, entity.nome_busca)
+        .where(entity.nome_busca.in_(set(chaves.values())))
+        .order_by(entity.id)
+    ):
+        existentes.setdefault(nome_busca, id)
+
+    novos = {}
+    for nome in nomes:
+        if chaves[nome] not in existentes:
+            novos.setdefault(chaves[nome], nome)
+    if novos:
+        _insert_names(connection, entity, list(novos.values()))
+        for id, nome_busca in connection.execute(
+            select(entity.id, entity.nome_busca)
+            .where(entity.nome_busca.in_(set(novos)))
+            .order_by(entity.id)
+        ):
+            existentes.setdefault(nome_busca, id)
+    return {nome: existentes.get(chave) for nome, chave in chaves.items()}
+
+
+def _insert_names(connection, entity, nomes):
+    dialect_insert = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}.get(connection.dialect.name)
+    if dialect_insert:
+        connection.execute(
+            dialect_insert(entity.__table__).on_conflict_do_nothing(index_elements=["nome"]),
+            [{"nome": nome} for nome in nomes]
+        )
+        return
+
+    existentes = set(connection.execute(select(entity.nome).where(entity.nome.in_(nomes))).scalars())
+    novos = [{"nome": nome} for nome in nomes if nome not in existentes]
+    if novos:
+        connection.execute(insert(entity.__table__), novos)
+
+
+def copy_rows(connection, table, rows):
+    """Grava as linhas com COPY (PostgreSQL), na transação da conexão."""
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([row[c] for c in columns])  # None vira campo vazio, isto é, NULL
+    buffer.seek(0)
+
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)"
+    cursor = connection.connection.cursor()
+    try:
+        if hasattr(cursor, "copy_expert"):  # psycopg2
+            cursor.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with cursor.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+    finally:
+        cursor.close()
+
+
+def write_batch(connection, spec, rows):
+    if spec.entity in LINKED_NAMES:
+        field, id_column, target = LINKED_NAMES[spec.entity]
+        ids = upsert_by_name(connection, target, sorted({row[field] for row in rows if row[field]}))
+        for row in rows:
+            row[id_column] = ids.get(row.pop(field))
+    if connection.dialect.name == "postgresql":
+        copy_rows(connection, spec.entity.__tablename__, rows)
+    else:
+        connection.execute(insert(spec.entity.__table__), rows)
+
+
+def import_csv(session, path, entity, progress=None, cancelled=None, batch_size=BATCH_SIZE):
+    """Importa um arquivo CSV de despesas ou entradas em uma única transação.
+
+    O arquivo é lido em fluxo e gravado em blocos de batch_size linhas (com
+    COPY no PostgreSQL). Linhas inválidas são puladas e relatadas no
+    resultado; qualquer erro do banco, ou o cancelamento, desfaz tudo.
+    progress(percentual, gravados) é chamado a cada bloco e cancelled()
+    é consultado entre os blocos.
+    """
+    spec = IMPORT_SPECS[entity]
+    result = ImportResult()
+    size = os.path.getsize(path) or 1
+    now, updated_at = datetime.datetime.now(), utcnow()
+
+    with open(path, newline="", encoding=detect_encoding(path)) as f:
+        first_line = f.readline()
+        delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+        columns = spec.map_header(next(csv.reader([first_line], delimiter=delimiter), []))
+        reader = csv.reader(f, delimiter=delimiter)
+
+        try:
+            connection = session.connection()
+            batch = []
+            for row in reader:
+                if not any(cell.strip() for cell in row):
+                    continue
+                try:
+                    batch.append(spec.parse_row(row, columns, now, updated_at))
+                except ValueError as e:
+                    result.errors.append((reader.line_num + 1, str(e)))
+                    continue
+
+                if len(batch) >= batch_size:
+                    if cancelled and cancelled():
+                        raise ImportCancelled()
+                    write_batch(connection, spec, batch)
+                    result.imported += len(batch)
+                    batch = []
+                    if progress:
+                        # Posição em bytes no arquivo (o tamanho é em bytes; os caracteres lidos não são)
+                        progress(min(99, f.buffer.tell() * 100 // size), result.imported)
+
+            if cancelled and cancelled():
+                raise ImportCancelled()
+            if batch:
+                write_batch(connection, spec, batch)
+                result.imported += len(batch)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+
+    if progress:
+        progress(100, result.imported)
+    return result
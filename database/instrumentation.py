@@ -0,0 +1,208 @@
+import os
+import time
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from sqlalchemy import event
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Consultas mais demoradas que isso (em ms) são registradas no log, com os parâmetros
+SLOW_QUERY_MS = 200
+
+# A mesma instrução executada mais vezes que isso em uma única ação indica um provável N+1
+REPEAT_THRESHOLD = 10
+
+# Limites (em ms) das faixas do histograma de latência; a última faixa é "acima do maior"
+LATENCY_BUCKETS_MS = (1, 5, 20, 100, 500)
+
+# Nome usado para as consultas feitas fora de qualquer ação (ex.: rolagem da tabela)
+NO_ACTION = "(sem ação)"
+
+_local = threading.local()
+
+# Ação em andamento em cada thread, para consulta a partir de outras threads (ver action_in_thread)
+_active_actions = {}
+
+
+class ActionRecord:
+    """Consultas feitas por uma execução de uma ação da interface.
+
+    Inclui as consultas que a ação disparou em segundo plano, que podem
+    terminar depois de a ação em si ter retornado.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.started = time.time()
+        self.queries = 0
+        self.duration = 0.0       # Soma das latências das consultas, em segundos
+        self.statements = Counter()
+        self.repeated = set()     # Instruções já apontadas como provável N+1
+
+    def __repr__(self):
+        return f"<ActionRecord(name='{self.name}', queries={self.queries})>"
+
+
+class ActionSummary:
+    """Totais acumulados de todas as execuções de uma ação."""
+
+    def __init__(self, name):
+        self.name = name
+        self.executions = 0
+        self.queries = 0
+        self.duration = 0.0
+        self.max_query = 0.0
+        self.histogram = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.repeated = 0         # Execuções com provável N+1
+
+    def add_query(self, duration):
+        self.queries += 1
+        self.duration += duration
+        self.max_query = max(self.max_query, duration)
+        ms = duration * 1000
+        for i, limit in enumerate(LATENCY_BUCKETS_MS):
+            if ms <= limit:
+                self.histogram[i] += 1
+                return
+        self.histogram[-1] += 1
+
+
+class QueryMonitor:
+    """Atribui cada instrução SQL à ação da interface em andamento.
+
+    A ação corrente é guardada por thread (ver action e resume); os trabalhos
+    em segundo plano retomam a ação de quem os agendou. Para cada ação são
+    acumulados o número de consultas, a latência (com histograma) e as
+    instruções repetidas.
+    """
+
+    def __init__(self, slow_query_ms=SLOW_QUERY_MS, repeat_threshold=REPEAT_THRESHOLD):
+        self.slow_query_ms = slow_query_ms
+        self.repeat_threshold = repeat_threshold
+        self._lock = threading.Lock()
+        self.summaries = {}
+        self.last = None  # ActionRecord da última ação que consultou o banco
+
+    def install(self, engine):
+        """Passa a medir as instruções executadas pelo engine."""
+        event.listen(engine, "before_cursor_execute", self._before_execute)
+        event.listen(engine, "after_cursor_execute", self._after_execute)
+
+    def _before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    def _after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is not None:
+            self.add_query(current_action(), statement, parameters, time.perf_counter() - start)
+
+    def add_query(self, record, statement, parameters, duration):
+        name = record.name if record is not None else NO_ACTION
+        repeated = False
+        with self._lock:
+            summary = self._summary(name)
+            summary.add_query(duration)
+            if record is not None:
+                if not record.queries:
+                    # Só as execuções que consultaram o banco contam (e aparecem como a última)
+                    summary.executions += 1
+                    self.last = record
+                record.queries += 1
+                record.duration += duration
+                record.statements[statement] += 1
+                if record.statements[statement] > self.repeat_threshold and statement not in record.repeated:
+                    record.repeated.add(statement)
+                    summary.repeated += 1
+                    repeated = True
+
+        if repeated:
+            logger.warning(
+                f"Provável N+1 em {name}: a mesma instrução foi executada mais de "
+                f"{self.repeat_threshold} vezes: {statement}"
+            )
+        ms = duration * 1000
+        if ms >= self.slow_query_ms:
+            logger.warning(
+                f"Consulta lenta ({ms:.0f} ms) em {name}: {statement} parâmetros={_shorten(parameters)}"
+            )
+
+    def _summary(self, name):
+        summary = self.summaries.get(name)
+        if summary is None:
+            summary = self.summaries[name] = ActionSummary(name)
+        return summary
+
+    def snapshot(self):
+        """Cópia dos totais por ação, da mais custosa para a menos custosa."""
+        with self._lock:
+            summaries = [_copy_summary(summary) for summary in self.summaries.values()]
+        return sorted(summaries, key=lambda summary: summary.duration, reverse=True)
+
+    def reset(self):
+        with self._lock:
+            self.summaries.clear()
+            self.last = None
+
+
+def _copy_summary(summary):
+    copy = ActionSummary(summary.name)
+    copy.__dict__.update(summary.__dict__, histogram=list(summary.histogram))
+    return copy
+
+
+def _shorten(parameters, limit=500):
+    text = repr(parameters)
+    return text if len(text) <= limit else text[:limit] + "..."
+
+
+monitor = QueryMonitor()
+
+
+def install_query_monitor(engine):
+    """Liga a instrumentação das consultas ao engine (limites do .env: SQL_SLOW_MS e SQL_REPEAT_THRESHOLD)."""
+    monitor.slow_query_ms = float(os.getenv("SQL_SLOW_MS", SLOW_QUERY_MS))
+    monitor.repeat_threshold = int(os.getenv("SQL_REPEAT_THRESHOLD", REPEAT_THRESHOLD))
+    monitor.install(engine)
+
+
+def current_action():
+    """ActionRecord da ação em andamento nesta thread (None fora de uma ação)."""
+    return getattr(_local, "record", None)
+
+
+@contextmanager
+def action(name):
+    """Marca as consultas do bloco como parte da ação name.
+
+    Dentro de outra ação, não inicia uma nova: as consultas ficam com a ação
+    mais externa, que é a que o usuário disparou.
+    """
+    if current_action() is not None:
+        yield current_action()
+        return
+    _local.record = ActionRecord(name)
+    _active_actions[threading.get_ident()] = _local.record
+    try:
+        yield _local.record
+    finally:
+        _local.record = None
+        _active_actions.pop(threading.get_ident(), None)
+
+
+def action_in_thread(thread_id):
+    """ActionRecord da ação em andamento na thread informada (ex.: a da interface), ou None."""
+    return _active_actions.get(thread_id)
+
+
+@contextmanager
+def resume(record):
+    """Retoma, em outra thread, a ação que agendou o trabalho (record pode ser None)."""
+    previous = current_action()
+    _local.record = record
+    try:
+        yield record
+    finally:
+        _local.record = previous
@@ -0,0 +1,462 @@
+import logging
+from sqlalchemy import text, inspect
+from .models import Cliente, search_key
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Chave do advisory lock que impede duas instâncias de migrarem ao mesmo tempo
+MIGRATION_LOCK_KEY = 48151623
+
+MIGRATIONS = []
+
+# Por quantos dias as entradas do change_log são mantidas
+CHANGE_LOG_RETENTION_DAYS = 30
+
+# Intervalo mínimo, em segundos, entre as limpezas do change_log feitas durante o uso
+CHANGE_LOG_PRUNE_INTERVAL = 24 * 60 * 60
+
+
+class Migration:
+    """Uma alteração versionada do esquema do banco de dados."""
+
+    def __init__(self, version, description, upgrade, transactional=True):
+        self.version = version
+        self.description = description
+        self.upgrade = upgrade
+        # Migrações não transacionais rodam em autocommit (ex.: CREATE INDEX CONCURRENTLY)
+        self.transactional = transactional
+
+    def __repr__(self):
+        return f"<Migration(version={self.version}, description='{self.description}')>"
+
+
+def migration(version, description, transactional=True):
+    """Registra a função decorada como a migração de número `version`."""
+    def register(upgrade):
+        MIGRATIONS.append(Migration(version, description, upgrade, transactional))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return upgrade
+    return register
+
+
+def head_version():
+    """Retorna a versão mais recente do esquema conhecida pelo aplicativo."""
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+def add_column(connection, table, column, ddl_type):
+    """Adiciona uma coluna à tabela, caso ainda não exista."""
+    existing = {c["name"] for c in inspect(connection).get_columns(table)}
+    if column in existing:
+        return False
+    connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+    return True
+
+
+def create_index(connection, name, table, columns, where=None):
+    """Cria um índice, caso ainda não exista.
+
+    No PostgreSQL o índice é criado com CONCURRENTLY, para que a tabela
+    continue aceitando escritas durante a criação; por isso a conexão deve
+    estar em autocommit. Um índice inválido deixado por uma tentativa
+    interrompida é removido e criado novamente.
+    """
+    postgresql = connection.dialect.name == "postgresql"
+    if postgresql:
+        invalid = connection.execute(text(
+            "SELECT 1 FROM pg_class c JOIN pg_index i ON i.indexrelid = c.oid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ), {"name": name}).first()
+        if invalid:
+            logger.warning(f"Índice inválido '{name}' encontrado; recriando.")
+            connection.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+    concurrently = "CONCURRENTLY " if postgresql else ""
+    sql = f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({', '.join(columns)})"
+    if where:
+        sql += f" WHERE {where}"
+    connection.execute(text(sql))
+
+
+def link_by_name(connection, table, text_column, id_column, target):
+    """Preenche table.id_column com o id do cadastro target cujo nome é table.text_column.
+
+    Cada nome distinto é resolvido uma vez só: pelo nome exato, depois pela
+    forma normalizada (maiúsculas/acentos); os que sobram viram cadastros novos.
+    """
+    nomes = [row[0] for row in connection.execute(text(
+        f"SELECT DISTINCT {text_column} FROM {table} "
+        f"WHERE {id_column} IS NULL AND {text_column} IS NOT NULL"
+    ))]
+    por_nome, por_chave = {}, {}
+    for id, nome, nome_busca in connection.execute(text(f"SELECT id, nome, nome_busca FROM {target} ORDER BY id")):
+        por_nome[nome] = id
+        por_chave.setdefault(nome_busca, id)
+
+    novos = {}
+    for nome in sorted(nomes):
+        chave = search_key(nome)
+        if chave and nome not in por_nome and chave not in por_chave:
+            novos.setdefault(chave, nome)
+    if novos:
+        connection.execute(
+            text(f"INSERT INTO {target} (nome, nome_busca, data_cadastro) VALUES (:nome, :nome_busca, CURRENT_DATE)"),
+            [{"nome": nome, "nome_busca": chave} for chave, nome in novos.items()]
+        )
+        for id, nome_busca in connection.execute(text(f"SELECT id, nome_busca FROM {target} ORDER BY id")):
+            por_chave.setdefault(nome_busca, id)
+
+    atualizacoes = []
+    for nome in nomes:
+        id = por_nome.get(nome) or por_chave.get(search_key(nome))
+        if id is not None:
+            atualizacoes.append({"id": id, "nome": nome})
+    if atualizacoes:
+        connection.execute(
+            text(f"UPDATE {table} SET {id_column} = :id WHERE {text_column} = :nome AND {id_column} IS NULL"),
+            atualizacoes
+        )
+
+
+def create_change_triggers(connection, table):
+    """Liga a tabela às funções fazenda_touch_updated_at e fazenda_log_change (PostgreSQL)."""
+    connection.execute(text(f"DROP TRIGGER IF EXISTS {table}_touch_updated_at ON {table}"))
+    connection.execute(text(
+        f"CREATE TRIGGER {table}_touch_updated_at BEFORE UPDATE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION fazenda_touch_updated_at()"
+    ))
+    connection.execute(text(f"DROP TRIGGER IF EXISTS {table}_log_change ON {table}"))
+    connection.execute(text(
+        f"CREATE TRIGGER {table}_log_change AFTER INSERT OR UPDATE OR DELETE ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION fazenda_log_change()"
+    ))
+
+
+def applied_versions(connection):
+    """Retorna o conjunto de versões já aplicadas no banco."""
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR(200), "
+        "applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    return {row[0] for row in connection.execute(text("SELECT version FROM schema_version"))}
+
+
+def prune_change_log(engine):
+    """Remove do change_log as entradas com mais de CHANGE_LOG_RETENTION_DAYS dias (só no PostgreSQL).
+
+    Roda ao aplicar as migrações e, durante o uso, a cada
+    CHANGE_LOG_PRUNE_INTERVAL em quem lê o change_log: o ChangeListener
+    ou, no modo réplica, o SyncEngine, contra o banco central.
+    """
+    if engine.dialect.name != "postgresql":
+        return  # O change_log só existe no PostgreSQL
+    try:
+        with engine.begin() as connection:
+            connection.execute(text(
+                f"DELETE FROM change_log WHERE changed_at < "
+                f"CURRENT_TIMESTAMP - INTERVAL '{CHANGE_LOG_RETENTION_DAYS} days'"
+            ))
+    except Exception as e:
+        logger.warning(f"Não foi possível limpar o change_log: {str(e)}")
+
+
+def run_migrations(engine):
+    """Aplica, em ordem, as migrações ainda não aplicadas no banco."""
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        postgresql = connection.dialect.name == "postgresql"
+        if postgresql:
+            connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        try:
+            applied = applied_versions(connection)
+            for pending in MIGRATIONS:
+                if pending.version in applied:
+                    continue
+
+                logger.info(f"Aplicando migração {pending.version}: {pending.description}")
+                if pending.transactional:
+                    with engine.begin() as transaction:
+                        pending.upgrade(transaction)
+                else:
+                    pending.upgrade(connection)
+
+                connection.execute(
+                    text("INSERT INTO schema_version (version, description) VALUES (:version, :description)"),
+                    {"version": pending.version, "description": pending.description}
+                )
+        finally:
+            if postgresql:
+                connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    prune_change_log(engine)
+
+
+@migration(1, "Colunas despesa.data_registro e entrada.forma_pagamento")
+def _colunas_registro_e_forma_pagamento(connection):
+    if add_column(connection, "despesa", "data_registro", "TIMESTAMP"):
+        connection.execute(text(
+            "UPDATE despesa SET data_registro = data_adicionou WHERE data_registro IS NULL"
+        ))
+    add_column(connection, "entrada", "forma_pagamento", "VARCHAR(100)")
+
+
+@migration(2, "Índices das colunas mais consultadas", transactional=False)
+def _indices_colunas_consultadas(connection):
+    create_index(connection, "ix_despesa_data_categoria", "despesa", ["data", "categoria"])
+    create_index(
+        connection, "ix_despesa_pendente_data_pagamento", "despesa", ["data_pagamento"],
+        where="pago = false"
+    )
+    create_index(connection, "ix_entrada_data", "entrada", ["data"])
+    create_index(connection, "ix_pagamento_funcionario_data", "pagamento", ["funcionario_id", "data"])
+    create_index(connection, "ix_manutencao_maquinario_data", "manutencao", ["maquinario_id", "data"])
+
+
+# Tabelas cujas alterações são propagadas para os outros terminais
+TRACKED_TABLES = ["despesa", "entrada", "producao", "funcionario", "maquinario"]
+
+
+@migration(3, "Colunas updated_at, tabela change_log e gatilhos de notificação")
+def _registro_de_alteracoes(connection):
+    for table in TRACKED_TABLES:
+        if add_column(connection, table, "updated_at", "TIMESTAMP"):
+            connection.execute(text(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP"))
+
+    if connection.dialect.name != "postgresql":
+        return  # Notificações entre terminais só existem no PostgreSQL
+
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS change_log ("
+        "id BIGSERIAL PRIMARY KEY, "
+        "table_name VARCHAR(50) NOT NULL, "
+        "row_id INTEGER NOT NULL, "
+        "operation CHAR(1) NOT NULL, "
+        "changed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_change_log_changed_at ON change_log (changed_at)"
+    ))
+
+    # Mantém updated_at mesmo em alterações feitas fora do ORM
+    connection.execute(text("""
+        CREATE OR REPLACE FUNCTION fazenda_touch_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := CURRENT_TIMESTAMP;
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+
+    # Registra a alteração e avisa os terminais conectados (payload: log:tabela:operação:id)
+    connection.execute(text("""
+        CREATE OR REPLACE FUNCTION fazenda_log_change() RETURNS trigger AS $$
+        DECLARE
+            changed_id INTEGER;
+            log_id BIGINT;
+        BEGIN
+            IF TG_OP = 'DELETE' THEN
+                changed_id := OLD.id;
+            ELSE
+                changed_id := NEW.id;
+            END IF;
+
+            INSERT INTO change_log (table_name, row_id, operation)
+            VALUES (TG_TABLE_NAME, changed_id, left(TG_OP, 1))
+            RETURNING id INTO log_id;
+
+            PERFORM pg_notify(
+                'fazenda_changes',
+                log_id || ':' || TG_TABLE_NAME || ':' || left(TG_OP, 1) || ':' || changed_id
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+
+    for table in TRACKED_TABLES:
+        create_change_triggers(connection, table)
+
+
+@migration(4, "Índices de updated_at", transactional=False)
+def _indices_updated_at(connection):
+    for table in TRACKED_TABLES:
+        create_index(connection, f"ix_{table}_updated_at", table, ["updated_at"])
+
+
+@migration(5, "Índices dos filtros de entradas, despesas e produção", transactional=False)
+def _indices_filtros(connection):
+    create_index(connection, "ix_entrada_data_categoria", "entrada", ["data", "categoria"])
+    create_index(connection, "ix_producao_produto_data_inicio", "producao", ["produto", "data_inicio"])
+    create_index(connection, "ix_producao_data_inicio", "producao", ["data_inicio"])
+    # Busca por início do nome do fornecedor, sem diferenciar maiúsculas
+    if connection.dialect.name == "postgresql":
+        create_index(connection, "ix_despesa_fornecedor_prefixo", "despesa", ["lower(fornecedor) text_pattern_ops"])
+    else:
+        create_index(connection, "ix_despesa_fornecedor_prefixo", "despesa", ["lower(fornecedor)"])
+
+
+@migration(6, "Índices para ordenação por valor e data de pagamento", transactional=False)
+def _indices_ordenacao(connection):
+    # Desempate pelo id, como no ORDER BY das listas (paginação por chave)
+    create_index(connection, "ix_despesa_valor_id", "despesa", ["valor", "id"])
+    create_index(connection, "ix_despesa_data_pagamento_id", "despesa", ["data_pagamento", "id"])
+    create_index(connection, "ix_entrada_valor_id", "entrada", ["valor", "id"])
+
+
+@migration(7, "Coluna fornecedor.nome_busca para o autocompletar")
+def _fornecedor_nome_busca(connection):
+    add_column(connection, "fornecedor", "nome_busca", "VARCHAR(200)")
+    fornecedores = connection.execute(text("SELECT id, nome FROM fornecedor WHERE nome_busca IS NULL")).all()
+    if fornecedores:
+        connection.execute(
+            text("UPDATE fornecedor SET nome_busca = :nome_busca WHERE id = :id"),
+            [{"id": id, "nome_busca": search_key(nome)} for id, nome in fornecedores]
+        )
+
+
+@migration(8, "Índice de fornecedor.nome_busca", transactional=False)
+def _indice_fornecedor_nome_busca(connection):
+    if connection.dialect.name == "postgresql":
+        # text_pattern_ops permite usar o índice em LIKE 'prefixo%' em qualquer collation
+        create_index(connection, "ix_fornecedor_nome_busca_prefixo", "fornecedor", ["nome_busca text_pattern_ops"])
+    else:
+        create_index(connection, "ix_fornecedor_nome_busca_prefixo", "fornecedor", ["nome_busca"])
+
+
+@migration(9, "Coluna despesa.fornecedor_id, preenchida a partir do nome do fornecedor")
+def _despesa_fornecedor_id(connection):
+    add_column(connection, "despesa", "fornecedor_id", "INTEGER REFERENCES fornecedor(id)")
+    link_by_name(connection, "despesa", "fornecedor", "fornecedor_id", "fornecedor")
+
+
+@migration(10, "Índice de despesa.fornecedor_id", transactional=False)
+def _indice_despesa_fornecedor_id(connection):
+    create_index(connection, "ix_despesa_fornecedor_data", "despesa", ["fornecedor_id", "data"])
+    # A busca por fornecedor passou a usar fornecedor.nome_busca
+    concurrently = " CONCURRENTLY" if connection.dialect.name == "postgresql" else ""
+    connection.execute(text(f"DROP INDEX{concurrently} IF EXISTS ix_despesa_fornecedor_prefixo"))
+
+
+@migration(11, "Tabela cliente e coluna entrada.cliente_id, preenchida a partir do nome do cliente")
+def _entrada_cliente_id(connection):
+    Cliente.__table__.create(connection, checkfirst=True)
+    add_column(connection, "entrada", "cliente_id", "INTEGER REFERENCES cliente(id)")
+    link_by_name(connection, "entrada", "cliente", "cliente_id", "cliente")
+
+
+@migration(12, "Índices de entrada.cliente_id e cliente.nome_busca", transactional=False)
+def _indices_cliente(connection):
+    create_index(connection, "ix_entrada_cliente_data", "entrada", ["cliente_id", "data"])
+    if connection.dialect.name == "postgresql":
+        create_index(connection, "ix_cliente_nome_busca_prefixo", "cliente", ["nome_busca text_pattern_ops"])
+    else:
+        create_index(connection, "ix_cliente_nome_busca_prefixo", "cliente", ["nome_busca"])
+
+
+# Tabelas que passaram a ter updated_at e registro no change_log com a réplica local (ver sync.py)
+REPLICATED_TABLES = ["manutencao", "pagamento", "fornecedor", "cliente"]
+
+
+@migration(13, "Registro de alterações de manutenção, pagamento, fornecedor e cliente; tabela sync_insert_map")
+def _registro_de_alteracoes_replica(connection):
+    for table in REPLICATED_TABLES:
+        if add_column(connection, table, "updated_at", "TIMESTAMP"):
+            connection.execute(text(f"UPDATE {table} SET updated_at = CURRENT_TIMESTAMP"))
+
+    if connection.dialect.name != "postgresql":
+        return  # O change_log só existe no PostgreSQL
+
+    for table in REPLICATED_TABLES:
+        create_change_triggers(connection, table)
+
+    # Registros criados em cada réplica local e o id que receberam no servidor,
+    # para que um envio repetido (ex.: interrompido antes de atualizar a réplica) não duplique
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS sync_insert_map ("
+        "client_id VARCHAR(36) NOT NULL, "
+        "table_name VARCHAR(50) NOT NULL, "
+        "local_id INTEGER NOT NULL, "
+        "central_id INTEGER NOT NULL, "
+        "PRIMARY KEY (client_id, table_name, local_id))"
+    ))
+
+
+@migration(14, "updated_at em UTC")
+def _updated_at_utc(connection):
+    # O ORM grava updated_at com models.utcnow e o SQLite usa CURRENT_TIMESTAMP, que já é UTC.
+    # No PostgreSQL o gatilho passa a usar UTC e os valores existentes, gravados no fuso do
+    # servidor (assumido também o dos terminais), são convertidos
+    if connection.dialect.name != "postgresql":
+        return
+
+    connection.execute(text("""
+        CREATE OR REPLACE FUNCTION fazenda_touch_updated_at() RETURNS trigger AS $$
+        BEGIN
+            NEW.updated_at := CURRENT_TIMESTAMP AT TIME ZONE 'UTC';
+            RETURN NEW;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+
+    # Sem os gatilhos, a conversão não é registrada no change_log nem avisada aos terminais
+    for table in TRACKED_TABLES + REPLICATED_TABLES:
+        connection.execute(text(f"ALTER TABLE {table} DISABLE TRIGGER USER"))
+        connection.execute(text(
+            f"UPDATE {table} SET updated_at = "
+            f"(updated_at AT TIME ZONE current_setting('TimeZone')) AT TIME ZONE 'UTC' "
+            f"WHERE updated_at IS NOT NULL"
+        ))
+        connection.execute(text(f"ALTER TABLE {table} ENABLE TRIGGER USER"))
+
+
+@migration(15, "Registro de alterações por instrução, com um aviso por instrução e tabela")
+def _registro_por_instrucao(connection):
+    if connection.dialect.name != "postgresql":
+        return
+
+    # Uma importação (COPY) ou a geração da folha alteram milhares de linhas em uma instrução:
+    # o change_log continua com uma entrada por linha, mas os terminais recebem um aviso só.
+    # Payload: log:tabela:operação:id para uma linha, primeiro-último:tabela:operação:* para várias
+    connection.execute(text("""
+        CREATE OR REPLACE FUNCTION fazenda_log_changes() RETURNS trigger AS $$
+        DECLARE
+            first_id BIGINT;
+            last_id BIGINT;
+            changed_id INTEGER;
+            changed INTEGER;
+        BEGIN
+            WITH logged AS (
+                INSERT INTO change_log (table_name, row_id, operation)
+                SELECT TG_TABLE_NAME, id, left(TG_OP, 1) FROM changed_rows
+                RETURNING id, row_id
+            )
+            SELECT min(id), max(id), min(row_id), count(*) INTO first_id, last_id, changed_id, changed FROM logged;
+
+            IF changed = 1 THEN
+                PERFORM pg_notify(
+                    'fazenda_changes',
+                    first_id || ':' || TG_TABLE_NAME || ':' || left(TG_OP, 1) || ':' || changed_id
+                );
+            ELSIF changed > 1 THEN
+                PERFORM pg_notify(
+                    'fazenda_changes',
+                    first_id || '-' || last_id || ':' || TG_TABLE_NAME || ':' || left(TG_OP, 1) || ':*'
+                );
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+    """))
+
+    # Tabelas de transição só podem ser usadas em gatilhos de um único evento
+    for table in TRACKED_TABLES + REPLICATED_TABLES:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {table}_log_change ON {table}"))
+        for event, transition in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+            connection.execute(text(f"DROP TRIGGER IF EXISTS {table}_log_{event.lower()} ON {table}"))
+            connection.execute(text(
+                f"CREATE TRIGGER {table}_log_{event.lower()} AFTER {event} ON {table} "
+                f"REFERENCING {transition} TABLE AS changed_rows "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION fazenda_log_changes()"
+            ))
+    connection.execute(text("DROP FUNCTION IF EXISTS fazenda_log_change()"))
@@ -1,10 +1,25 @@
-from sqlalchemy import create_engine, Column, Integer, String, Float, Date, ForeignKey, Boolean, Text, Numeric
+from sqlalchemy import create_engine, Column, Integer, String, Float, Date, DateTime, ForeignKey, Boolean, Text, Numeric, Index, text
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, sessionmaker
+from sqlalchemy.orm import relationship, sessionmaker, validates
 import datetime
+import unicodedata
 
 Base = declarative_base()
 
+def search_key(text):
+    """Forma normalizada de um nome para busca por prefixo: minúscula e sem acentos."""
+    if text is None:
+        return None
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode()
+    return " ".join(text.lower().split())
+
+def utcnow():
+    """Data e hora atuais em UTC, sem fuso: o relógio de todos os updated_at (ver migração 14)."""
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+def _nome_busca_default(context):
+    return search_key(context.get_current_parameters().get("nome"))
+
 class Maquinario(Base):
     __tablename__ = 'maquinario'
     
@@ -16,6 +31,7 @@ class Maquinario(Base):
     data_aquisicao = Column(Date)
     status = Column(String(50))  # Ativo, Em manutenção, Inativo
     observacoes = Column(Text)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
     
     manutencoes = relationship("Manutencao", back_populates="maquinario")
     
@@ -31,9 +47,14 @@ class Manutencao(Base):
     descricao = Column(Text, nullable=False)
     custo = Column(Numeric(10, 2))
     responsavel = Column(String(100))
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
     
     maquinario = relationship("Maquinario", back_populates="manutencoes")
     
+    __table_args__ = (
+        Index("ix_manutencao_maquinario_data", "maquinario_id", "data"),
+    )
+    
     def __repr__(self):
         return f"<Manutencao(maquinario_id='{self.maquinario_id}', data='{self.data}')>"
 
@@ -49,6 +70,7 @@ class Funcionario(Base):
     ativo = Column(Boolean, default=True)
     telefone = Column(String(20))
     endereco = Column(Text)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
     
     pagamentos = relationship("Pagamento", back_populates="funcionario")
     
@@ -64,9 +86,14 @@ class Pagamento(Base):
     valor = Column(Numeric(10, 2), nullable=False)
     tipo = Column(String(50))  # Salário, Adiantamento, Bônus
     observacoes = Column(Text)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
     
     funcionario = relationship("Funcionario", back_populates="pagamentos")
     
+    __table_args__ = (
+        Index("ix_pagamento_funcionario_data", "funcionario_id", "data"),
+    )
+    
     def __repr__(self):
         return f"<Pagamento(funcionario_id='{self.funcionario_id}', valor='{self.valor}')>"
 
@@ -83,12 +110,29 @@ class Despesa(Base):
     observacoes = Column(Text)
     
     # Novas colunas
-    fornecedor = Column(String(200))
+    fornecedor_id = Column(Integer, ForeignKey('fornecedor.id'))
+    fornecedor_texto = Column("fornecedor", String(200))  # Nome digitado antes do cadastro de fornecedores (legado)
     data_retirada = Column(Date)
     data_pagamento = Column(Date, default=datetime.datetime.now)
     usuario_adicionou = Column(String(100))
     data_adicionou = Column(Date, default=datetime.datetime.now)
     produto_retirado = Column(Boolean, default=False)
+    data_registro = Column(DateTime, default=datetime.datetime.now)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    
+    fornecedor = relationship("Fornecedor", back_populates="despesas")
+    
+    __table_args__ = (
+        Index("ix_despesa_data_categoria", "data", "categoria"),
+        Index(
+            "ix_despesa_pendente_data_pagamento", "data_pagamento",
+            postgresql_where=text("pago = false"),
+            sqlite_where=text("pago = false")
+        ),
+        Index("ix_despesa_valor_id", "valor", "id"),
+        Index("ix_despesa_data_pagamento_id", "data_pagamento", "id"),
+        Index("ix_despesa_fornecedor_data", "fornecedor_id", "data"),
+    )
     
     def __repr__(self):
         return f"<Despesa(descricao='{self.descricao}', valor='{self.valor}')>"
@@ -98,16 +142,49 @@ class Fornecedor(Base):
     
     id = Column(Integer, primary_key=True)
     nome = Column(String(200), nullable=False, unique=True)
+    nome_busca = Column(String(200), default=_nome_busca_default)  # search_key(nome), para o autocompletar
     telefone = Column(String(20))
     email = Column(String(100))
     endereco = Column(Text)
     cnpj = Column(String(18))
     observacoes = Column(Text)
     data_cadastro = Column(Date, default=datetime.datetime.now)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    
+    despesas = relationship("Despesa", back_populates="fornecedor")
+    
+    @validates("nome")
+    def _atualizar_nome_busca(self, key, nome):
+        self.nome_busca = search_key(nome)
+        return nome
     
     def __repr__(self):
         return f"<Fornecedor(nome='{self.nome}')>"
 
+class Cliente(Base):
+    __tablename__ = 'cliente'
+    
+    id = Column(Integer, primary_key=True)
+    nome = Column(String(100), nullable=False, unique=True)
+    nome_busca = Column(String(100), default=_nome_busca_default)  # search_key(nome), para o autocompletar
+    telefone = Column(String(20))
+    email = Column(String(100))
+    endereco = Column(Text)
+    cpf_cnpj = Column(String(18))
+    observacoes = Column(Text)
+    data_cadastro = Column(Date, default=datetime.datetime.now)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    
+    entradas = relationship("Entrada", back_populates="cliente")
+    
+    @validates("nome")
+    def _atualizar_nome_busca(self, key, nome):
+        self.nome_busca = search_key(nome)
+        return nome
+    
+    def __repr__(self):
+        return f"<Cliente(nome='{self.nome}')>"
+
 class Entrada(Base):
     __tablename__ = 'entrada'
     
@@ -116,9 +193,21 @@ class Entrada(Base):
     valor = Column(Numeric(10, 2), nullable=False)
     data = Column(Date, default=datetime.datetime.now)
     categoria = Column(String(100))  # Venda de produtos, Serviços, etc.
-    cliente = Column(String(100))
+    cliente_id = Column(Integer, ForeignKey('cliente.id'))
+    cliente_texto = Column("cliente", String(100))  # Nome digitado antes do cadastro de clientes (legado)
+    forma_pagamento = Column(String(100))  # Dinheiro, PIX, Transferência, etc.
     recebido = Column(Boolean, default=True)
     observacoes = Column(Text)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    
+    cliente = relationship("Cliente", back_populates="entradas")
+    
+    __table_args__ = (
+        Index("ix_entrada_data", "data"),
+        Index("ix_entrada_data_categoria", "data", "categoria"),
+        Index("ix_entrada_valor_id", "valor", "id"),
+        Index("ix_entrada_cliente_data", "cliente_id", "data"),
+    )
     
     def __repr__(self):
         return f"<Entrada(descricao='{self.descricao}', valor='{self.valor}')>"
@@ -136,6 +225,12 @@ class Producao(Base):
     custo_total = Column(Numeric(10, 2))
     valor_venda = Column(Numeric(10, 2))
     observacoes = Column(Text)
+    updated_at = Column(DateTime, default=utcnow, onupdate=utcnow)
+    
+    __table_args__ = (
+        Index("ix_producao_produto_data_inicio", "produto", "data_inicio"),
+        Index("ix_producao_data_inicio", "data_inicio"),
+    )
     
     def __repr__(self):
         return f"<Producao(produto='{self.produto}', quantidade='{self.quantidade}')>" 
\ No newline at end of file
@@ -0,0 +1,153 @@
+import time
+import select
+import logging
+import threading
+from sqlalchemy import text
+from .migrations import CHANGE_LOG_PRUNE_INTERVAL, prune_change_log
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Canal usado pelos gatilhos das migrações 3 e 15 (ver migrations.py)
+CHANNEL = "fazenda_changes"
+
+# Intervalo entre tentativas de reconexão, em segundos
+RECONNECT_DELAY = 5
+
+# Quantos ids abaixo do maior já entregue ainda podem chegar: o id vem de uma
+# sequência, e uma transação que pegou um id menor pode confirmar depois de outra
+DELIVERY_WINDOW = 1000
+
+# Acima disso, em uma leva de avisos, a tabela é recarregada inteira em vez de linha a linha
+MAX_DELIVERED_ROWS = 500
+
+
+class ChangeListener(threading.Thread):
+    """Escuta, em uma conexão própria, as notificações de alteração do PostgreSQL.
+
+    Para cada linha inserida (I), alterada (U) ou excluída (D) em outro
+    terminal, chama callback(tabela, operação, id). Quando uma leva de avisos
+    altera mais de MAX_DELIVERED_ROWS linhas de uma tabela (ex.: importação),
+    chama callback(tabela, "R", 0) uma vez só, pedindo a recarga da tabela.
+    Se a conexão cair, as alterações perdidas enquanto estava desconectado
+    são lidas do change_log ao reconectar, voltando DELIVERY_WINDOW ids
+    antes do último entregue para pegar as transações que confirmaram fora
+    de ordem.
+    """
+
+    def __init__(self, engine, callback):
+        super().__init__(name="ChangeListener", daemon=True)
+        self.engine = engine
+        self.callback = callback
+        self.last_log_id = None    # Maior id já entregue
+        self.first_log_id = None   # Último id existente quando o listener começou
+        self.delivered = set()     # Ids entregues dentro da janela
+        self.pruned_at = None      # time.monotonic() da última limpeza do change_log
+        self._stop_event = threading.Event()
+
+    @staticmethod
+    def is_supported(engine):
+        """Indica se o banco suporta LISTEN/NOTIFY."""
+        return engine.dialect.name == "postgresql"
+
+    def stop(self):
+        """Pede o encerramento da thread (atendido em até um segundo)."""
+        self._stop_event.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.listen()
+            except Exception as e:
+                logger.warning(f"Conexão de notificações perdida, tentando novamente: {str(e)}")
+                self._stop_event.wait(RECONNECT_DELAY)
+
+    def prune_if_due(self):
+        """Limpa o change_log se a última limpeza deste terminal foi há mais de CHANGE_LOG_PRUNE_INTERVAL."""
+        now = time.monotonic()
+        if self.pruned_at is None or now - self.pruned_at >= CHANGE_LOG_PRUNE_INTERVAL:
+            self.pruned_at = now
+            prune_change_log(self.engine)
+
+    def replay_missed_changes(self, connection):
+        """Entrega as alterações registradas desde a última notificação recebida."""
+        if self.last_log_id is None:
+            self.last_log_id = self.first_log_id = connection.execute(
+                text("SELECT COALESCE(MAX(id), 0) FROM change_log")
+            ).scalar()
+            return
+
+        since = max(self.last_log_id - DELIVERY_WINDOW, self.first_log_id)
+        self.deliver(connection.execute(text(
+            "SELECT id, table_name, operation, row_id FROM change_log WHERE id > :since ORDER BY id"
+        ), {"since": since}).all())
+
+    def read_statement(self, connection, first_id, last_id, table, operation):
+        """Entradas do change_log de uma instrução que alterou várias linhas (aviso com id '*')."""
+        return connection.execute(text(
+            "SELECT id, table_name, operation, row_id FROM change_log "
+            "WHERE id BETWEEN :first AND :last AND table_name = :table AND operation = :operation ORDER BY id"
+        ), {"first": first_id, "last": last_id, "table": table, "operation": operation}).all()
+
+    def mark_delivered(self, log_id):
+        """Registra o id como entregue; retorna False se já tinha sido."""
+        if log_id in self.delivered or (self.first_log_id is not None and log_id <= self.first_log_id):
+            return False
+        self.delivered.add(log_id)
+        if self.last_log_id is None or log_id > self.last_log_id:
+            self.last_log_id = log_id
+        if len(self.delivered) > 2 * DELIVERY_WINDOW:
+            floor = self.last_log_id - DELIVERY_WINDOW
+            self.delivered = {delivered for delivered in self.delivered if delivered > floor}
+        return True
+
+    def deliver(self, entries):
+        """Repassa ao callback as alterações [(log, tabela, operação, id)] ainda não entregues."""
+        changes = {}
+        for log_id, table, operation, row_id in entries:
+            if self.mark_delivered(log_id):
+                changes.setdefault(table, []).append((operation, row_id))
+        for table, table_changes in changes.items():
+            if len(table_changes) > MAX_DELIVERED_ROWS:
+                table_changes = [("R", 0)]
+            for operation, row_id in table_changes:
+                try:
+                    self.callback(table, operation, row_id)
+                except Exception as e:
+                    logger.error(f"Erro ao aplicar alteração de {table} ({row_id}): {str(e)}")
+
+    def listen(self):
+        """Mantém uma conexão com LISTEN ativo até a thread ser encerrada."""
+        raw_connection = self.engine.raw_connection()
+        try:
+            dbapi_connection = raw_connection.driver_connection
+            dbapi_connection.autocommit = True
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"LISTEN {CHANNEL}")
+
+            with self.engine.connect() as connection:
+                self.replay_missed_changes(connection)
+
+            while not self._stop_event.is_set():
+                if select.select([dbapi_connection], [], [], 1.0) == ([], [], []):
+                    self.prune_if_due()
+                    continue
+                dbapi_connection.poll()
+                entries, statements = [], []
+                while dbapi_connection.notifies:
+                    notify = dbapi_connection.notifies.pop(0)
+                    log_ids, table, operation, row_id = notify.payload.split(":")
+                    if row_id == "*":
+                        first_id, last_id = log_ids.split("-")
+                        statements.append((int(first_id), int(last_id), table, operation))
+                    else:
+                        entries.append((int(log_ids), table, operation, int(row_id)))
+                if statements:
+                    with self.engine.connect() as connection:
+                        for statement in statements:
+                            entries.extend(self.read_statement(connection, *statement))
+                self.deliver(entries)
+        finally:
+            # A conexão ficou em autocommit e com LISTEN ativo: não devolver ao pool
+            raw_connection.invalidate()
+            raw_connection.close()
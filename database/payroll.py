@@ -0,0 +1,152 @@
+import datetime
+from decimal import Decimal
+from sqlalchemy import select, func, insert, case
+from .models import Funcionario, Pagamento, Despesa
+from .reports import month_range
+
+SALARIO = "Salário"
+ADIANTAMENTO = "Adiantamento"
+BONUS = "Bônus"
+
+CENTAVOS = Decimal("0.01")
+
+
+def as_decimal(value):
+    return Decimal(str(value or 0)).quantize(CENTAVOS)
+
+
+class PayrollLine:
+    """Valores de um funcionário na folha do mês."""
+
+    def __init__(self, funcionario_id, nome, cargo, salario, adiantamentos, bonus):
+        self.funcionario_id = funcionario_id
+        self.nome = nome
+        self.cargo = cargo
+        self.salario = salario
+        self.adiantamentos = adiantamentos  # Já pagos no mês, descontados do salário
+        self.bonus = bonus
+
+    @property
+    def saldo_salario(self):
+        return max(self.salario - self.adiantamentos, Decimal("0.00"))
+
+    @property
+    def total(self):
+        return self.saldo_salario + self.bonus
+
+    def __repr__(self):
+        return f"<PayrollLine(nome='{self.nome}', total='{self.total}')>"
+
+
+class PayrollPreview:
+    """Prévia da folha de um mês, antes de gravar os pagamentos."""
+
+    def __init__(self, mes, linhas, ja_pagos):
+        self.mes = mes
+        self.linhas = linhas      # [PayrollLine], por nome
+        self.ja_pagos = ja_pagos  # Funcionários ativos que já receberam o salário do mês
+
+    @property
+    def total(self):
+        return sum((linha.total for linha in self.linhas), Decimal("0.00"))
+
+
+def preview_payroll(session, mes, bonus_percentual=0):
+    """Calcula a folha do mês para todos os funcionários ativos, em uma só consulta.
+
+    Os pagamentos do mês são agregados por funcionário no banco (índice por
+    funcionário e data): adiantamentos são descontados do salário e quem já
+    recebeu o salário do mês fica fora da folha.
+    """
+    inicio, fim = month_range(mes)
+    pagos = (
+        select(
+            Pagamento.funcionario_id,
+            func.sum(case((Pagamento.tipo == ADIANTAMENTO, Pagamento.valor), else_=0)).label("adiantamentos"),
+            func.count(case((Pagamento.tipo == SALARIO, 1))).label("salarios"),
+        )
+        .where(Pagamento.data >= inicio, Pagamento.data <= fim)
+        .group_by(Pagamento.funcionario_id)
+        .subquery()
+    )
+    rows = session.execute(
+        select(
+            Funcionario.id, Funcionario.nome, Funcionario.cargo, Funcionario.salario,
+            pagos.c.adiantamentos, pagos.c.salarios,
+        )
+        .outerjoin(pagos, pagos.c.funcionario_id == Funcionario.id)
+        .where(Funcionario.ativo.is_(True), Funcionario.salario > 0)
+        .order_by(Funcionario.nome, Funcionario.id)
+    )
+
+    percentual = Decimal(str(bonus_percentual)) / 100
+    linhas, ja_pagos = [], []
+    for id, nome, cargo, salario, adiantamentos, salarios in rows:
+        if salarios:
+            ja_pagos.append(nome)
+            continue
+        salario = as_decimal(salario)
+        linhas.append(PayrollLine(
+            id, nome, cargo, salario, as_decimal(adiantamentos), (salario * percentual).quantize(CENTAVOS)
+        ))
+    return PayrollPreview(inicio, linhas, ja_pagos)
+
+
+def run_payroll(session, preview, data_pagamento, lancar_despesa=False):
+    """Grava os pagamentos da prévia com um único INSERT de várias linhas; retorna quantos.
+
+    Não faz commit: a folha inteira (e a despesa "Salários", se pedida) é
+    confirmada ou desfeita junto com a transação da sessão. ValueError se
+    algum funcionário da prévia já recebeu o salário do mês nesse meio tempo.
+
+    O mês da folha é o mês da data dos pagamentos, por isso data_pagamento
+    precisa estar dentro do mês da prévia.
+    """
+    inicio, fim = month_range(preview.mes)
+    if not inicio <= data_pagamento <= fim:
+        raise ValueError(f"A data de pagamento deve estar em {inicio:%m/%Y}.")
+    ids = [linha.funcionario_id for linha in preview.linhas]
+    if not ids:
+        return 0
+
+    connection = session.connection()
+    if connection.dialect.name == "postgresql":
+        # Duas folhas do mesmo mês rodando ao mesmo tempo esperam uma pela outra
+        connection.execute(select(func.pg_advisory_xact_lock(inicio.year * 100 + inicio.month)))
+    repetidos = session.scalar(
+        select(func.count()).select_from(Pagamento).where(
+            Pagamento.funcionario_id.in_(ids), Pagamento.tipo == SALARIO,
+            Pagamento.data >= inicio, Pagamento.data <= fim,
+        )
+    )
+    if repetidos:
+        raise ValueError(f"{repetidos} funcionário(s) já receberam o salário de {inicio:%m/%Y}; recalcule a folha.")
+
+    observacao = f"Folha de {inicio:%m/%Y}"
+    pagamentos = []
+    for linha in preview.linhas:
+        # O salário é gravado mesmo zerado pelos adiantamentos: marca o mês como pago
+        pagamentos.append({
+            "funcionario_id": linha.funcionario_id, "data": data_pagamento,
+            "valor": linha.saldo_salario, "tipo": SALARIO, "observacoes": observacao,
+        })
+        if linha.bonus > 0:
+            pagamentos.append({
+                "funcionario_id": linha.funcionario_id, "data": data_pagamento,
+                "valor": linha.bonus, "tipo": BONUS, "observacoes": observacao,
+            })
+    connection.execute(insert(Pagamento.__table__), pagamentos)
+
+    if lancar_despesa and preview.total > 0:
+        session.add(Despesa(
+            descricao=f"Salários {inicio:%m/%Y}",
+            valor=preview.total,
+            data=data_pagamento,
+            data_pagamento=data_pagamento,
+            categoria="Salários",
+            pago=True,
+            observacoes=f"{len(preview.linhas)} funcionários",
+            data_adicionou=datetime.date.today(),
+            data_registro=datetime.datetime.now(),
+        ))
+    return len(pagamentos)
@@ -0,0 +1,298 @@
+import datetime
+from sqlalchemy import func, case, cast, select, extract, Date, Integer
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+from .models import Despesa, Entrada, Fornecedor, Cliente, Manutencao, Producao
+
+
+class month_of(FunctionElement):
+    """Primeiro dia do mês de uma data, como expressão SQL."""
+
+    type = Date()
+    inherit_cache = True
+    name = "month_of"
+
+
+@compiles(month_of)
+def _month_of(element, compiler, **kw):
+    data, = list(element.clauses)
+    return f"date_trunc('month', {compiler.process(data, **kw)})"
+
+
+@compiles(month_of, "sqlite")
+def _month_of_sqlite(element, compiler, **kw):
+    data, = list(element.clauses)
+    return f"date({compiler.process(data, **kw)}, 'start of month')"
+
+
+class days_between(FunctionElement):
+    """Número de dias entre duas datas (fim - início), como expressão SQL."""
+
+    type = Integer()
+    inherit_cache = True
+    name = "days_between"
+
+
+@compiles(days_between)
+def _days_between(element, compiler, **kw):
+    fim, inicio = list(element.clauses)
+    return f"({compiler.process(fim, **kw)} - {compiler.process(inicio, **kw)})"
+
+
+@compiles(days_between, "sqlite")
+def _days_between_sqlite(element, compiler, **kw):
+    fim, inicio = list(element.clauses)
+    return f"CAST(julianday({compiler.process(fim, **kw)}) - julianday({compiler.process(inicio, **kw)}) AS INTEGER)"
+
+
+class FinancialSummary:
+    """Resultado compacto do resumo financeiro de um período."""
+
+    def __init__(self, inicio, fim):
+        self.inicio = inicio
+        self.fim = fim
+        self.meses = []        # [(mês, entradas, despesas, saldo)], mais recente primeiro
+        self.categorias = []   # [(categoria, total de despesas)], maior total primeiro
+        self.fornecedores = [] # [(fornecedor, total de despesas)], os maiores primeiro
+        self.clientes = []     # [(cliente, total de entradas)], os maiores primeiro
+        self.entradas_recebidas = 0.0
+        self.entradas_pendentes = 0.0
+        self.despesas_pagas = 0.0
+        self.despesas_pendentes = 0.0
+
+    @property
+    def total_entradas(self):
+        return self.entradas_recebidas + self.entradas_pendentes
+
+    @property
+    def total_despesas(self):
+        return self.despesas_pagas + self.despesas_pendentes
+
+    @property
+    def saldo(self):
+        return self.total_entradas - self.total_despesas
+
+    def __repr__(self):
+        return f"<FinancialSummary(inicio='{self.inicio}', fim='{self.fim}', saldo='{self.saldo}')>"
+
+
+def month_range(mes):
+    """Retorna o primeiro e o último dia do mês da data informada."""
+    inicio = mes.replace(day=1)
+    proximo = (inicio + datetime.timedelta(days=32)).replace(day=1)
+    return inicio, proximo - datetime.timedelta(days=1)
+
+
+def despesas_por_fornecedor(inicio, fim, limite=None):
+    """Consulta do total de despesas por fornecedor no período, maior total primeiro.
+
+    O agrupamento é feito sobre a chave inteira despesa.fornecedor_id (índice
+    por fornecedor e data); o nome só é buscado para as linhas já agregadas.
+    """
+    total = func.sum(Despesa.valor).label("total")
+    por_fornecedor = (
+        select(Despesa.fornecedor_id, total)
+        .where(Despesa.data >= inicio, Despesa.data <= fim)
+        .group_by(Despesa.fornecedor_id)
+        .order_by(total.desc())
+        .limit(limite)
+        .subquery()
+    )
+    return (
+        select(Fornecedor.nome, por_fornecedor.c.total)
+        .select_from(por_fornecedor.outerjoin(Fornecedor, Fornecedor.id == por_fornecedor.c.fornecedor_id))
+        .order_by(por_fornecedor.c.total.desc())
+    )
+
+
+def entradas_por_cliente(inicio, fim, limite=None):
+    """Consulta do total de entradas por cliente no período, maior total primeiro.
+
+    Como em despesas_por_fornecedor, agrupa pela chave entrada.cliente_id.
+    """
+    total = func.sum(Entrada.valor).label("total")
+    por_cliente = (
+        select(Entrada.cliente_id, total)
+        .where(Entrada.data >= inicio, Entrada.data <= fim)
+        .group_by(Entrada.cliente_id)
+        .order_by(total.desc())
+        .limit(limite)
+        .subquery()
+    )
+    return (
+        select(Cliente.nome, por_cliente.c.total)
+        .select_from(por_cliente.outerjoin(Cliente, Cliente.id == por_cliente.c.cliente_id))
+        .order_by(por_cliente.c.total.desc())
+    )
+
+
+def manutencao_por_maquinario():
+    """Subconsulta com o custo total e a data da última manutenção de cada maquinário.
+
+    Um único GROUP BY maquinario_id (índice por maquinário e data), para ser
+    ligado à lista de maquinários com LEFT JOIN: colunas custo_total e
+    ultima_manutencao, nulas para quem nunca teve manutenção.
+    """
+    return (
+        select(
+            Manutencao.maquinario_id,
+            func.sum(Manutencao.custo).label("custo_total"),
+            func.max(Manutencao.data).label("ultima_manutencao"),
+        )
+        .group_by(Manutencao.maquinario_id)
+        .subquery("manutencoes")
+    )
+
+
+def financial_summary(session, inicio, fim):
+    """Calcula o resumo financeiro entre as datas inicio e fim (inclusive).
+
+    Toda a agregação (por mês, por situação e por categoria) é feita no banco
+    com GROUP BY, usando os índices por data; só as linhas agregadas chegam
+    ao Python.
+    """
+    summary = FinancialSummary(inicio, fim)
+
+    mes_entrada = month_of(Entrada.data).label("mes")
+    entradas = session.execute(
+        select(
+            mes_entrada,
+            func.sum(case((Entrada.recebido.is_(True), Entrada.valor), else_=0)),
+            func.sum(case((Entrada.recebido.is_(True), 0), else_=Entrada.valor)),
+        )
+        .where(Entrada.data >= inicio, Entrada.data <= fim)
+        .group_by(mes_entrada)
+    ).all()
+
+    mes_despesa = month_of(Despesa.data).label("mes")
+    despesas = session.execute(
+        select(
+            mes_despesa,
+            func.sum(case((Despesa.pago.is_(True), Despesa.valor), else_=0)),
+            func.sum(case((Despesa.pago.is_(True), 0), else_=Despesa.valor)),
+        )
+        .where(Despesa.data >= inicio, Despesa.data <= fim)
+        .group_by(mes_despesa)
+    ).all()
+
+    total_categoria = func.sum(Despesa.valor).label("total")
+    summary.categorias = [
+        (categoria or "Sem categoria", float(total or 0))
+        for categoria, total in session.execute(
+            select(Despesa.categoria, total_categoria)
+            .where(Despesa.data >= inicio, Despesa.data <= fim)
+            .group_by(Despesa.categoria)
+            .order_by(total_categoria.desc())
+        )
+    ]
+
+    summary.fornecedores = [
+        (nome or "Sem fornecedor", float(total or 0))
+        for nome, total in session.execute(despesas_por_fornecedor(inicio, fim, limite=10))
+    ]
+    summary.clientes = [
+        (nome or "Sem cliente", float(total or 0))
+        for nome, total in session.execute(entradas_por_cliente(inicio, fim, limite=10))
+    ]
+
+    meses = {}
+    for mes, recebido, pendente in entradas:
+        recebido, pendente = float(recebido or 0), float(pendente or 0)
+        summary.entradas_recebidas += recebido
+        summary.entradas_pendentes += pendente
+        meses.setdefault(mes, [0.0, 0.0])[0] += recebido + pendente
+    for mes, pago, pendente in despesas:
+        pago, pendente = float(pago or 0), float(pendente or 0)
+        summary.despesas_pagas += pago
+        summary.despesas_pendentes += pendente
+        meses.setdefault(mes, [0.0, 0.0])[1] += pago + pendente
+
+    summary.meses = [
+        (mes, total_entradas, total_despesas, total_entradas - total_despesas)
+        for mes, (total_entradas, total_despesas) in sorted(meses.items(), reverse=True)
+    ]
+    return summary
+
+
+def safra_of(column, inicio_safra):
+    """Expressão SQL com o ano em que começa a safra da data (ex.: 2024 para a safra 2024/2025)."""
+    # extract retorna double precision no PostgreSQL anterior ao 14
+    return cast(extract("year", column) - case((extract("month", column) < inicio_safra, 1), else_=0), Integer)
+
+
+def safra_inicio(ano, inicio_safra):
+    """Primeiro dia da safra que começa no ano informado."""
+    return datetime.date(ano, inicio_safra, 1)
+
+
+def producao_metricas():
+    """Indicadores de uma produção como expressões SQL: margem, custo/ha, produtividade/ha e receita/dia."""
+    area = func.nullif(Producao.area, 0)
+    return {
+        "margem": Producao.valor_venda - Producao.custo_total,
+        "custo_ha": Producao.custo_total / area,
+        "produtividade": Producao.quantidade / area,
+        "receita_dia": Producao.valor_venda / func.nullif(days_between(Producao.data_fim, Producao.data_inicio), 0),
+    }
+
+
+def production_analytics(session, primeira_safra, inicio_safra):
+    """Rentabilidade por produto e safra, a partir de primeira_safra (ano de início).
+
+    Uma única consulta: as produções são agregadas por produto, unidade e
+    safra, e as funções de janela calculam a posição de cada produto na safra
+    (pela margem) e a variação em relação à safra anterior do mesmo produto.
+    Retorna poucas linhas, da safra mais recente para a mais antiga.
+    """
+    safra = safra_of(Producao.data_inicio, inicio_safra).label("safra")
+    por_safra = (
+        select(
+            Producao.produto,
+            Producao.unidade,
+            safra,
+            func.count(Producao.id).label("producoes"),
+            func.sum(Producao.quantidade).label("quantidade"),
+            func.sum(Producao.area).label("area"),
+            func.sum(Producao.custo_total).label("custo"),
+            func.sum(Producao.valor_venda).label("receita"),
+            # Receita/dia considera só as produções encerradas, as únicas com dias contados
+            func.sum(case((Producao.data_fim.isnot(None), Producao.valor_venda))).label("receita_encerradas"),
+            func.sum(days_between(Producao.data_fim, Producao.data_inicio)).label("dias"),
+        )
+        # Uma safra a mais, para a variação da primeira safra exibida
+        .where(Producao.data_inicio >= safra_inicio(primeira_safra - 1, inicio_safra))
+        .group_by(Producao.produto, Producao.unidade, safra)
+        .cte("por_safra")
+    )
+
+    c = por_safra.c
+    area = func.nullif(c.area, 0)
+    margem = c.receita - c.custo
+    produtividade = c.quantidade / area
+    produto = (c.produto, c.unidade)
+    anterior = func.lag(c.safra).over(partition_by=produto, order_by=c.safra)
+    seguida = anterior == c.safra - 1  # Safra anterior presente (sem lacuna)
+    analise = select(
+        c.produto,
+        c.unidade,
+        c.safra,
+        c.producoes,
+        c.area,
+        c.custo,
+        c.receita,
+        margem.label("margem"),
+        (margem * 100 / func.nullif(c.receita, 0)).label("margem_percentual"),
+        (c.custo / area).label("custo_ha"),
+        produtividade.label("produtividade"),
+        (c.receita_encerradas / func.nullif(c.dias, 0)).label("receita_dia"),
+        func.rank().over(partition_by=c.safra, order_by=margem.desc().nulls_last()).label("posicao"),
+        case((seguida, margem - func.lag(margem).over(partition_by=produto, order_by=c.safra))).label("margem_variacao"),
+        case((seguida, produtividade - func.lag(produtividade).over(partition_by=produto, order_by=c.safra)))
+        .label("produtividade_variacao"),
+    ).subquery("analise")
+
+    return session.execute(
+        select(analise)
+        .where(analise.c.safra >= primeira_safra)
+        .order_by(analise.c.safra.desc(), analise.c.posicao, analise.c.produto)
+    ).all()
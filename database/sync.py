@@ -0,0 +1,717 @@
+import json
+import uuid
+import logging
+import time
+import datetime
+import threading
+from contextlib import contextmanager
+from sqlalchemy import (
+    MetaData, Table, Column, Integer, BigInteger, String, DateTime, Text, Index,
+    select, insert, update, delete, text, func
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.exc import IntegrityError, OperationalError, InterfaceError
+from .models import Base, utcnow
+from .migrations import CHANGE_LOG_PRUNE_INTERVAL, prune_change_log, run_migrations
+
+# Configurar logging
+logger = logging.getLogger(__name__)
+
+# Tabelas replicadas, em ordem de dependência (cadastros antes de quem os referencia)
+SYNCED_TABLES = Base.metadata.sorted_tables
+
+# Registros criados na réplica recebem ids a partir daqui, longe dos ids do servidor;
+# ao serem enviados, passam a usar o id atribuído pelo servidor
+LOCAL_ID_BASE = 1_000_000_000
+
+# Alterações lidas do change_log do servidor por lote
+PULL_BATCH = 500
+
+# Registros enviados ao servidor por transação
+PUSH_BATCH = PULL_BATCH
+
+# Quantos ids abaixo do cursor são relidos a cada ciclo: o id do change_log vem de uma
+# sequência, e uma transação que pegou um id menor pode confirmar depois de outra
+LATE_COMMIT_WINDOW = 1000
+
+# Registros copiados por lote na cópia inicial da réplica
+SNAPSHOT_BATCH = 5000
+
+# Acima disso, as abas recarregam a tabela inteira em vez de reler registro por registro
+MAX_NOTIFICATIONS = 500
+
+# Tabelas de controle, que existem só na réplica
+replica_metadata = MetaData()
+
+sync_state = Table(
+    "sync_state", replica_metadata,
+    Column("id", Integer, primary_key=True),  # Sempre 1
+    Column("client_id", String(36), nullable=False),  # Identifica a réplica no servidor
+    Column("last_change_id", BigInteger),  # Último change_log do servidor já aplicado
+    Column("applying_remote", Integer, nullable=False, default=0),  # 1 enquanto a sincronização grava
+    Column("last_sync_at", DateTime),
+)
+
+# Cada gravação local registra (tabela, id); o envio lê o estado atual do registro.
+# base_updated_at é o updated_at anterior à alteração, isto é, a versão em que ela se baseou
+sync_outbox = Table(
+    "sync_outbox", replica_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("table_name", String(50), nullable=False),
+    Column("row_id", Integer, nullable=False),
+    Column("operation", String(1), nullable=False),
+    Column("base_updated_at", DateTime),
+    Column("changed_at", DateTime, nullable=False, default=utcnow),
+    Index("ix_sync_outbox_row", "table_name", "row_id"),
+)
+
+# Entradas do change_log já aplicadas dentro da janela LATE_COMMIT_WINDOW abaixo do cursor
+sync_applied = Table(
+    "sync_applied", replica_metadata,
+    Column("change_id", BigInteger, primary_key=True, autoincrement=False),
+)
+
+# Versões locais descartadas por um conflito ou recusadas pelo servidor, para conferência
+sync_discarded = Table(
+    "sync_discarded", replica_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("table_name", String(50), nullable=False),
+    Column("row_id", Integer, nullable=False),
+    Column("reason", String(200), nullable=False),
+    Column("data", Text),  # Registro local em JSON
+    Column("discarded_at", DateTime, nullable=False, default=datetime.datetime.now),
+)
+
+
+def configure_replica_metadata(metadata):
+    """Cria as tabelas da réplica com AUTOINCREMENT, para que os ids locais comecem em LOCAL_ID_BASE.
+
+    Sem AUTOINCREMENT o SQLite usaria o maior id existente + 1, que pode já
+    ter sido usado no servidor por outro terminal.
+    """
+    for table in metadata.sorted_tables:
+        table.dialect_options["sqlite"]["autoincrement"] = True
+
+
+def prepare_replica(engine):
+    """Cria na réplica as tabelas de controle e os gatilhos que alimentam sync_outbox."""
+    if engine.dialect.name != "sqlite":
+        raise ValueError("REPLICA_URL deve apontar para um banco SQLite (ex.: sqlite:///fazenda_local.db).")
+
+    replica_metadata.create_all(engine)
+    with engine.begin() as connection:
+        if connection.execute(select(sync_state.c.id)).first() is None:
+            connection.execute(insert(sync_state).values(id=1, client_id=str(uuid.uuid4()), applying_remote=0))
+
+        for table in SYNCED_TABLES:
+            sql = connection.execute(
+                text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": table.name}
+            ).scalar()
+            if sql is None or "AUTOINCREMENT" not in sql.upper():
+                raise ValueError(
+                    f"A tabela '{table.name}' do arquivo de REPLICA_URL foi criada fora do modo réplica; "
+                    f"use um arquivo novo para a réplica."
+                )
+            if not connection.execute(
+                text("SELECT 1 FROM sqlite_sequence WHERE name = :name"), {"name": table.name}
+            ).first():
+                connection.execute(
+                    text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+                    {"name": table.name, "seq": LOCAL_ID_BASE - 1}
+                )
+
+            # As alterações gravadas pela própria sincronização não voltam para a fila
+            for event_name, operation, row, base in (
+                ("INSERT", "I", "NEW", "NULL"),
+                ("UPDATE", "U", "NEW", "OLD.updated_at"),
+                ("DELETE", "D", "OLD", "OLD.updated_at"),
+            ):
+                connection.execute(text(
+                    f"CREATE TRIGGER IF NOT EXISTS {table.name}_sync_{event_name.lower()} "
+                    f"AFTER {event_name} ON {table.name} "
+                    f"WHEN (SELECT applying_remote FROM sync_state WHERE id = 1) = 0 "
+                    f"BEGIN "
+                    f"INSERT INTO sync_outbox (table_name, row_id, operation, base_updated_at, changed_at) "
+                    f"VALUES ('{table.name}', {row}.id, '{operation}', {base}, CURRENT_TIMESTAMP); "
+                    f"END"
+                ))
+
+
+def is_local_id(row_id):
+    """Indica se o id é de um registro criado na réplica e ainda não enviado ao servidor."""
+    return row_id >= LOCAL_ID_BASE
+
+
+def natural_key(table):
+    """Coluna única que identifica o mesmo cadastro criado em dois terminais (ex.: fornecedor.nome)."""
+    for column in table.columns:
+        if column.unique:
+            return column
+    return None
+
+
+def references(table):
+    """Colunas de outras tabelas que apontam para a tabela informada."""
+    return [
+        (child, foreign_key.parent)
+        for child in SYNCED_TABLES
+        for foreign_key in child.foreign_keys
+        if foreign_key.column.table is table
+    ]
+
+
+def local_wins(local, remote, base):
+    """Indica se a alteração local pendente prevalece sobre a versão do servidor.
+
+    Se o servidor ainda está na versão em que a alteração local se baseou,
+    não há conflito. Caso contrário vence o updated_at mais recente e, no
+    empate, o servidor. Todo updated_at é gravado em UTC (models.utcnow,
+    CURRENT_TIMESTAMP do SQLite e gatilho do PostgreSQL; ver migração 14),
+    para que os valores de terminais e servidor sejam comparáveis.
+    """
+    if base is not None and remote["updated_at"] == base:
+        return True
+    return (local["updated_at"] or datetime.datetime.min) > (remote["updated_at"] or datetime.datetime.min)
+
+
+def _keep_updated_at(table):
+    # Impede que o onupdate de updated_at marque como nova uma versão apenas copiada
+    return {"updated_at": table.c.updated_at}
+
+
+class PendingChange:
+    """Registro com alterações locais ainda não enviadas."""
+
+    def __init__(self, last_entry, base_updated_at):
+        self.last_entry = last_entry            # Último registro em sync_outbox
+        self.base_updated_at = base_updated_at  # Versão do servidor em que a primeira alteração se baseou
+
+
+class SyncEngine(threading.Thread):
+    """Sincroniza, em segundo plano, a réplica local com o banco central.
+
+    A interface lê e grava somente na réplica (SQLite), que continua
+    funcionando sem conexão com o servidor. Gatilhos na réplica registram
+    cada gravação local em sync_outbox. A cada ciclo, quando o servidor
+    responde, as alterações pendentes são enviadas e as feitas por outros
+    terminais são trazidas do change_log do servidor, em lotes.
+
+    Conflitos têm resolução determinística, igual nos dois sentidos:
+    - exclusão vence alteração;
+    - se o registro mudou no servidor depois da versão em que a alteração
+      local se baseou, vence o updated_at mais recente e, no empate, o
+      servidor (ver local_wins);
+    - registros criados na réplica recebem o id do servidor ao serem
+      enviados; um cadastro com o mesmo valor único (ex.: nome do
+      fornecedor) já existente no servidor é unificado com ele.
+    A versão local perdedora, ou recusada pelo servidor (ex.: exclusão de
+    um maquinário com manutenções), fica registrada em sync_discarded.
+
+    Para cada registro alterado na réplica pela sincronização, chama
+    callback(tabela, operação, id), como o ChangeListener; a operação "R"
+    pede que a tabela inteira seja recarregada.
+    """
+
+    def __init__(self, replica, central, callback, interval=15):
+        super().__init__(name="SyncEngine", daemon=True)
+        self.replica = replica
+        self.central = central
+        self.callback = callback
+        self.interval = interval
+        self.online = None       # None até a primeira tentativa
+        self.pending = 0         # Registros com alterações locais ainda não enviadas
+        self.last_sync = None
+        self._central_ready = False
+        self._pruned_at = None   # time.monotonic() da última limpeza do change_log do servidor
+        self._notifications = {}
+        self._stop_event = threading.Event()
+        self._wake_event = threading.Event()
+
+        with self.replica.connect() as connection:
+            state = connection.execute(select(sync_state)).one()
+        self.client_id = state.client_id
+        self.last_sync = state.last_sync_at
+
+    @staticmethod
+    def is_supported(central):
+        """Indica se o banco central mantém o change_log usado na sincronização."""
+        return central.dialect.name == "postgresql"
+
+    def stop(self):
+        """Pede o encerramento da thread (atendido ao fim do registro ou lote em andamento)."""
+        self._stop_event.set()
+        self._wake_event.set()
+
+    def request_sync(self):
+        """Antecipa o próximo ciclo de sincronização."""
+        self._wake_event.set()
+
+    def run(self):
+        self.pending = self.count_pending()
+        while not self._stop_event.is_set():
+            try:
+                self.sync_once()
+                if self.online is False:
+                    logger.info("Conexão com o servidor central restabelecida; réplica sincronizada.")
+                self.online = True
+            except (OperationalError, InterfaceError) as e:
+                if self.online is not False:
+                    logger.warning(f"Servidor central inacessível; trabalhando na réplica local: {str(e)}")
+                self.online = False
+            except Exception as e:
+                logger.error(f"Erro na sincronização da réplica local: {str(e)}", exc_info=True)
+                self.online = False
+            finally:
+                self.flush_notifications()
+                self.pending = self.count_pending()
+            self._wake_event.wait(self.interval)
+            self._wake_event.clear()
+
+    def describe(self):
+        """Situação da sincronização para a barra de status."""
+        pendentes = f"{self.pending} registro(s) com alterações não enviadas" if self.pending else ""
+        if self.online is None:
+            return "Sincronizando com o servidor..."
+        if not self.online:
+            ultima = f" (última sincronização em {self.last_sync:%d/%m %H:%M})" if self.last_sync else ""
+            return f"Sem conexão com o servidor{ultima}" + (f"; {pendentes}" if pendentes else "")
+        return f"Sincronizado às {self.last_sync:%H:%M}" + (f"; {pendentes}" if pendentes else "")
+
+    def sync_once(self):
+        """Um ciclo completo: prepara o servidor, envia as alterações locais e traz as remotas."""
+        if not self._central_ready:
+            Base.metadata.create_all(self.central)
+            run_migrations(self.central)  # Também limpa o change_log
+            self._central_ready = True
+            self._pruned_at = time.monotonic()
+        if self.needs_snapshot():
+            self.snapshot()
+        self.push()
+        while self.pull() == PULL_BATCH and not self._stop_event.is_set():
+            pass
+        self.pull_late()
+        self.prune_if_due()
+        now = datetime.datetime.now()
+        with self.replica.begin() as connection:
+            connection.execute(update(sync_state).where(sync_state.c.id == 1).values(last_sync_at=now))
+        self.last_sync = now
+
+    def prune_if_due(self):
+        """Limpa o change_log do servidor a cada CHANGE_LOG_PRUNE_INTERVAL (no modo réplica nenhum
+        terminal tem um ChangeListener no servidor)."""
+        now = time.monotonic()
+        if self._pruned_at is None or now - self._pruned_at >= CHANGE_LOG_PRUNE_INTERVAL:
+            self._pruned_at = now
+            prune_change_log(self.central)
+
+    # Réplica
+
+    @contextmanager
+    def applying_remote(self):
+        """Transação na réplica cujas gravações não entram em sync_outbox.
+
+        As chaves estrangeiras não são verificadas durante a transação: a
+        ordem dos lotes do servidor não garante que um cadastro chegue antes
+        de quem o referencia.
+        """
+        with self.replica.connect() as connection:
+            connection.exec_driver_sql("PRAGMA foreign_keys = OFF")
+            connection.commit()
+            try:
+                with connection.begin():
+                    # A primeira instrução já é uma escrita: a interface espera o fim da transação
+                    connection.execute(update(sync_state).where(sync_state.c.id == 1).values(applying_remote=1))
+                    yield connection
+                    connection.execute(update(sync_state).where(sync_state.c.id == 1).values(applying_remote=0))
+            finally:
+                connection.exec_driver_sql("PRAGMA foreign_keys = ON")
+                connection.commit()
+
+    def count_pending(self):
+        try:
+            with self.replica.connect() as connection:
+                return connection.execute(
+                    select(func.count()).select_from(
+                        select(sync_outbox.c.table_name, sync_outbox.c.row_id).distinct().subquery()
+                    )
+                ).scalar()
+        except Exception:
+            return self.pending
+
+    def pending_changes(self, connection):
+        """Registros com alterações locais pendentes: {(tabela, id): PendingChange}."""
+        first_entries = select(
+            sync_outbox.c.table_name, sync_outbox.c.row_id,
+            func.min(sync_outbox.c.id).label("first_entry"), func.max(sync_outbox.c.id).label("last_entry")
+        ).group_by(sync_outbox.c.table_name, sync_outbox.c.row_id).subquery()
+        rows = connection.execute(
+            select(first_entries.c.table_name, first_entries.c.row_id, first_entries.c.last_entry,
+                   sync_outbox.c.base_updated_at)
+            .join_from(first_entries, sync_outbox, sync_outbox.c.id == first_entries.c.first_entry)
+        )
+        return {
+            (table_name, row_id): PendingChange(last_entry, base_updated_at)
+            for table_name, row_id, last_entry, base_updated_at in rows
+        }
+
+    def local_row(self, connection, table, row_id):
+        row = connection.execute(select(table).where(table.c.id == row_id)).first()
+        return dict(row._mapping) if row is not None else None
+
+    def clear_outbox(self, connection, table, row_id, last_entry=None):
+        statement = delete(sync_outbox).where(sync_outbox.c.table_name == table.name, sync_outbox.c.row_id == row_id)
+        if last_entry is not None:
+            # Alterações feitas durante o envio ficam para o próximo ciclo
+            statement = statement.where(sync_outbox.c.id <= last_entry)
+        connection.execute(statement)
+
+    def discard(self, connection, table, row_id, local, reason):
+        """Guarda em sync_discarded a versão local que não prevaleceu."""
+        logger.warning(f"Sincronização: alteração local de {table.name} ({row_id}) descartada: {reason}")
+        connection.execute(insert(sync_discarded).values(
+            table_name=table.name, row_id=row_id, reason=reason[:200],
+            data=json.dumps(local, default=str) if local is not None else None
+        ))
+
+    def store_remote(self, connection, table, remote):
+        """Grava na réplica a versão do servidor de um registro."""
+        statement = sqlite_insert(table).values(remote)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=[table.c.id],
+            set_={column.name: statement.excluded[column.name] for column in table.columns if not column.primary_key}
+        ))
+        self.notify(table, "U", remote["id"])
+
+    def delete_local(self, connection, table, row_id):
+        """Exclui o registro da réplica; quem o referencia localmente fica sem a referência."""
+        for child, column in references(table):
+            connection.execute(
+                update(child).where(column == row_id).values({column.name: None, **_keep_updated_at(child)})
+            )
+        connection.execute(delete(table).where(table.c.id == row_id))
+        self.notify(table, "D", row_id)
+
+    def remap(self, connection, table, old_id, new_id):
+        """Troca o id local de um registro pelo id atribuído pelo servidor."""
+        connection.execute(update(table).where(table.c.id == old_id).values(id=new_id, **_keep_updated_at(table)))
+        for child, column in references(table):
+            connection.execute(
+                update(child).where(column == old_id).values({column.name: new_id, **_keep_updated_at(child)})
+            )
+        connection.execute(
+            update(sync_outbox)
+            .where(sync_outbox.c.table_name == table.name, sync_outbox.c.row_id == old_id)
+            .values(row_id=new_id)
+        )
+        self.notify(table, "D", old_id)
+        self.notify(table, "U", new_id)
+
+    def apply_remote(self, connection, table, row_id, remote, pending):
+        """Aplica na réplica a versão do servidor (None se excluído), resolvendo conflitos com a local."""
+        change = pending.get((table.name, row_id))
+        local = self.local_row(connection, table, row_id)
+        if change is None:
+            if remote is not None:
+                if remote != local:
+                    self.store_remote(connection, table, remote)
+            elif local is not None:
+                self.delete_local(connection, table, row_id)
+            return
+
+        if local is None:
+            return  # A exclusão local vence; é enviada no próximo envio
+        if remote is None:
+            self.discard(connection, table, row_id, local, "registro excluído no servidor")
+            self.delete_local(connection, table, row_id)
+        elif local_wins(local, remote, change.base_updated_at):
+            return  # É enviada no próximo envio
+        else:
+            self.discard(connection, table, row_id, local, "alteração mais recente no servidor")
+            self.store_remote(connection, table, remote)
+        self.clear_outbox(connection, table, row_id)
+
+    def notify(self, table, operation, row_id):
+        self._notifications.setdefault(table.name, []).append((operation, row_id))
+
+    def flush_notifications(self):
+        """Entrega à interface as alterações aplicadas na réplica neste ciclo."""
+        notifications, self._notifications = self._notifications, {}
+        for table_name, changes in notifications.items():
+            if len(changes) > MAX_NOTIFICATIONS:
+                changes = [("R", 0)]
+            for operation, row_id in changes:
+                try:
+                    self.callback(table_name, operation, row_id)
+                except Exception as e:
+                    logger.error(f"Erro ao aplicar alteração de {table_name} ({row_id}): {str(e)}")
+
+    # Servidor -> réplica
+
+    def last_change_id(self):
+        with self.replica.connect() as connection:
+            return connection.execute(select(sync_state.c.last_change_id)).scalar()
+
+    def needs_snapshot(self):
+        """Indica se a réplica precisa de uma cópia completa (primeira vez ou change_log já limpo)."""
+        last_change_id = self.last_change_id()
+        if last_change_id is None:
+            return True
+        with self.central.connect() as central:
+            oldest = central.execute(text("SELECT MIN(id) FROM change_log")).scalar()
+        if oldest is not None and oldest > last_change_id + 1:
+            logger.warning("O change_log do servidor não cobre mais a última sincronização; copiando tudo novamente.")
+            return True
+        return False
+
+    def snapshot(self):
+        """Copia todas as tabelas do servidor para a réplica, preservando as alterações locais pendentes."""
+        logger.info("Copiando os dados do servidor central para a réplica local...")
+        with self.central.connect() as central:
+            # Alterações feitas durante a cópia são reaplicadas pelo pull seguinte; as já
+            # confirmadas na janela abaixo do cursor estão na cópia e não precisam ser relidas
+            cursor = central.execute(text("SELECT COALESCE(MAX(id), 0) FROM change_log")).scalar()
+            applied = central.execute(
+                text("SELECT id FROM change_log WHERE id > :since AND id <= :cursor"),
+                {"since": cursor - LATE_COMMIT_WINDOW, "cursor": cursor}
+            ).scalars().all()
+            for table in SYNCED_TABLES:
+                seen, last_id = set(), 0
+                while True:
+                    if self._stop_event.is_set():
+                        return
+                    rows = central.execute(
+                        select(table).where(table.c.id > last_id).order_by(table.c.id).limit(SNAPSHOT_BATCH)
+                    ).all()
+                    if not rows:
+                        break
+                    last_id = rows[-1].id
+                    seen.update(row.id for row in rows)
+                    with self.applying_remote() as connection:
+                        pending = self.pending_changes(connection)
+                        for row in rows:
+                            self.apply_remote(connection, table, row.id, dict(row._mapping), pending)
+                # Registros que não existem mais no servidor
+                with self.applying_remote() as connection:
+                    pending = self.pending_changes(connection)
+                    local_ids = connection.execute(select(table.c.id).where(table.c.id < LOCAL_ID_BASE)).scalars()
+                    for row_id in sorted(set(local_ids) - seen):
+                        self.apply_remote(connection, table, row_id, None, pending)
+        with self.replica.begin() as connection:
+            connection.execute(delete(sync_applied))
+            self.mark_applied(connection, applied, cursor)
+        logger.info("Cópia da réplica local concluída.")
+
+    def mark_applied(self, connection, change_ids, cursor=None):
+        """Registra as entradas do change_log aplicadas e, se informado, avança o cursor."""
+        if change_ids:
+            connection.execute(
+                sqlite_insert(sync_applied).on_conflict_do_nothing(),
+                [{"change_id": change_id} for change_id in change_ids]
+            )
+        if cursor is not None:
+            connection.execute(update(sync_state).where(sync_state.c.id == 1).values(last_change_id=cursor))
+            connection.execute(delete(sync_applied).where(sync_applied.c.change_id <= cursor - LATE_COMMIT_WINDOW))
+
+    def apply_entries(self, entries, cursor=None):
+        """Aplica na réplica o estado atual dos registros citados nas entradas do change_log."""
+        changed = {}
+        for _, table_name, row_id in entries:
+            changed.setdefault(table_name, set()).add(row_id)
+        # Uma consulta por tabela traz o estado atual dos registros; os ausentes foram excluídos
+        remote = {}
+        with self.central.connect() as central:
+            for table in SYNCED_TABLES:
+                if table.name in changed:
+                    remote[table.name] = {
+                        row.id: dict(row._mapping)
+                        for row in central.execute(select(table).where(table.c.id.in_(changed[table.name])))
+                    }
+
+        with self.applying_remote() as connection:
+            pending = self.pending_changes(connection)
+            for table in SYNCED_TABLES:
+                for row_id in sorted(changed.get(table.name, ())):
+                    self.apply_remote(connection, table, row_id, remote[table.name].get(row_id), pending)
+            self.mark_applied(connection, [entry.id for entry in entries], cursor)
+
+    def pull(self):
+        """Aplica na réplica o próximo lote do change_log do servidor; retorna o tamanho do lote."""
+        with self.central.connect() as central:
+            entries = central.execute(text(
+                "SELECT id, table_name, row_id FROM change_log WHERE id > :last ORDER BY id LIMIT :limit"
+            ), {"last": self.last_change_id(), "limit": PULL_BATCH}).all()
+        if entries:
+            self.apply_entries(entries, cursor=entries[-1].id)
+        return len(entries)
+
+    def pull_late(self):
+        """Aplica as entradas da janela abaixo do cursor que confirmaram depois de outras de id maior."""
+        last_change_id = self.last_change_id()
+        with self.replica.connect() as connection:
+            applied = set(connection.execute(
+                select(sync_applied.c.change_id).where(sync_applied.c.change_id > last_change_id - LATE_COMMIT_WINDOW)
+            ).scalars())
+        with self.central.connect() as central:
+            entries = [
+                entry for entry in central.execute(text(
+                    "SELECT id, table_name, row_id FROM change_log WHERE id > :since AND id <= :last ORDER BY id"
+                ), {"since": last_change_id - LATE_COMMIT_WINDOW, "last": last_change_id})
+                if entry.id not in applied
+            ]
+        if entries:
+            self.apply_entries(entries)
+        return len(entries)
+
+    # Réplica -> servidor
+
+    def push(self):
+        """Envia ao servidor, em lotes, os registros com alterações locais pendentes."""
+        with self.replica.connect() as connection:
+            pending = self.pending_changes(connection)
+            # Gravações na ordem das dependências; exclusões na ordem inversa
+            gravacoes, exclusoes = [], []
+            for table in SYNCED_TABLES:
+                row_ids = sorted(row_id for table_name, row_id in pending if table_name == table.name)
+                existing = set()
+                for start in range(0, len(row_ids), PUSH_BATCH):
+                    existing.update(connection.execute(
+                        select(table.c.id).where(table.c.id.in_(row_ids[start:start + PUSH_BATCH]))
+                    ).scalars())
+                for row_id in row_ids:
+                    item = (table, row_id, pending[(table.name, row_id)])
+                    (gravacoes if row_id in existing else exclusoes).append(item)
+
+        items = gravacoes + exclusoes[::-1]
+        for start in range(0, len(items), PUSH_BATCH):
+            if self._stop_event.is_set():
+                return
+            self.push_batch(items[start:start + PUSH_BATCH])
+
+    def push_batch(self, items):
+        """Envia um lote de registros em uma transação do servidor e aplica os resultados na réplica.
+
+        Se o servidor recusar algum registro, o lote é desfeito e enviado
+        registro a registro, para que só o recusado seja descartado.
+        """
+        with self.replica.connect() as connection:
+            locals_ = [self.local_row(connection, table, row_id) for table, row_id, _ in items]
+        results, central_ids = [], {}
+        try:
+            with self.central.begin() as central:
+                for (table, row_id, change), local in zip(items, locals_):
+                    # Referências a registros locais enviados neste mesmo lote
+                    if local is not None:
+                        for foreign_key in table.foreign_keys:
+                            target = (foreign_key.column.table.name, local[foreign_key.parent.name])
+                            if target in central_ids:
+                                local = {**local, foreign_key.parent.name: central_ids[target]}
+                    result = self.write_central(central, table, row_id, local, change)
+                    if result[0] is not None:
+                        central_ids[(table.name, row_id)] = result[0]
+                    results.append(result)
+        except IntegrityError:
+            for table, row_id, change in items:
+                if self._stop_event.is_set():
+                    return
+                with self.replica.connect() as connection:
+                    local = self.local_row(connection, table, row_id)
+                self.push_row(table, row_id, local, change)
+            return
+
+        with self.applying_remote() as connection:
+            for (table, row_id, change), local, result in zip(items, locals_, results):
+                self.apply_sent(connection, table, row_id, local, change, *result)
+
+    def push_row(self, table, row_id, local, change):
+        """Envia um registro (local=None para exclusão) e aplica na réplica o resultado."""
+        try:
+            with self.central.begin() as central:
+                central_id, remote, outcome = self.write_central(central, table, row_id, local, change)
+        except IntegrityError as e:
+            self.reject(table, row_id, local, f"recusada pelo servidor: {str(e.orig).splitlines()[0]}")
+            return
+
+        with self.applying_remote() as connection:
+            self.apply_sent(connection, table, row_id, local, change, central_id, remote, outcome)
+
+    def apply_sent(self, connection, table, row_id, local, change, central_id, remote, outcome):
+        """Aplica na réplica o resultado do envio de um registro (ver write_central)."""
+        if central_id is not None and central_id != row_id:
+            self.remap(connection, table, row_id, central_id)
+            row_id = central_id
+        if outcome == "remote_deleted":
+            self.discard(connection, table, row_id, local, "registro excluído no servidor")
+            self.delete_local(connection, table, row_id)
+        elif outcome == "remote_newer":
+            self.discard(connection, table, row_id, local, "alteração mais recente no servidor")
+            self.store_remote(connection, table, remote)
+        elif remote is not None:
+            # Passa a ter o updated_at do servidor, base das próximas alterações locais
+            connection.execute(
+                update(table)
+                .where(table.c.id == row_id, table.c.updated_at == local["updated_at"])
+                .values(updated_at=remote["updated_at"])
+            )
+        self.clear_outbox(connection, table, row_id, change.last_entry)
+
+    def reject(self, table, row_id, local, reason):
+        """Descarta a alteração local recusada pelo servidor e volta à versão do servidor."""
+        remote = None
+        if not is_local_id(row_id):
+            with self.central.connect() as central:
+                remote = self.central_row(central, table, row_id)
+        with self.applying_remote() as connection:
+            self.discard(connection, table, row_id, local, reason)
+            if remote is not None:
+                self.store_remote(connection, table, remote)
+            elif self.local_row(connection, table, row_id) is not None:
+                self.delete_local(connection, table, row_id)
+            self.clear_outbox(connection, table, row_id)
+
+    def central_row(self, central, table, row_id, lock=False):
+        query = select(table).where(table.c.id == row_id)
+        if lock:
+            query = query.with_for_update()
+        row = central.execute(query).first()
+        return dict(row._mapping) if row is not None else None
+
+    def inserted_id(self, central, table, local_id):
+        """Id no servidor de um registro local já enviado (ex.: envio interrompido antes de atualizar a réplica)."""
+        return central.execute(text(
+            "SELECT central_id FROM sync_insert_map "
+            "WHERE client_id = :client AND table_name = :table AND local_id = :local_id"
+        ), {"client": self.client_id, "table": table.name, "local_id": local_id}).scalar()
+
+    def write_central(self, central, table, row_id, local, change):
+        """Grava o registro no servidor; retorna (id no servidor, versão do servidor, resultado)."""
+        values = {name: value for name, value in local.items() if name != "id"} if local is not None else None
+        central_id, base = row_id, change.base_updated_at
+        if is_local_id(row_id):
+            base = None  # Criado na réplica: não há versão anterior no servidor
+            central_id = self.inserted_id(central, table, row_id)
+            key = natural_key(table)
+            if central_id is None and local is not None and key is not None and local[key.name] is not None:
+                central_id = central.execute(select(table.c.id).where(key == local[key.name])).scalar()
+            if central_id is None:
+                if local is None:
+                    return None, None, "never_sent"
+                central_id = central.execute(insert(table).values(values).returning(table.c.id)).scalar_one()
+                central.execute(text(
+                    "INSERT INTO sync_insert_map (client_id, table_name, local_id, central_id) "
+                    "VALUES (:client, :table, :local_id, :central_id)"
+                ), {"client": self.client_id, "table": table.name, "local_id": row_id, "central_id": central_id})
+                return central_id, None, "sent"
+
+        if local is None:
+            central.execute(delete(table).where(table.c.id == central_id))
+            return central_id, None, "sent"
+
+        remote = self.central_row(central, table, central_id, lock=True)
+        if remote is None:
+            return central_id, None, "remote_deleted"
+        if not local_wins(local, remote, base):
+            return central_id, remote, "remote_newer"
+        updated_at = central.execute(
+            update(table).where(table.c.id == central_id).values(values).returning(table.c.updated_at)
+        ).scalar_one()
+        return central_id, {"updated_at": updated_at}, "sent"
@@ -1,15 +1,22 @@
 import sys
 import os
+import time
 import logging
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from PyQt5.QtWidgets import QApplication, QMessageBox, QSplashScreen
 from PyQt5.QtGui import QPixmap
 from PyQt5.QtCore import Qt
-from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy_utils import database_exists, create_database
 
-from database import init_db
+from database import (
+    init_db, check_connection, schema_is_current, record_schema_fingerprint, pool_status,
+    APP_DATABASE_URL, is_sqlite
+)
 from ui import MainWindow
+from ui.watchdog import EventLoopWatchdog
 
 # Configurar logging
 logging.basicConfig(
@@ -22,20 +29,67 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def check_database_connection():
-    """Verifica se a conexão com o banco de dados pode ser estabelecida."""
-    try:
+class StartupTimer:
+    """Mede a duração de cada fase da inicialização e registra no log."""
+    
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.phases = []
+    
+    @contextmanager
+    def phase(self, name):
+        """Mede o bloco de código como uma fase com o nome informado."""
+        phase_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - phase_start))
+    
+    def log(self):
+        """Registra no log o tempo de cada fase e o tempo total."""
+        phases = ", ".join(f"{name}={duration * 1000:.0f}ms" for name, duration in self.phases)
+        total = (time.perf_counter() - self.start) * 1000
+        logger.info(f"Tempos de inicialização: {phases}; total={total:.0f}ms")
+
+def bootstrap_database(timer):
+    """Prepara o banco de dados (executado em segundo plano durante a inicialização).
+    
+    Se o esquema já foi preparado em uma execução anterior (mesma impressão
+    digital), apenas verifica a conexão, sem checar a existência do banco nem
+    rodar create_all.
+    """
+    if schema_is_current():
+        try:
+            with timer.phase("verificacao_conexao"):
+                check_connection()
+            return
+        except Exception as e:
+            logger.warning(f"Falha na inicialização rápida, preparando o banco novamente: {str(e)}")
+    
+    with timer.phase("criacao_banco"):
+        create_database_if_not_exists()
+    with timer.phase("criacao_tabelas"):
         init_db()
+    record_schema_fingerprint()
+
+def check_database_connection(bootstrap):
+    """Aguarda a preparação do banco de dados e informa se a conexão foi estabelecida."""
+    try:
+        bootstrap.result()
         logger.info("Conexão com o banco de dados estabelecida com sucesso.")
         return True
     except Exception as e:
-        db_name = os.getenv('DB_NAME', 'fazenda')
+        db_name = make_url(APP_DATABASE_URL).database
         error_msg = f"Não foi possível conectar ao banco de dados. Verifique as configurações.\n\n"
         error_msg += f"Detalhes do erro: {str(e)}\n\n"
         error_msg += "Verifique se:\n"
-        error_msg += "1. PostgreSQL está instalado e em execução\n"
-        error_msg += "2. As configurações no arquivo .env estão corretas\n"
-        error_msg += f"3. O banco de dados '{db_name}' existe\n"
+        if is_sqlite(APP_DATABASE_URL):
+            error_msg += f"1. O arquivo '{db_name}' pode ser criado e gravado\n"
+            error_msg += "2. As configurações DATABASE_URL e REPLICA_URL no arquivo .env estão corretas\n"
+        else:
+            error_msg += "1. PostgreSQL está instalado e em execução\n"
+            error_msg += "2. As configurações no arquivo .env estão corretas\n"
+            error_msg += f"3. O banco de dados '{db_name}' existe\n"
         error_msg += "\nConsulte README.md para instruções de configuração."
         
         logger.error(f"Erro de conexão com o banco de dados: {str(e)}")
@@ -50,22 +104,18 @@ def check_database_connection():
 def create_database_if_not_exists():
     """Tenta criar o banco de dados se não existir."""
     try:
-        # Variáveis do banco de dados
-        db_user = os.getenv("DB_USER", "postgres")
-        db_password = os.getenv("DB_PASSWORD", "postgres")
-        db_host = os.getenv("DB_HOST", "localhost")
-        db_port = os.getenv("DB_PORT", "5432")
-        db_name = os.getenv("DB_NAME", "fazenda")
+        db_name = make_url(APP_DATABASE_URL).database
         
-        # Criar conexão para o PostgreSQL sem especificar um banco de dados
-        postgres_url = f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/postgres"
-        engine = create_engine(postgres_url)
+        if is_sqlite(APP_DATABASE_URL):
+            # O arquivo é criado na primeira conexão; basta a pasta existir
+            if db_name and db_name != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(db_name)), exist_ok=True)
+            return True
         
         # Verificar se o banco de dados existe e criar se não existir
-        database_url = f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
-        if not database_exists(database_url):
+        if not database_exists(APP_DATABASE_URL):
             logger.info(f"Banco de dados '{db_name}' não encontrado. Tentando criar...")
-            create_database(database_url)
+            create_database(APP_DATABASE_URL)
             logger.info(f"Banco de dados '{db_name}' criado com sucesso.")
             return True
         return True
@@ -75,15 +125,24 @@ def create_database_if_not_exists():
 
 def main():
     """Função principal que inicia o aplicativo."""
+    timer = StartupTimer()
+    
     # Carregar variáveis de ambiente
-    load_dotenv()
+    with timer.phase("ambiente"):
+        load_dotenv()
     
     logger.info("Iniciando aplicação Sistema de Gerenciamento de Fazenda")
     
+    # Preparar o banco de dados em segundo plano, em paralelo com a inicialização do Qt
+    executor = ThreadPoolExecutor(max_workers=1)
+    bootstrap = executor.submit(bootstrap_database, timer)
+    executor.shutdown(wait=False)
+    
     # Criar aplicação Qt
-    app = QApplication(sys.argv)
-    app.setStyle("Fusion")  # Estilo consistente em todas as plataformas
-    app.setApplicationName("Sistema de Gerenciamento de Fazenda")
+    with timer.phase("qt"):
+        app = QApplication(sys.argv)
+        app.setStyle("Fusion")  # Estilo consistente em todas as plataformas
+        app.setApplicationName("Sistema de Gerenciamento de Fazenda")
     
     # Criar pasta de recursos se não existir
     os.makedirs('ui/resources', exist_ok=True)
@@ -91,18 +150,17 @@ def main():
     # Mostrar splash screen se o arquivo existir
     splash = None
     splash_path = "ui/resources/splash.png"
-    if os.path.exists(splash_path):
-        splash_pixmap = QPixmap(splash_path)
-        if not splash_pixmap.isNull():
-            splash = QSplashScreen(splash_pixmap, Qt.WindowType.WindowStaysOnTopHint)
-            splash.show()
-            app.processEvents()
+    with timer.phase("splash"):
+        if os.path.exists(splash_path):
+            splash_pixmap = QPixmap(splash_path)
+            if not splash_pixmap.isNull():
+                splash = QSplashScreen(splash_pixmap, Qt.WindowType.WindowStaysOnTopHint)
+                splash.show()
+                app.processEvents()
     
-    # Tentar criar o banco se não existir
-    create_database_if_not_exists()
-    
-    # Verificar conexão com o banco de dados
-    db_connected = check_database_connection()
+    # Aguardar a preparação do banco de dados
+    with timer.phase("aguardando_banco"):
+        db_connected = check_database_connection(bootstrap)
     
     # Esconder splash screen se estiver ativo
     if splash:
@@ -111,14 +169,33 @@ def main():
     if not db_connected:
         return 1
     
+    # Monitorar travamentos da interface (opcional, via .env)
+    watchdog = None
+    if os.getenv("UI_WATCHDOG", "true").lower() in ("1", "true", "sim"):
+        watchdog = EventLoopWatchdog(stall_ms=float(os.getenv("UI_STALL_MS", "500")))
+        watchdog.start()
+    
     # Criar e mostrar a janela principal
-    main_window = MainWindow()
-    main_window.show()
+    with timer.phase("janela_principal"):
+        main_window = MainWindow()
+        main_window.show()
     
     logger.info("Aplicação iniciada com sucesso")
+    timer.log()
     
     # Executar o loop principal
-    return app.exec()
+    exit_code = app.exec()
+    
+    if watchdog is not None:
+        watchdog.stop()
+        logger.info(watchdog.summary())
+    
+    # Conexões ainda retiradas do pool ao sair indicam sessões que não foram fechadas
+    status = pool_status()
+    logger.info(f"Pool de conexões: {status['checkouts']} retiradas, {status['checkins']} devolvidas")
+    if status["checked_out"]:
+        logger.warning(f"{status['checked_out']} conexões não foram devolvidas ao pool")
+    return exit_code
 
 if __name__ == "__main__":
     try:
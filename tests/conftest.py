@@ -0,0 +1,40 @@
+"""Fixtures dos testes: bancos SQLite temporários, sem servidor."""
+import os
+import sys
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database.db as db
+from database.models import Base
+from database.migrations import run_migrations
+
+
+@pytest.fixture
+def engine(tmp_path):
+    """Banco SQLite novo, com as tabelas dos modelos e todas as migrações aplicadas."""
+    engine = db.create_engine_for(f"sqlite:///{tmp_path / 'fazenda.db'}")
+    Base.metadata.create_all(engine)
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def session(engine, monkeypatch):
+    """Sessão no banco de teste; session_scope e TabSession também passam a usá-lo."""
+    monkeypatch.setattr(db, "engine", engine)
+    original = db.Session.kw["bind"]
+    db.Session.configure(bind=engine)
+    session = db.Session()
+    yield session
+    session.close()
+    db.Session.configure(bind=original)
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PyQt5.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,41 @@
+"""Sessão de longa duração das abas (TabSession)."""
+import datetime
+
+from sqlalchemy.orm import joinedload
+
+from database import TabSession
+from database.models import Despesa, Fornecedor
+
+
+def test_get_com_options_rele_relacionamento_desatualizado(session):
+    session.add_all([Fornecedor(id=1, nome="Alfa"), Fornecedor(id=2, nome="Beta")])
+    session.add(Despesa(id=1, descricao="Adubo", valor=100, data=datetime.date(2024, 3, 1), fornecedor_id=1))
+    session.commit()
+
+    tab_session = TabSession()
+    despesa = tab_session.get(Despesa, 1, options=[joinedload(Despesa.fornecedor)])
+    assert despesa.fornecedor.nome == "Alfa"
+    # Só a chave estrangeira muda; o relacionamento carregado continua no anterior
+    despesa.fornecedor_id = 2
+    tab_session.commit()
+
+    relida = tab_session.get(Despesa, 1, options=[joinedload(Despesa.fornecedor)])
+
+    assert relida is despesa
+    assert relida.fornecedor.nome == "Beta"
+    tab_session.close()
+
+
+def test_get_sem_options_usa_o_identity_map(session):
+    session.add(Despesa(id=1, descricao="Adubo", valor=100, data=datetime.date(2024, 3, 1)))
+    session.commit()
+
+    tab_session = TabSession()
+    despesa = tab_session.get(Despesa, 1)
+    session.query(Despesa).filter_by(id=1).update({"descricao": "Outra"})
+    session.commit()
+
+    assert tab_session.get(Despesa, 1) is despesa
+    assert despesa.descricao == "Adubo"
+    assert tab_session.get(Despesa, 2) is None
+    tab_session.close()
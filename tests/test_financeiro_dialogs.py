@@ -0,0 +1,139 @@
+"""Diálogos de despesa e entrada: gravação na sessão da aba e reabertura do registro editado."""
+import datetime
+
+import pytest
+from PyQt5.QtWidgets import QMessageBox
+from sqlalchemy.orm import joinedload
+
+from database import TabSession
+from database.models import Cliente, Despesa, Entrada, Fornecedor
+from ui.tabs.financeiro_tab import DespesaDialog, EntradaDialog
+
+
+@pytest.fixture(autouse=True)
+def erros(monkeypatch):
+    """As caixas de mensagem retornam na hora, como se o usuário confirmasse; os avisos e erros são guardados."""
+    erros = []
+    monkeypatch.setattr(QMessageBox, "information", lambda *args, **kwargs: QMessageBox.Ok)
+    for name in ("warning", "critical"):
+        monkeypatch.setattr(QMessageBox, name, lambda parent, title, message, *args: erros.append(message))
+    monkeypatch.setattr(QMessageBox, "question", lambda *args, **kwargs: QMessageBox.Yes)
+    yield erros
+    assert erros == []
+
+
+@pytest.fixture
+def tab_session(session):
+    tab_session = TabSession()
+    yield tab_session
+    tab_session.close()
+
+
+@pytest.fixture
+def despesa_id(session):
+    session.add_all([Fornecedor(nome="Alfa"), Fornecedor(nome="Beta")])
+    session.flush()
+    despesa = Despesa(
+        descricao="Adubo", valor=100, data=datetime.date(2024, 3, 1), data_pagamento=datetime.date(2024, 3, 1),
+        fornecedor_id=session.query(Fornecedor.id).filter_by(nome="Alfa").scalar(),
+    )
+    session.add(despesa)
+    session.commit()
+    return despesa.id
+
+
+def editar_despesa(tab_session, despesa_id, fornecedor):
+    """Abre o diálogo como a aba faz, troca o fornecedor e salva; retorna o registro editado.
+
+    Quem chama guarda o registro, para que ele continue no identity map da
+    sessão (que só guarda referências fracas) quando for reaberto.
+    """
+    despesa = tab_session.get(Despesa, despesa_id, options=[joinedload(Despesa.fornecedor)])
+    dialog = DespesaDialog(despesa=despesa, db=tab_session)
+    dialog.valor_input.setText("100,00")
+    dialog.fornecedor_input.setText(fornecedor)
+    dialog.save_despesa()
+    return dialog.despesa
+
+
+def reabrir_despesa(tab_session, despesa_id):
+    despesa = tab_session.get(Despesa, despesa_id, options=[joinedload(Despesa.fornecedor)])
+    return DespesaDialog(despesa=despesa, db=tab_session)
+
+
+def test_trocar_fornecedor_existente(qapp, session, tab_session, despesa_id):
+    despesa = editar_despesa(tab_session, despesa_id, "Beta")
+
+    dialog = reabrir_despesa(tab_session, despesa_id)
+    assert dialog.despesa is despesa
+    assert dialog.fornecedor_input.text() == "Beta"
+    assert despesa.fornecedor_id == despesa.fornecedor.id
+
+    # Salvar de novo sem mudanças mantém o fornecedor novo
+    dialog.valor_input.setText("100,00")
+    dialog.save_despesa()
+    session.expire_all()
+    assert session.get(Despesa, despesa_id).fornecedor.nome == "Beta"
+
+
+def test_novo_fornecedor_e_remocao(qapp, session, tab_session, despesa_id):
+    despesa = editar_despesa(tab_session, despesa_id, "Gama")
+    dialog = reabrir_despesa(tab_session, despesa_id)
+    assert dialog.fornecedor_input.text() == "Gama"
+
+    assert editar_despesa(tab_session, despesa_id, "") is despesa
+    dialog = reabrir_despesa(tab_session, despesa_id)
+    assert dialog.fornecedor_input.text() == ""
+    session.expire_all()
+    assert session.get(Despesa, despesa_id).fornecedor_id is None
+
+
+@pytest.fixture
+def entrada_id(session):
+    session.add_all([Cliente(nome="Cooperativa"), Cliente(nome="Mercado")])
+    session.flush()
+    entrada = Entrada(
+        descricao="Venda de milho", valor=1000, data=datetime.date(2024, 3, 1),
+        cliente_id=session.query(Cliente.id).filter_by(nome="Cooperativa").scalar(),
+    )
+    session.add(entrada)
+    session.commit()
+    return entrada.id
+
+
+def editar_entrada(tab_session, entrada_id, cliente):
+    """Como editar_despesa, para o cliente de uma entrada."""
+    entrada = tab_session.get(Entrada, entrada_id, options=[joinedload(Entrada.cliente)])
+    dialog = EntradaDialog(entrada=entrada, db=tab_session)
+    dialog.cliente_input.setText(cliente)
+    dialog.save_entrada()
+    return dialog.entrada
+
+
+def reabrir_entrada(tab_session, entrada_id):
+    entrada = tab_session.get(Entrada, entrada_id, options=[joinedload(Entrada.cliente)])
+    return EntradaDialog(entrada=entrada, db=tab_session)
+
+
+def test_trocar_cliente_existente(qapp, session, tab_session, entrada_id):
+    entrada = editar_entrada(tab_session, entrada_id, "Mercado")
+
+    dialog = reabrir_entrada(tab_session, entrada_id)
+    assert dialog.entrada is entrada
+    assert dialog.cliente_input.text() == "Mercado"
+
+    dialog.save_entrada()
+    session.expire_all()
+    assert session.get(Entrada, entrada_id).cliente.nome == "Mercado"
+
+
+def test_novo_cliente_e_remocao(qapp, session, tab_session, entrada_id):
+    entrada = editar_entrada(tab_session, entrada_id, "Feira")
+    dialog = reabrir_entrada(tab_session, entrada_id)
+    assert dialog.cliente_input.text() == "Feira"
+
+    assert editar_entrada(tab_session, entrada_id, "") is entrada
+    dialog = reabrir_entrada(tab_session, entrada_id)
+    assert dialog.cliente_input.text() == ""
+    session.expire_all()
+    assert session.get(Entrada, entrada_id).cliente_id is None
@@ -0,0 +1,127 @@
+"""Conversão dos campos e importação de CSV de despesas."""
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from database.importer import ImportCancelled, import_csv, parse_bool, parse_date, parse_valor
+from database.models import Despesa, Fornecedor
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("1.234,56", Decimal("1234.56")),
+    ("R$ 10,00", Decimal("10.00")),
+    ("R$1.000.000,5", Decimal("1000000.50")),
+    ("1234.56", Decimal("1234.56")),
+    ("0,015", Decimal("0.02")),
+    (" 7 ", Decimal("7.00")),
+])
+def test_parse_valor(text, expected):
+    assert parse_valor(text) == expected
+
+
+def test_parse_valor_vazio():
+    assert parse_valor("  ") is None
+    assert parse_valor("R$") is None
+
+
+@pytest.mark.parametrize("text", ["abc", "1,2,3", "0", "0,00", "-5,00"])
+def test_parse_valor_invalido(text):
+    with pytest.raises(ValueError):
+        parse_valor(text)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("05/03/2024", datetime.date(2024, 3, 5)),
+    ("05/03/24", datetime.date(2024, 3, 5)),
+    ("2024-03-05", datetime.date(2024, 3, 5)),
+    (" 31/12/2023 ", datetime.date(2023, 12, 31)),
+])
+def test_parse_date(text, expected):
+    assert parse_date(text) == expected
+
+
+@pytest.mark.parametrize("text", ["31/02/2024", "2024/03/05", "março", "05-03-2024"])
+def test_parse_date_invalida(text):
+    with pytest.raises(ValueError):
+        parse_date(text)
+
+
+def test_parse_bool():
+    assert parse_bool("Sim") is True
+    assert parse_bool("NÃO") is False
+    assert parse_bool("Pago") is True
+    assert parse_bool("") is None
+    with pytest.raises(ValueError):
+        parse_bool("talvez")
+
+
+def write_csv(path, lines, encoding="utf-8"):
+    path.write_text("\n".join(lines) + "\n", encoding=encoding)
+    return path
+
+
+def test_import_csv_pula_linhas_invalidas(session, tmp_path):
+    path = write_csv(tmp_path / "despesas.csv", [
+        "Descrição;Valor;Data;Fornecedor;Pago",
+        "Adubo;1.234,56;05/03/2024;Agro Ltda;sim",
+        "Sem valor;;05/03/2024;;",
+        "Valor errado;abc;05/03/2024;;",
+        "",
+        "Diesel;R$ 300,00;2024-03-06;agro ltda;não",
+        "Data errada;10,00;31/02/2024;;",
+    ])
+
+    result = import_csv(session, path, Despesa)
+
+    assert result.imported == 2
+    assert [linha for linha, _ in result.errors] == [3, 4, 7]
+    despesas = {d.descricao: d for d in session.query(Despesa)}
+    assert despesas["Adubo"].valor == Decimal("1234.56")
+    assert despesas["Adubo"].data_pagamento == datetime.date(2024, 3, 5)
+    assert despesas["Diesel"].pago is False
+    # Os dois nomes (sem diferenciar maiúsculas) apontam para o mesmo fornecedor
+    assert session.query(Fornecedor).count() == 1
+    assert despesas["Adubo"].fornecedor_id == despesas["Diesel"].fornecedor_id is not None
+
+
+def test_import_csv_cp1252_com_virgula(session, tmp_path):
+    path = write_csv(tmp_path / "despesas.csv", [
+        "descricao,valor,data",
+        "Ração,\"1.500,00\",01/02/2024",
+    ], encoding="cp1252")
+
+    result = import_csv(session, path, Despesa)
+
+    assert result.imported == 1 and not result.errors
+    assert session.query(Despesa.descricao).scalar() == "Ração"
+
+
+def test_import_csv_colunas_obrigatorias(session, tmp_path):
+    path = write_csv(tmp_path / "despesas.csv", ["descricao;data", "Adubo;05/03/2024"])
+    with pytest.raises(ValueError):
+        import_csv(session, path, Despesa)
+
+
+def test_import_csv_progresso_crescente(session, tmp_path):
+    lines = ["descricao;valor;data"] + [f"Despesa {i};{i + 1},00;05/03/2024" for i in range(100)]
+    path = write_csv(tmp_path / "despesas.csv", lines)
+    chamadas = []
+
+    result = import_csv(session, path, Despesa, progress=lambda p, n: chamadas.append((p, n)), batch_size=25)
+
+    assert result.imported == 100
+    percentuais = [p for p, _ in chamadas]
+    assert percentuais == sorted(percentuais) and percentuais[-1] == 100
+    assert all(0 < p < 100 for p in percentuais[:-1])
+    assert [n for _, n in chamadas] == [25, 50, 75, 100, 100]
+
+
+def test_import_csv_cancelado_nao_grava(session, tmp_path):
+    lines = ["descricao;valor;data"] + [f"Despesa {i};10,00;05/03/2024" for i in range(10)]
+    path = write_csv(tmp_path / "despesas.csv", lines)
+
+    with pytest.raises(ImportCancelled):
+        import_csv(session, path, Despesa, cancelled=lambda: True, batch_size=4)
+
+    assert session.query(Despesa).count() == 0
@@ -0,0 +1,115 @@
+"""Atribuição das consultas SQL às ações da interface."""
+import threading
+
+import pytest
+from sqlalchemy import text
+
+from database.instrumentation import NO_ACTION, QueryMonitor, action, current_action, resume
+from ui.actions import track_actions
+from ui.workers import QueryWorker
+
+
+@pytest.fixture
+def monitor(engine):
+    monitor = QueryMonitor(slow_query_ms=10_000)
+    monitor.install(engine)
+    return monitor
+
+
+def run_queries(engine, count, sql="SELECT 1"):
+    with engine.connect() as connection:
+        for _ in range(count):
+            connection.execute(text(sql))
+
+
+def test_consultas_fora_de_acao(engine, monitor):
+    run_queries(engine, 3)
+
+    summary = monitor.summaries[NO_ACTION]
+    assert summary.queries == 3
+    assert summary.executions == 0
+    assert monitor.last is None
+
+
+def test_consultas_contam_para_a_acao(engine, monitor):
+    with action("Aba.carregar") as record:
+        run_queries(engine, 2)
+    with action("Aba.carregar"):
+        run_queries(engine, 1)
+    with action("Aba.sem_consultas"):
+        pass
+
+    summary = monitor.summaries["Aba.carregar"]
+    assert (summary.executions, summary.queries) == (2, 3)
+    assert record.queries == 2
+    assert "Aba.sem_consultas" not in monitor.summaries
+    assert current_action() is None
+
+
+def test_acao_interna_fica_com_a_externa(engine, monitor):
+    with action("Dialogo.salvar") as externa:
+        with action("Aba.recarregar") as interna:
+            run_queries(engine, 2)
+
+    assert interna is externa
+    assert monitor.summaries["Dialogo.salvar"].queries == 2
+    assert "Aba.recarregar" not in monitor.summaries
+
+
+def test_instrucao_repetida_aponta_n_mais_1(engine, monitor):
+    with action("Aba.linhas"):
+        run_queries(engine, monitor.repeat_threshold)
+    assert monitor.summaries["Aba.linhas"].repeated == 0
+
+    with action("Aba.linhas"):
+        run_queries(engine, monitor.repeat_threshold * 3)
+        run_queries(engine, monitor.repeat_threshold + 1, "SELECT 2")
+
+    # Cada instrução repetida é apontada uma vez por execução, por mais que se repita
+    assert monitor.summaries["Aba.linhas"].repeated == 2
+    assert monitor.last.repeated == {"SELECT 1", "SELECT 2"}
+
+
+def test_resume_em_outra_thread(engine, monitor):
+    with action("Aba.filtrar") as record:
+        pass
+
+    def background():
+        with resume(record):
+            run_queries(engine, 2)
+        run_queries(engine, 1)
+
+    thread = threading.Thread(target=background)
+    thread.start()
+    thread.join()
+
+    assert monitor.summaries["Aba.filtrar"].queries == 2
+    assert monitor.summaries[NO_ACTION].queries == 1
+
+
+def test_worker_retoma_a_acao_que_o_agendou(qapp, engine, monitor):
+    with action("Aba.buscar"):
+        worker = QueryWorker(1, run_queries, engine, 2)
+
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    thread.join()
+
+    assert monitor.summaries["Aba.buscar"].queries == 2
+    assert NO_ACTION not in monitor.summaries
+
+
+def test_track_actions_nomeia_pela_classe_e_metodo(engine, monitor):
+    @track_actions
+    class Aba:
+        def carregar(self, checked=False):
+            run_queries(engine, 1)
+            return current_action().name
+
+        def _interno(self):
+            return current_action()
+
+    aba = Aba()
+    assert aba.carregar(True, "excedente") == "Aba.carregar"
+    assert aba._interno() is None
+    assert monitor.summaries["Aba.carregar"].queries == 1
@@ -0,0 +1,123 @@
+"""Atualização de um banco criado pela primeira versão do aplicativo até a versão atual."""
+import pytest
+from sqlalchemy import inspect, text
+
+import database.db as db
+from database.migrations import head_version, run_migrations
+from database.models import Base
+
+# Esquema criado pela primeira versão dos modelos, antes de qualquer migração
+BASELINE_SCHEMA = [
+    """CREATE TABLE despesa (
+        id INTEGER PRIMARY KEY, descricao VARCHAR(200) NOT NULL, valor NUMERIC(10, 2) NOT NULL,
+        data DATE, categoria VARCHAR(100), forma_pagamento VARCHAR(100), pago BOOLEAN, observacoes TEXT,
+        fornecedor VARCHAR(200), data_retirada DATE, data_pagamento DATE, usuario_adicionou VARCHAR(100),
+        data_adicionou DATE, produto_retirado BOOLEAN)""",
+    """CREATE TABLE entrada (
+        id INTEGER PRIMARY KEY, descricao VARCHAR(200) NOT NULL, valor NUMERIC(10, 2) NOT NULL,
+        data DATE, categoria VARCHAR(100), cliente VARCHAR(100), recebido BOOLEAN, observacoes TEXT)""",
+    """CREATE TABLE fornecedor (
+        id INTEGER PRIMARY KEY, nome VARCHAR(200) NOT NULL UNIQUE, telefone VARCHAR(20), email VARCHAR(100),
+        endereco VARCHAR(200), cnpj VARCHAR(20), observacoes TEXT, data_cadastro DATE)""",
+    """CREATE TABLE funcionario (
+        id INTEGER PRIMARY KEY, nome VARCHAR(100) NOT NULL, cpf VARCHAR(14) UNIQUE, cargo VARCHAR(100),
+        data_contratacao DATE, salario NUMERIC(10, 2), ativo BOOLEAN, telefone VARCHAR(20), endereco VARCHAR(200))""",
+    """CREATE TABLE maquinario (
+        id INTEGER PRIMARY KEY, nome VARCHAR(100) NOT NULL, modelo VARCHAR(100), ano INTEGER,
+        valor_aquisicao NUMERIC(10, 2), data_aquisicao DATE, status VARCHAR(50), observacoes TEXT)""",
+    """CREATE TABLE producao (
+        id INTEGER PRIMARY KEY, produto VARCHAR(100) NOT NULL, quantidade FLOAT NOT NULL, unidade VARCHAR(20),
+        data_inicio DATE, data_fim DATE, area FLOAT, custo_total NUMERIC(10, 2), valor_venda NUMERIC(10, 2),
+        observacoes TEXT)""",
+    """CREATE TABLE manutencao (
+        id INTEGER PRIMARY KEY, maquinario_id INTEGER REFERENCES maquinario(id), data DATE,
+        descricao TEXT NOT NULL, custo NUMERIC(10, 2), responsavel VARCHAR(100))""",
+    """CREATE TABLE pagamento (
+        id INTEGER PRIMARY KEY, funcionario_id INTEGER REFERENCES funcionario(id), data DATE,
+        valor NUMERIC(10, 2) NOT NULL, tipo VARCHAR(50), observacoes TEXT)""",
+]
+
+BASELINE_DATA = [
+    "INSERT INTO fornecedor (id, nome, data_cadastro) VALUES (1, 'Agropecuária São José', '2023-01-10')",
+    "INSERT INTO despesa (descricao, valor, data, fornecedor) VALUES ('Adubo', 100, '2024-01-05', 'Agropecuária São José')",
+    "INSERT INTO despesa (descricao, valor, data, fornecedor) VALUES ('Sementes', 50, '2024-01-06', 'AGROPECUARIA SAO JOSE')",
+    "INSERT INTO despesa (descricao, valor, data, fornecedor) VALUES ('Diesel', 300, '2024-01-07', 'Posto Central')",
+    "INSERT INTO despesa (descricao, valor, data) VALUES ('Avulsa', 10, '2024-01-08')",
+    "INSERT INTO entrada (descricao, valor, data, cliente) VALUES ('Venda de milho', 1000, '2024-02-01', 'Cooperativa')",
+    "INSERT INTO entrada (descricao, valor, data, cliente) VALUES ('Venda de soja', 2000, '2024-02-02', 'cooperativa')",
+    "INSERT INTO maquinario (id, nome) VALUES (1, 'Trator')",
+    "INSERT INTO manutencao (maquinario_id, data, descricao, custo) VALUES (1, '2024-01-15', 'Troca de óleo', 200)",
+]
+
+
+@pytest.fixture
+def baseline_engine(tmp_path):
+    engine = db.create_engine_for(f"sqlite:///{tmp_path / 'antigo.db'}")
+    with engine.begin() as connection:
+        for sql in BASELINE_SCHEMA + BASELINE_DATA:
+            connection.execute(text(sql))
+    yield engine
+    engine.dispose()
+
+
+def upgrade(engine):
+    """Inicialização do aplicativo: cria as tabelas que faltam e aplica as migrações."""
+    Base.metadata.create_all(engine)
+    run_migrations(engine)
+
+
+def versions(connection):
+    return [row[0] for row in connection.execute(text("SELECT version FROM schema_version ORDER BY version"))]
+
+
+def test_atualiza_esquema_antigo(baseline_engine):
+    upgrade(baseline_engine)
+
+    inspector = inspect(baseline_engine)
+    assert {"data_registro", "fornecedor_id", "updated_at"} <= {c["name"] for c in inspector.get_columns("despesa")}
+    assert {"forma_pagamento", "cliente_id", "updated_at"} <= {c["name"] for c in inspector.get_columns("entrada")}
+    assert "nome_busca" in {c["name"] for c in inspector.get_columns("fornecedor")}
+    assert "updated_at" in {c["name"] for c in inspector.get_columns("manutencao")}
+
+    with baseline_engine.connect() as connection:
+        assert versions(connection) == list(range(1, head_version() + 1))
+        despesas = dict(connection.execute(text("SELECT descricao, fornecedor_id FROM despesa")).all())
+        entradas = dict(connection.execute(text("SELECT descricao, cliente_id FROM entrada")).all())
+        fornecedores = dict(connection.execute(text("SELECT nome, id FROM fornecedor")).all())
+        clientes = connection.execute(text("SELECT id FROM cliente")).scalars().all()
+
+    # O nome com outra grafia aponta para o fornecedor existente; o desconhecido vira cadastro novo
+    assert despesas["Adubo"] == despesas["Sementes"] == 1
+    assert despesas["Diesel"] == fornecedores["Posto Central"]
+    assert despesas["Avulsa"] is None
+    assert len(fornecedores) == 2
+    assert len(clientes) == 1
+    assert entradas["Venda de milho"] == entradas["Venda de soja"] == clientes[0]
+
+
+def test_executar_de_novo_nao_altera_nada(baseline_engine):
+    upgrade(baseline_engine)
+    with baseline_engine.connect() as connection:
+        antes = {table: connection.execute(text(f"SELECT * FROM {table} ORDER BY id")).all()
+                 for table in ("despesa", "entrada", "fornecedor", "cliente")}
+
+    upgrade(baseline_engine)
+
+    with baseline_engine.connect() as connection:
+        assert versions(connection) == list(range(1, head_version() + 1))
+        for table, rows in antes.items():
+            assert connection.execute(text(f"SELECT * FROM {table} ORDER BY id")).all() == rows
+
+
+def test_migracoes_reaplicadas_sao_idempotentes(baseline_engine):
+    """Uma migração interrompida antes de ser registrada roda de novo sem falhar nem duplicar dados."""
+    upgrade(baseline_engine)
+    with baseline_engine.begin() as connection:
+        connection.execute(text("DELETE FROM schema_version WHERE version >= 7"))
+
+    upgrade(baseline_engine)
+
+    with baseline_engine.connect() as connection:
+        assert versions(connection) == list(range(1, head_version() + 1))
+        assert connection.execute(text("SELECT COUNT(*) FROM fornecedor")).scalar() == 2
+        assert connection.execute(text("SELECT COUNT(*) FROM cliente")).scalar() == 1
@@ -0,0 +1,77 @@
+"""Folha de pagamento: prévia, gravação e a proteção contra pagar o salário duas vezes."""
+import datetime
+from decimal import Decimal
+
+import pytest
+
+from database.models import Despesa, Funcionario, Pagamento
+from database.payroll import ADIANTAMENTO, BONUS, SALARIO, preview_payroll, run_payroll
+
+MARCO = datetime.date(2024, 3, 1)
+
+
+@pytest.fixture
+def funcionarios(session):
+    ana = Funcionario(nome="Ana", salario=Decimal("3000.00"), ativo=True)
+    bruno = Funcionario(nome="Bruno", salario=Decimal("2000.00"), ativo=True)
+    inativo = Funcionario(nome="Carlos", salario=Decimal("1500.00"), ativo=False)
+    session.add_all([ana, bruno, inativo])
+    session.flush()
+    session.add(Pagamento(funcionario_id=bruno.id, data=datetime.date(2024, 3, 10), valor=500, tipo=ADIANTAMENTO))
+    session.commit()
+    return ana, bruno
+
+
+def test_previa_desconta_adiantamentos(session, funcionarios):
+    preview = preview_payroll(session, MARCO, bonus_percentual=10)
+
+    assert [linha.nome for linha in preview.linhas] == ["Ana", "Bruno"]
+    ana, bruno = preview.linhas
+    assert bruno.saldo_salario == Decimal("1500.00")
+    assert ana.bonus == Decimal("300.00")
+    assert preview.total == Decimal("5000.00")
+    assert preview.ja_pagos == []
+
+
+def test_grava_pagamentos_e_despesa(session, funcionarios):
+    preview = preview_payroll(session, MARCO, bonus_percentual=10)
+
+    assert run_payroll(session, preview, datetime.date(2024, 3, 30), lancar_despesa=True) == 4
+    session.commit()
+
+    tipos = sorted(tipo for (tipo,) in session.query(Pagamento.tipo).filter(Pagamento.tipo != ADIANTAMENTO))
+    assert tipos == sorted([SALARIO, SALARIO, BONUS, BONUS])
+    assert session.query(Despesa.valor).filter(Despesa.categoria == "Salários").scalar() == Decimal("5000.00")
+
+
+def test_previa_seguinte_lista_quem_ja_recebeu(session, funcionarios):
+    run_payroll(session, preview_payroll(session, MARCO), datetime.date(2024, 3, 30))
+    session.commit()
+
+    preview = preview_payroll(session, MARCO)
+
+    assert preview.linhas == []
+    assert preview.ja_pagos == ["Ana", "Bruno"]
+
+
+def test_recusa_salario_repetido(session, funcionarios):
+    """Duas prévias do mesmo mês: a segunda a ser gravada é recusada por inteiro."""
+    primeira = preview_payroll(session, MARCO)
+    segunda = preview_payroll(session, MARCO)
+    run_payroll(session, primeira, datetime.date(2024, 3, 30))
+    session.commit()
+
+    with pytest.raises(ValueError, match="já receberam o salário"):
+        run_payroll(session, segunda, datetime.date(2024, 3, 31))
+    session.rollback()
+
+    assert session.query(Pagamento).filter(Pagamento.tipo == SALARIO).count() == 2
+
+
+def test_recusa_data_fora_do_mes(session, funcionarios):
+    preview = preview_payroll(session, MARCO)
+
+    with pytest.raises(ValueError):
+        run_payroll(session, preview, datetime.date(2024, 4, 1))
+
+    assert session.query(Pagamento).filter(Pagamento.tipo == SALARIO).count() == 0
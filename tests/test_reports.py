@@ -0,0 +1,69 @@
+"""Consultas de relatório usadas pelas abas."""
+import datetime
+from decimal import Decimal
+
+import pytest
+from PyQt5.QtCore import Qt
+from sqlalchemy import select
+
+from database.models import Maquinario, Manutencao
+from database.reports import manutencao_por_maquinario, month_range
+from ui.table_model import LazyTableModel, TableColumn
+
+
+@pytest.fixture
+def maquinarios(session):
+    trator = Maquinario(nome="Trator")
+    colheitadeira = Maquinario(nome="Colheitadeira")
+    pulverizador = Maquinario(nome="Pulverizador")
+    session.add_all([trator, colheitadeira, pulverizador])
+    session.flush()
+    session.add_all([
+        Manutencao(maquinario_id=trator.id, data=datetime.date(2024, 1, 10), descricao="Óleo", custo=100),
+        Manutencao(maquinario_id=trator.id, data=datetime.date(2024, 3, 5), descricao="Pneus", custo=900),
+        Manutencao(maquinario_id=colheitadeira.id, data=datetime.date(2024, 2, 1), descricao="Correia", custo=300),
+    ])
+    session.commit()
+    return trator.id, colheitadeira.id, pulverizador.id
+
+
+def test_manutencao_por_maquinario(session, maquinarios):
+    manutencoes = manutencao_por_maquinario()
+    rows = session.execute(
+        select(Maquinario.nome, manutencoes.c.custo_total, manutencoes.c.ultima_manutencao)
+        .select_from(Maquinario.__table__.outerjoin(manutencoes, manutencoes.c.maquinario_id == Maquinario.id))
+        .order_by(Maquinario.id)
+    ).all()
+
+    assert rows == [
+        ("Trator", Decimal("1000.00"), datetime.date(2024, 3, 5)),
+        ("Colheitadeira", Decimal("300.00"), datetime.date(2024, 2, 1)),
+        ("Pulverizador", None, None),
+    ]
+
+
+def test_lista_de_maquinarios_ordenada_pelo_custo(qapp, monkeypatch, maquinarios):
+    trator, colheitadeira, pulverizador = maquinarios
+    manutencoes = manutencao_por_maquinario()
+    model = LazyTableModel(Maquinario, [
+        TableColumn("Nome", Maquinario.nome),
+        TableColumn("Custo Manutenção (R$)", manutencoes.c.custo_total),
+    ], chunk_size=1, from_clause=Maquinario.__table__.outerjoin(manutencoes, manutencoes.c.maquinario_id == Maquinario.id))
+    monkeypatch.setattr(model, "fetchMore", lambda parent=None: None)
+    model.sort(1, Qt.DescendingOrder)
+
+    while not model._exhausted:
+        last_row = model._rows[-1] if model._rows else None
+        model._append_rows(model.fetch_chunk(model.build_query(last_row)))
+
+    assert [model.row_id(row) for row in range(model.rowCount())] == [trator, colheitadeira, pulverizador]
+
+
+@pytest.mark.parametrize("mes, expected", [
+    (datetime.date(2024, 2, 15), (datetime.date(2024, 2, 1), datetime.date(2024, 2, 29))),
+    (datetime.date(2023, 2, 1), (datetime.date(2023, 2, 1), datetime.date(2023, 2, 28))),
+    (datetime.date(2024, 12, 31), (datetime.date(2024, 12, 1), datetime.date(2024, 12, 31))),
+    (datetime.date(2024, 1, 31), (datetime.date(2024, 1, 1), datetime.date(2024, 1, 31))),
+])
+def test_month_range(mes, expected):
+    assert month_range(mes) == expected
@@ -0,0 +1,254 @@
+"""Sincronização da réplica local com o banco central.
+
+O servidor central é emulado em SQLite: o change_log e o sync_insert_map,
+que as migrações só criam no PostgreSQL, são criados aqui, com gatilhos
+por registro no lugar dos gatilhos por instrução do PostgreSQL.
+"""
+import datetime
+
+import pytest
+from sqlalchemy import select, text, update
+from sqlalchemy.orm import Session
+
+import database.db as db
+from database.migrations import CHANGE_LOG_PRUNE_INTERVAL, run_migrations
+from database.models import Base, Despesa, Fornecedor, Funcionario, utcnow
+from database.sync import (
+    LOCAL_ID_BASE, SYNCED_TABLES, SyncEngine, configure_replica_metadata, local_wins, prepare_replica,
+    sync_discarded, sync_outbox,
+)
+
+AGORA = datetime.datetime(2024, 3, 1, 12, 0, 0)
+ANTES = AGORA - datetime.timedelta(minutes=5)
+DEPOIS = AGORA + datetime.timedelta(minutes=5)
+
+
+@pytest.mark.parametrize("local, remote, base, expected", [
+    (ANTES, AGORA, AGORA, True),     # O servidor não mudou desde a base: sem conflito
+    (DEPOIS, AGORA, ANTES, True),    # Conflito, local mais recente
+    (ANTES, AGORA, ANTES, False),    # Conflito, servidor mais recente
+    (AGORA, AGORA, ANTES, False),    # Empate: vence o servidor
+    (AGORA, AGORA, None, False),     # Sem base (criado na réplica): empate também é do servidor
+    (AGORA, None, None, True),       # Servidor sem updated_at
+    (None, AGORA, ANTES, False),
+    (None, None, None, False),
+])
+def test_local_wins(local, remote, base, expected):
+    assert local_wins({"updated_at": local}, {"updated_at": remote}, base) is expected
+
+
+def create_central_change_log(engine):
+    with engine.begin() as connection:
+        connection.execute(text(
+            "CREATE TABLE change_log (id INTEGER PRIMARY KEY AUTOINCREMENT, table_name VARCHAR(50), "
+            "row_id INTEGER, operation VARCHAR(1), changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+        ))
+        connection.execute(text(
+            "CREATE TABLE sync_insert_map (client_id VARCHAR(36) NOT NULL, table_name VARCHAR(50) NOT NULL, "
+            "local_id INTEGER NOT NULL, central_id INTEGER NOT NULL, PRIMARY KEY (client_id, table_name, local_id))"
+        ))
+        for table in SYNCED_TABLES:
+            for event_name, row in (("INSERT", "NEW"), ("UPDATE", "NEW"), ("DELETE", "OLD")):
+                connection.execute(text(
+                    f"CREATE TRIGGER {table.name}_log_{event_name.lower()} AFTER {event_name} ON {table.name} "
+                    f"BEGIN INSERT INTO change_log (table_name, row_id, operation) "
+                    f"VALUES ('{table.name}', {row}.id, '{event_name[0]}'); END"
+                ))
+
+
+@pytest.fixture
+def central(tmp_path):
+    engine = db.create_engine_for(f"sqlite:///{tmp_path / 'central.db'}")
+    Base.metadata.create_all(engine)
+    run_migrations(engine)
+    create_central_change_log(engine)
+    with Session(engine) as session:
+        session.add_all([
+            Fornecedor(nome="Agro X"),
+            Funcionario(nome="Ana", cpf="111", salario=1000),
+        ] + [
+            Despesa(descricao=f"Despesa {i}", valor=i + 1, data=datetime.date(2024, 1, 1)) for i in range(5)
+        ])
+        session.commit()
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def replica(tmp_path):
+    configure_replica_metadata(Base.metadata)
+    try:
+        engine = db.create_engine_for(f"sqlite:///{tmp_path / 'replica.db'}")
+        Base.metadata.create_all(engine)
+    finally:
+        # Os demais testes criam as tabelas sem AUTOINCREMENT
+        for table in Base.metadata.sorted_tables:
+            table.dialect_options["sqlite"]["autoincrement"] = False
+    run_migrations(engine)
+    prepare_replica(engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sync(central, replica):
+    events = []
+    engine = SyncEngine(replica, central, lambda *change: events.append(change))
+    engine.events = events
+    engine.sync_once()
+    engine.flush_notifications()
+    return engine
+
+
+def rows(engine, sql):
+    with engine.connect() as connection:
+        return connection.execute(text(sql)).all()
+
+
+def run_cycle(sync):
+    sync.events.clear()
+    sync.sync_once()
+    sync.flush_notifications()
+    return sync.events
+
+
+def test_copia_inicial(sync, central, replica):
+    assert rows(replica, "SELECT id, valor FROM despesa ORDER BY id") == rows(central, "SELECT id, valor FROM despesa ORDER BY id")
+    assert ("despesa", "U", 1) in sync.events
+    assert run_cycle(sync) == []
+
+
+def test_envia_alteracao_local_e_traz_a_remota(sync, central, replica):
+    with Session(replica) as session:
+        session.get(Despesa, 1).valor = 111
+        session.commit()
+    with central.begin() as connection:
+        connection.execute(update(Despesa.__table__).where(Despesa.id == 2).values(valor=222, updated_at=utcnow()))
+
+    events = run_cycle(sync)
+
+    assert rows(central, "SELECT valor FROM despesa WHERE id = 1")[0][0] == 111
+    assert rows(replica, "SELECT valor FROM despesa WHERE id = 2")[0][0] == 222
+    assert ("despesa", "U", 2) in events
+    assert rows(replica, "SELECT COUNT(*) FROM sync_outbox")[0][0] == 0
+    # O eco da própria alteração não volta como evento nem como conflito
+    assert ("despesa", "U", 1) not in events
+    assert rows(replica, "SELECT COUNT(*) FROM sync_discarded")[0][0] == 0
+
+
+def test_conflito_servidor_mais_recente_vence(sync, central, replica):
+    with Session(replica) as session:
+        session.get(Despesa, 3).valor = 333
+        session.commit()
+    with central.begin() as connection:
+        connection.execute(update(Despesa.__table__).where(Despesa.id == 3).values(
+            valor=3000, updated_at=utcnow() + datetime.timedelta(minutes=1)
+        ))
+
+    run_cycle(sync)
+
+    assert rows(replica, "SELECT valor FROM despesa WHERE id = 3")[0][0] == 3000
+    assert rows(central, "SELECT valor FROM despesa WHERE id = 3")[0][0] == 3000
+    with replica.connect() as connection:
+        descartado = connection.execute(select(sync_discarded)).one()
+    assert (descartado.table_name, descartado.row_id) == ("despesa", 3)
+    assert '"valor": "333.00"' in descartado.data
+
+
+def test_exclusao_no_servidor_vence_alteracao_local(sync, central, replica):
+    with Session(replica) as session:
+        session.get(Despesa, 4).valor = 444
+        session.commit()
+    with central.begin() as connection:
+        connection.execute(text("DELETE FROM despesa WHERE id = 4"))
+
+    events = run_cycle(sync)
+
+    assert rows(replica, "SELECT id FROM despesa WHERE id = 4") == []
+    assert ("despesa", "D", 4) in events
+    assert rows(replica, "SELECT reason FROM sync_discarded")[0][0] == "registro excluído no servidor"
+
+
+def test_registro_local_recebe_o_id_do_servidor(sync, central, replica):
+    with central.begin() as connection:
+        connection.execute(text("INSERT INTO fornecedor (nome, nome_busca) VALUES ('Agro Y', 'agro y')"))
+    with Session(replica) as session:
+        unificado = Fornecedor(nome="Agro Y", telefone="123")  # Criado também no servidor
+        novo = Fornecedor(nome="Agro Z")
+        session.add_all([unificado, novo])
+        session.flush()
+        assert novo.id >= LOCAL_ID_BASE
+        session.add(Despesa(descricao="Local", valor=10, data=datetime.date(2024, 2, 1), fornecedor_id=novo.id))
+        session.commit()
+
+    run_cycle(sync)
+
+    fornecedores = dict(rows(central, "SELECT nome, id FROM fornecedor"))
+    assert sorted(fornecedores) == ["Agro X", "Agro Y", "Agro Z"]
+    assert dict(rows(replica, "SELECT nome, id FROM fornecedor")) == fornecedores
+    assert rows(central, "SELECT telefone FROM fornecedor WHERE nome = 'Agro Y'")[0][0] == "123"
+    # A referência da despesa acompanha o novo id do fornecedor, nos dois bancos
+    for engine in (central, replica):
+        assert rows(engine, "SELECT fornecedor_id FROM despesa WHERE descricao = 'Local'")[0][0] == fornecedores["Agro Z"]
+    assert rows(replica, f"SELECT COUNT(*) FROM despesa WHERE id >= {LOCAL_ID_BASE}")[0][0] == 0
+
+    # Um novo ciclo não duplica nada
+    run_cycle(sync)
+    assert rows(central, "SELECT COUNT(*) FROM fornecedor")[0][0] == 3
+    assert rows(central, "SELECT COUNT(*) FROM despesa WHERE descricao = 'Local'")[0][0] == 1
+
+
+def test_confirmacao_fora_de_ordem_e_relida(sync, central, replica):
+    """Uma entrada do change_log com id menor que o cursor, confirmada depois, é aplicada no ciclo seguinte."""
+    with central.begin() as connection:
+        connection.execute(update(Despesa.__table__).where(Despesa.id == 5).values(valor=5555))
+        atrasada = connection.execute(text("SELECT MAX(id) FROM change_log")).scalar()
+        connection.execute(text("DELETE FROM change_log WHERE id = :id"), {"id": atrasada})
+        connection.execute(update(Despesa.__table__).where(Despesa.id == 1).values(valor=1111))
+    run_cycle(sync)
+    assert rows(replica, "SELECT valor FROM despesa WHERE id IN (1, 5) ORDER BY id") == [(1111,), (5,)]
+
+    with central.begin() as connection:
+        connection.execute(
+            text("INSERT INTO change_log (id, table_name, row_id, operation) VALUES (:id, 'despesa', 5, 'U')"),
+            {"id": atrasada}
+        )
+    events = run_cycle(sync)
+
+    assert rows(replica, "SELECT valor FROM despesa WHERE id = 5")[0][0] == 5555
+    assert events == [("despesa", "U", 5)]
+    assert run_cycle(sync) == []
+
+
+def test_registro_recusado_nao_impede_o_restante_do_lote(sync, central, replica):
+    with central.begin() as connection:
+        connection.execute(text("INSERT INTO funcionario (nome, cpf, salario) VALUES ('Bruno', '222', 1000)"))
+    with Session(replica) as session:
+        session.query(Funcionario).filter_by(nome="Ana").one().cpf = "222"  # Já usado no servidor
+        session.get(Despesa, 1).valor = 777
+        session.commit()
+
+    run_cycle(sync)
+
+    assert rows(central, "SELECT valor FROM despesa WHERE id = 1")[0][0] == 777
+    assert rows(central, "SELECT cpf FROM funcionario WHERE nome = 'Ana'")[0][0] == "111"
+    assert rows(replica, "SELECT cpf FROM funcionario WHERE nome = 'Ana'")[0][0] == "111"
+    with replica.connect() as connection:
+        assert connection.execute(select(sync_outbox)).all() == []
+        descartado = connection.execute(select(sync_discarded)).one()
+    assert descartado.table_name == "funcionario"
+    assert descartado.reason.startswith("recusada pelo servidor")
+
+
+def test_limpa_o_change_log_do_servidor_periodicamente(sync, central, monkeypatch):
+    """No modo réplica nenhum ChangeListener roda no servidor: a limpeza fica com a sincronização."""
+    limpezas = []
+    monkeypatch.setattr("database.sync.prune_change_log", limpezas.append)
+
+    run_cycle(sync)
+    assert limpezas == []  # Já limpo pelas migrações no primeiro ciclo
+
+    sync._pruned_at -= CHANGE_LOG_PRUNE_INTERVAL
+    run_cycle(sync)
+    run_cycle(sync)
+    assert limpezas == [central]
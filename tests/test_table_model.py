@@ -0,0 +1,78 @@
+"""Paginação por chave do LazyTableModel, inclusive a fase das linhas sem valor na coluna ordenada."""
+import datetime
+
+import pytest
+from PyQt5.QtCore import Qt
+
+from database.models import Despesa
+from ui.table_model import LazyTableModel, TableColumn
+
+PAGAMENTOS = [
+    datetime.date(2024, 3, 1), None, datetime.date(2024, 1, 1), datetime.date(2024, 3, 1),
+    None, datetime.date(2024, 2, 1), None, datetime.date(2024, 1, 1),
+]
+
+
+@pytest.fixture
+def despesas(session):
+    for i, data_pagamento in enumerate(PAGAMENTOS):
+        session.add(Despesa(
+            descricao=f"Despesa {i}", valor=i + 1, data=datetime.date(2024, 1, 1), data_pagamento=data_pagamento
+        ))
+    session.commit()
+    return {despesa.id: despesa.data_pagamento for despesa in session.query(Despesa)}
+
+
+def make_model(qapp, monkeypatch, chunk_size):
+    model = LazyTableModel(Despesa, [
+        TableColumn("Descrição", Despesa.descricao),
+        TableColumn("Pagamento", Despesa.data_pagamento),
+        TableColumn("Ações"),
+    ], chunk_size=chunk_size)
+    # Os blocos são lidos pelo próprio teste, sem o QThreadPool
+    monkeypatch.setattr(model, "fetchMore", lambda parent=None: None)
+    return model
+
+
+def load_all(model):
+    """Lê todos os blocos, como a view faria rolando até o fim; retorna os ids na ordem exibida."""
+    while not model._exhausted:
+        last_row = model._rows[-1] if model._rows else None
+        model._append_rows(model.fetch_chunk(model.build_query(last_row)))
+    return [model.row_id(row) for row in range(model.rowCount())]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 100])
+def test_ordem_crescente_com_nulos_por_ultimo(qapp, monkeypatch, despesas, chunk_size):
+    model = make_model(qapp, monkeypatch, chunk_size)
+    model.sort(1, Qt.AscendingOrder)
+
+    com_valor = sorted((data, id) for id, data in despesas.items() if data is not None)
+    sem_valor = sorted(id for id, data in despesas.items() if data is None)
+    assert load_all(model) == [id for _, id in com_valor] + sem_valor
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 100])
+def test_ordem_decrescente_com_nulos_por_ultimo(qapp, monkeypatch, despesas, chunk_size):
+    model = make_model(qapp, monkeypatch, chunk_size)
+    model.sort(1, Qt.DescendingOrder)
+
+    com_valor = sorted(((data, id) for id, data in despesas.items() if data is not None), reverse=True)
+    sem_valor = sorted((id for id, data in despesas.items() if data is None), reverse=True)
+    assert load_all(model) == [id for _, id in com_valor] + sem_valor
+
+
+def test_sem_ordenacao_pagina_pelo_id(qapp, monkeypatch, despesas):
+    model = make_model(qapp, monkeypatch, chunk_size=3)
+    model.refresh()
+    assert load_all(model) == sorted(despesas)
+
+
+def test_filtros_valem_nas_duas_fases(qapp, monkeypatch, despesas):
+    model = make_model(qapp, monkeypatch, chunk_size=2)
+    model.sort(1, Qt.AscendingOrder)
+    model.set_filters([Despesa.valor > 3])
+
+    ids = load_all(model)
+    assert sorted(ids) == [id for id in sorted(despesas) if id > 3]
+    assert [despesas[id] is None for id in ids] == sorted(despesas[id] is None for id in ids)
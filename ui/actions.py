@@ -0,0 +1,45 @@
+import functools
+import inspect
+
+from database.instrumentation import action
+
+
+def _positional_limit(fn):
+    """Quantos argumentos posicionais fn aceita além de self (None se aceitar *args)."""
+    limit = 0
+    for parameter in list(inspect.signature(fn).parameters.values())[1:]:
+        if parameter.kind == inspect.Parameter.VAR_POSITIONAL:
+            return None
+        if parameter.kind in (inspect.Parameter.POSITIONAL_ONLY, inspect.Parameter.POSITIONAL_OR_KEYWORD):
+            limit += 1
+    return limit
+
+
+def ui_action(fn, name=None):
+    """Executa o método como uma ação da interface chamada "Classe.método".
+
+    Como nos slots do PyQt, os argumentos posicionais excedentes de um sinal
+    (ex.: o checked de clicked) são descartados.
+    """
+    name = name or fn.__qualname__
+    limit = _positional_limit(fn)
+
+    @functools.wraps(fn)
+    def wrapper(self, *args, **kwargs):
+        if limit is not None:
+            args = args[:limit]
+        with action(name):
+            return fn(self, *args, **kwargs)
+    return wrapper
+
+
+def track_actions(cls):
+    """Decorador de classe: cada método público da classe passa a ser uma ação (ver ui_action).
+
+    Usado nas abas e diálogos, para que as consultas ao banco sejam
+    atribuídas ao botão, filtro ou diálogo que as disparou.
+    """
+    for attr, value in list(vars(cls).items()):
+        if not attr.startswith("_") and inspect.isfunction(value):
+            setattr(cls, attr, ui_action(value, f"{cls.__name__}.{attr}"))
+    return cls
@@ -0,0 +1,50 @@
+import logging
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from database import create_change_listener
+from database.sync import SyncEngine
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeNotifier(QObject):
+    """Entrega à interface as alterações feitas no banco por outros terminais.
+
+    O ChangeListener roda em uma thread própria; o sinal changed é entregue
+    na thread da interface, já que este objeto pertence a ela.
+    """
+
+    changed = pyqtSignal(str, str, int)  # (tabela, operação I/U/D ou R para recarregar, id)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.listener = None
+
+    def start(self):
+        """Inicia a escuta, se o banco suportar notificações."""
+        if self.listener is not None:
+            return
+        self.listener = create_change_listener(self.changed.emit)
+        if self.listener is None:
+            logger.info("Banco sem suporte a notificações; use 'Atualizar Lista' para recarregar.")
+            return
+        self.listener.start()
+
+    def stop(self):
+        """Encerra a escuta e aguarda a conexão ser liberada."""
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener.join(timeout=2)
+            self.listener = None
+
+    def sync_status(self):
+        """Situação da sincronização da réplica local (None fora do modo réplica)."""
+        if isinstance(self.listener, SyncEngine):
+            return self.listener.describe()
+        return None
+
+    def sync_now(self):
+        """Antecipa a sincronização da réplica local."""
+        if isinstance(self.listener, SyncEngine):
+            self.listener.request_sync()
@@ -0,0 +1,129 @@
+import threading
+from collections import OrderedDict
+
+from PyQt5.QtWidgets import QCompleter
+from PyQt5.QtCore import Qt, QStringListModel, QTimer
+from sqlalchemy import select
+
+from database import session_scope, Fornecedor, Cliente
+from database.models import search_key
+from .filter_bar import escape_like
+from .workers import BackgroundLoader
+
+
+class PrefixSearch:
+    """Busca nomes por prefixo no banco, guardando os resultados recentes.
+
+    A consulta usa a coluna normalizada (minúscula e sem acentos, ver
+    search_key), que tem índice próprio para LIKE 'prefixo%'. Quando um
+    prefixo mais curto já trouxe a lista completa (menos que limit nomes),
+    os prefixos mais longos são filtrados dela sem ir ao banco.
+    """
+
+    def __init__(self, value_column, key_column, limit=50, cache_size=64):
+        self.value_column = value_column
+        self.key_column = key_column
+        self.limit = limit
+        self.cache_size = cache_size
+        self._cache = OrderedDict()  # prefixo -> [(chave, nome)]
+        self._lock = threading.Lock()  # As buscas rodam no QThreadPool
+
+    def search(self, text):
+        """Retorna até limit nomes que começam com text (sem acento/maiúscula)."""
+        prefix = search_key(text)
+        if not prefix:
+            return []
+
+        rows = self._cached(prefix)
+        if rows is None:
+            with session_scope() as session:
+                rows = [
+                    (search_key(nome), nome) for nome in session.scalars(
+                        select(self.value_column)
+                        .where(self.condition(prefix))
+                        .order_by(self.key_column)
+                        .limit(self.limit)
+                    )
+                ]
+            self._store(prefix, rows)
+        return [nome for key, nome in rows if key.startswith(prefix)]
+
+    def condition(self, text):
+        """Condição WHERE dos registros cujo nome começa com text."""
+        return self.key_column.like(f"{escape_like(search_key(text))}%", escape="\\")
+
+    def _cached(self, prefix):
+        with self._lock:
+            if prefix in self._cache:
+                self._cache.move_to_end(prefix)
+                return self._cache[prefix]
+            # Um prefixo mais curto com a lista completa já contém a resposta
+            for length in range(len(prefix) - 1, 0, -1):
+                rows = self._cache.get(prefix[:length])
+                if rows is not None and len(rows) < self.limit:
+                    return rows
+        return None
+
+    def _store(self, prefix, rows):
+        with self._lock:
+            self._cache[prefix] = rows
+            self._cache.move_to_end(prefix)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def invalidate(self):
+        """Descarta os resultados guardados (chamar após cadastrar ou renomear)."""
+        with self._lock:
+            self._cache.clear()
+
+
+class SearchCompleter(QCompleter):
+    """QCompleter que consulta o banco por prefixo enquanto o usuário digita.
+
+    As buscas rodam em segundo plano, após uma pausa na digitação; somente
+    o resultado da última busca é exibido.
+    """
+
+    DEBOUNCE_MS = 200
+
+    def __init__(self, line_edit, search):
+        super().__init__(line_edit)
+        self.line_edit = line_edit
+        self.search = search
+        self.model = QStringListModel(self)
+        self.setModel(self.model)
+        self.setCaseSensitivity(Qt.CaseInsensitive)
+        # O banco já filtrou (ignorando acentos); o QCompleter não deve filtrar de novo
+        self.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        line_edit.setCompleter(self)
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE_MS)
+        self.timer.timeout.connect(self.run_search)
+
+        self.loader = BackgroundLoader(self)
+        self.loader.loaded.connect(self.show_results)
+
+        line_edit.textEdited.connect(self.schedule)
+
+    def schedule(self, *args):
+        self.timer.start()
+
+    def run_search(self):
+        self.loader.submit(self.search.search, self.line_edit.text())
+
+    def show_results(self, names):
+        current = self.line_edit.text().strip()
+        if names == [current]:
+            names = []  # Nada a completar além do que já foi digitado
+        self.model.setStringList(names)
+        if names and self.line_edit.hasFocus():
+            self.complete()
+        else:
+            self.popup().hide()
+
+
+# Buscas compartilhadas por todos os diálogos, para que o cache valha entre eles
+fornecedor_search = PrefixSearch(Fornecedor.nome, Fornecedor.nome_busca)
+cliente_search = PrefixSearch(Cliente.nome, Cliente.nome_busca)
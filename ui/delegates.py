@@ -0,0 +1,89 @@
+from PyQt5.QtWidgets import QApplication, QStyle, QStyledItemDelegate, QStyleOptionButton
+from PyQt5.QtCore import Qt, QEvent, QRect, QSize
+from PyQt5.QtGui import QFont, QFontMetrics
+
+
+class ActionButtonDelegate(QStyledItemDelegate):
+    """Desenha os botões da coluna Ações sem criar um widget por linha.
+
+    Recebe um dicionário {rótulo: função}; ao clicar em um botão, a função
+    correspondente é chamada com o id do registro da linha (Qt.UserRole).
+    """
+
+    BUTTON_WIDTH = 60
+    SPACING = 4
+
+    def __init__(self, actions, parent=None):
+        super().__init__(parent)
+        self.actions = actions
+        self._pressed = None  # (linha, rótulo) do botão pressionado
+
+    def button_font(self, option):
+        """Fonte reduzida usada nos botões, como nos antigos QPushButton."""
+        font = QFont(option.font)
+        font.setPixelSize(10)
+        return font
+
+    def button_rects(self, rect):
+        """Retorna os retângulos de cada botão dentro da célula."""
+        rects = []
+        x = rect.x() + self.SPACING
+        for label in self.actions:
+            rects.append((label, QRect(x, rect.y() + 2, self.BUTTON_WIDTH, rect.height() - 4)))
+            x += self.BUTTON_WIDTH + self.SPACING
+        return rects
+
+    def button_at(self, rect, pos):
+        """Retorna o rótulo do botão sob a posição informada, se houver."""
+        for label, button_rect in self.button_rects(rect):
+            if button_rect.contains(pos):
+                return label
+        return None
+
+    def paint(self, painter, option, index):
+        # Fundo da célula (inclusive a cor de seleção)
+        super().paint(painter, option, index)
+
+        widget = option.widget
+        style = widget.style() if widget else QApplication.style()
+        font = self.button_font(option)
+
+        painter.save()
+        painter.setFont(font)
+        for label, rect in self.button_rects(option.rect):
+            button = QStyleOptionButton()
+            button.rect = rect
+            button.text = label
+            button.fontMetrics = QFontMetrics(font)
+            button.palette = option.palette
+            button.state = QStyle.State_Enabled
+            if self._pressed == (index.row(), label):
+                button.state |= QStyle.State_Sunken
+            else:
+                button.state |= QStyle.State_Raised
+            style.drawControl(QStyle.CE_PushButton, button, painter, widget)
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        width = len(self.actions) * (self.BUTTON_WIDTH + self.SPACING) + self.SPACING
+        height = QFontMetrics(self.button_font(option)).height() + 12
+        return QSize(width, height)
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() not in (QEvent.MouseButtonPress, QEvent.MouseButtonRelease):
+            return super().editorEvent(event, model, option, index)
+        if event.button() != Qt.LeftButton:
+            return False
+
+        label = self.button_at(option.rect, event.pos())
+        if event.type() == QEvent.MouseButtonPress:
+            self._pressed = (index.row(), label) if label else None
+        else:
+            clicked = label is not None and self._pressed == (index.row(), label)
+            self._pressed = None
+            if clicked:
+                self.actions[label](index.data(Qt.UserRole))
+
+        if option.widget:
+            option.widget.viewport().update(option.rect)
+        return label is not None
@@ -0,0 +1,111 @@
+import threading
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QProgressBar, QPushButton, QFileDialog
+)
+from PyQt5.QtCore import pyqtSignal
+
+from database import session_scope
+from database.exporter import export_rows
+from .workers import BackgroundLoader
+from .actions import track_actions
+
+
+@track_actions
+class ExportDialog(QDialog):
+    """Exporta as linhas de uma tabela em segundo plano, exibindo o progresso."""
+
+    progress = pyqtSignal(int, int)  # (percentual, linhas exportadas)
+
+    def __init__(self, parent, query, columns, path):
+        super().__init__(parent)
+        self.query = query
+        self.columns = columns
+        self.path = path
+        self.exported = None
+        self._cancel_event = threading.Event()
+
+        self.setWindowTitle("Exportar")
+        self.setMinimumWidth(400)
+        self.setup_ui()
+
+        self.progress.connect(self.show_progress)
+        self.loader = BackgroundLoader(self)
+        self.loader.loaded.connect(self.show_result)
+        self.loader.failed.connect(self.show_failure)
+        self.loader.submit(self.run_export)
+
+    def setup_ui(self):
+        """Configura a interface do diálogo."""
+        layout = QVBoxLayout(self)
+
+        self.status_label = QLabel(f"Exportando para {self.path}...")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        layout.addWidget(self.progress_bar)
+
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        self.close_button = QPushButton("Cancelar")
+        self.close_button.clicked.connect(self.cancel_or_close)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+
+    def run_export(self):
+        """Executa a exportação (chamado fora da thread da interface)."""
+        with session_scope() as session:
+            return export_rows(
+                session, self.query, self.path, self.columns,
+                progress=self.progress.emit,
+                cancelled=self._cancel_event.is_set
+            )
+
+    def show_progress(self, percent, exported):
+        self.progress_bar.setValue(percent)
+        self.status_label.setText(f"Exportando... {exported} linhas gravadas.")
+
+    def show_result(self, exported):
+        self.exported = exported
+        self.progress_bar.setValue(100)
+        self.status_label.setText(f"{exported} linhas exportadas para {self.path}.")
+        self.close_button.setText("Fechar")
+
+    def show_failure(self, message):
+        self.close_button.setText("Fechar")
+        if self._cancel_event.is_set():
+            self.reject()
+            return
+        self.status_label.setText(f"Erro ao exportar: {message}")
+
+    def cancel_or_close(self):
+        if self.loader.is_busy():
+            self._cancel_event.set()
+            self.status_label.setText("Cancelando...")
+        elif self.exported is not None:
+            self.accept()
+        else:
+            self.reject()
+
+    def reject(self):
+        # Fechar a janela durante a exportação também a cancela
+        if self.loader.is_busy():
+            self._cancel_event.set()
+            return
+        super().reject()
+
+
+def export_table(parent, model, name):
+    """Pede o arquivo de destino e exporta todas as linhas do modelo."""
+    path, selected_filter = QFileDialog.getSaveFileName(
+        parent, "Exportar", f"{name}.csv", "CSV (*.csv);;Excel (*.xlsx)"
+    )
+    if not path:
+        return
+    if "xlsx" in selected_filter and not path.lower().endswith(".xlsx"):
+        path += ".xlsx"
+
+    dialog = ExportDialog(parent, model.export_query(), model.export_columns(), path)
+    dialog.exec()
@@ -0,0 +1,142 @@
+import datetime
+
+from PyQt5.QtWidgets import QWidget, QHBoxLayout, QLabel, QComboBox, QDateEdit, QLineEdit, QPushButton
+from PyQt5.QtCore import QDate, QTimer, pyqtSignal
+from sqlalchemy import func
+
+from database.reports import month_range
+
+
+def current_month():
+    """Retorna o primeiro e o último dia do mês atual."""
+    return month_range(datetime.date.today())
+
+
+def escape_like(text):
+    """Escapa os curingas do LIKE digitados pelo usuário."""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class FilterBar(QWidget):
+    """Barra de filtros que se traduz em condições WHERE para o LazyTableModel.
+
+    Cada filtro adicionado contribui com uma condição SQL (ou nenhuma, quando
+    vazio); o sinal changed só é emitido após uma pausa na digitação, para que
+    cada tecla não dispare uma consulta.
+    """
+
+    DEBOUNCE_MS = 400
+    ALL = "Todos"
+
+    changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.layout = QHBoxLayout(self)
+        self.layout.setContentsMargins(0, 0, 0, 0)
+        self._filters = []   # funções que retornam uma condição ou None
+        self._resets = []    # funções que restauram o valor padrão de cada filtro
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(self.DEBOUNCE_MS)
+        self.timer.timeout.connect(self.changed)
+
+    def finish(self):
+        """Completa a barra com o botão de limpar; chamar após adicionar os filtros."""
+        clear_button = QPushButton("Limpar Filtros")
+        clear_button.clicked.connect(self.reset)
+        self.layout.addWidget(clear_button)
+        self.layout.addStretch()
+
+    def add_date_range(self, label, column, inicio=None, fim=None):
+        """Filtro por período (inclusive) sobre uma coluna de data."""
+        self.layout.addWidget(QLabel(label))
+        inicio_input, fim_input = QDateEdit(), QDateEdit()
+        for date_input in (inicio_input, fim_input):
+            date_input.setCalendarPopup(True)
+            date_input.setDisplayFormat("dd/MM/yyyy")
+            self.layout.addWidget(date_input)
+
+        def reset():
+            inicio_input.setDate(QDate(inicio) if inicio else QDate(2000, 1, 1))
+            fim_input.setDate(QDate(fim) if fim else QDate.currentDate().addYears(1))
+
+        self._resets.append(reset)
+        self._filters.append(lambda: column.between(
+            inicio_input.date().toPyDate(), fim_input.date().toPyDate()
+        ))
+        reset()
+        inicio_input.dateChanged.connect(self.schedule)
+        fim_input.dateChanged.connect(self.schedule)
+        return inicio_input, fim_input
+
+    def add_choice(self, label, column, options, editable=True, build=None, default=None):
+        """Filtro por igualdade; options são textos ou pares (texto, valor).
+
+        build(valor) permite trocar a igualdade por outra condição (ex.: um
+        período); default é o texto da opção selecionada inicialmente.
+        """
+        build = build or (lambda value: column == value)
+        self.layout.addWidget(QLabel(label))
+        combo = QComboBox()
+        combo.setEditable(editable)
+        combo.addItem(self.ALL, None)
+        for option in options:
+            text, value = option if isinstance(option, tuple) else (option, option)
+            combo.addItem(text, value)
+        combo.setMinimumWidth(120)
+        combo.setCurrentIndex(max(combo.findText(default), 0) if default else 0)
+        if editable:
+            combo.editTextChanged.connect(self.schedule)
+        else:
+            combo.currentIndexChanged.connect(self.schedule)
+        self.layout.addWidget(combo)
+
+        def condition():
+            text = combo.currentText().strip()
+            if not text or text == self.ALL:
+                return None
+            index = combo.findText(text)
+            value = combo.itemData(index) if index >= 0 else text
+            return build(value)
+
+        self._resets.append(lambda: combo.setCurrentIndex(max(combo.findText(default), 0) if default else 0))
+        self._filters.append(condition)
+        return combo
+
+    def add_prefix(self, label, column=None, placeholder="", build=None):
+        """Filtro por início do texto, sem diferenciar maiúsculas (usa o índice em lower()).
+
+        build(texto) permite trocar o LIKE sobre column por outra condição.
+        """
+        build = build or (lambda text: func.lower(column).like(f"{escape_like(text.lower())}%", escape="\\"))
+        self.layout.addWidget(QLabel(label))
+        line_edit = QLineEdit()
+        line_edit.setPlaceholderText(placeholder)
+        line_edit.textChanged.connect(self.schedule)
+        self.layout.addWidget(line_edit)
+
+        def condition():
+            text = line_edit.text().strip()
+            if not text:
+                return None
+            return build(text)
+
+        self._resets.append(line_edit.clear)
+        self._filters.append(condition)
+        return line_edit
+
+    def schedule(self, *args):
+        """Reinicia a espera antes de aplicar os filtros."""
+        self.timer.start()
+
+    def reset(self):
+        """Restaura os valores padrão de todos os filtros."""
+        for reset in self._resets:
+            reset()
+        self.schedule()
+
+    def conditions(self):
+        """Retorna as condições WHERE dos filtros preenchidos."""
+        return [c for c in (f() for f in self._filters) if c is not None]
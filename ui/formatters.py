@@ -0,0 +1,36 @@
+def format_number(value, decimals=2):
+    """Formata um número no padrão brasileiro (ex.: 1.234,56)."""
+    return f"{float(value):,.{decimals}f}".replace(".", "X").replace(",", ".").replace("X", ",")
+
+
+def format_optional_number(value):
+    """Formata um número opcional, exibindo '-' quando vazio."""
+    if not value:
+        return "-"
+    return format_number(value)
+
+
+def format_currency(value):
+    """Formata um valor monetário em reais, exibindo '-' quando vazio."""
+    if not value:
+        return "-"
+    return f"R$ {format_number(value)}"
+
+
+def format_signed_currency(value):
+    """Formata um valor em reais que pode ser negativo (ex.: margem), exibindo '-' quando vazio."""
+    if value is None:
+        return "-"
+    return f"R$ {format_number(value)}"
+
+
+def format_date(value, fmt="%d/%m/%Y"):
+    """Formata uma data, exibindo '-' quando vazia."""
+    if not value:
+        return "-"
+    return value.strftime(fmt)
+
+
+def format_bool(value):
+    """Formata um booleano como 'Sim' ou 'Não'."""
+    return "Sim" if value else "Não"
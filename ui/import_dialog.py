@@ -0,0 +1,147 @@
+import threading
+
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QProgressBar, QPushButton,
+    QTableWidget, QTableWidgetItem, QHeaderView, QAbstractItemView,
+    QFileDialog, QMessageBox
+)
+from PyQt5.QtCore import pyqtSignal
+
+from database import session_scope
+from database.importer import import_csv
+from .workers import BackgroundLoader
+from .actions import track_actions
+
+
+@track_actions
+class ImportDialog(QDialog):
+    """Importa um arquivo CSV em segundo plano, exibindo o progresso e as linhas rejeitadas."""
+
+    # Máximo de linhas rejeitadas exibidas (o relatório salvo contém todas)
+    MAX_ERRORS_SHOWN = 1000
+
+    progress = pyqtSignal(int, int)  # (percentual, registros gravados)
+
+    def __init__(self, parent, entity, path):
+        super().__init__(parent)
+        self.entity = entity
+        self.path = path
+        self.result = None
+        self._cancel_event = threading.Event()
+
+        self.setWindowTitle("Importar Arquivo")
+        self.setMinimumWidth(500)
+        self.setup_ui()
+
+        self.progress.connect(self.show_progress)
+        self.loader = BackgroundLoader(self)
+        self.loader.loaded.connect(self.show_result)
+        self.loader.failed.connect(self.show_failure)
+        self.loader.submit(self.run_import)
+
+    def setup_ui(self):
+        """Configura a interface do diálogo."""
+        layout = QVBoxLayout(self)
+
+        self.status_label = QLabel(f"Importando {self.path}...")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        layout.addWidget(self.progress_bar)
+
+        self.errors_table = QTableWidget()
+        self.errors_table.setColumnCount(2)
+        self.errors_table.setHorizontalHeaderLabels(["Linha", "Erro"])
+        self.errors_table.horizontalHeader().setSectionResizeMode(1, QHeaderView.Stretch)
+        self.errors_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.errors_table.setVisible(False)
+        layout.addWidget(self.errors_table)
+
+        button_layout = QHBoxLayout()
+        self.report_button = QPushButton("Salvar Relatório de Erros")
+        self.report_button.clicked.connect(self.save_report)
+        self.report_button.setVisible(False)
+        button_layout.addWidget(self.report_button)
+
+        self.close_button = QPushButton("Cancelar")
+        self.close_button.clicked.connect(self.cancel_or_close)
+        button_layout.addWidget(self.close_button)
+        layout.addLayout(button_layout)
+
+    def run_import(self):
+        """Executa a importação (chamado fora da thread da interface)."""
+        with session_scope() as session:
+            return import_csv(
+                session, self.path, self.entity,
+                progress=self.progress.emit,
+                cancelled=self._cancel_event.is_set
+            )
+
+    def show_progress(self, percent, imported):
+        self.progress_bar.setValue(percent)
+        self.status_label.setText(f"Importando... {imported} registros gravados.")
+
+    def show_result(self, result):
+        """Exibe o resumo da importação concluída."""
+        self.result = result
+        self.progress_bar.setValue(100)
+        self.status_label.setText(
+            f"{result.imported} registros importados, {len(result.errors)} linhas rejeitadas."
+        )
+        self.close_button.setText("Fechar")
+
+        if result.errors:
+            shown = result.errors[:self.MAX_ERRORS_SHOWN]
+            self.errors_table.setRowCount(len(shown))
+            for i, (linha, erro) in enumerate(shown):
+                self.errors_table.setItem(i, 0, QTableWidgetItem(str(linha)))
+                self.errors_table.setItem(i, 1, QTableWidgetItem(erro))
+            self.errors_table.setVisible(True)
+            self.report_button.setVisible(True)
+
+    def show_failure(self, message):
+        """Exibe o erro que interrompeu a importação (nada foi gravado)."""
+        self.close_button.setText("Fechar")
+        if self._cancel_event.is_set():
+            self.reject()
+            return
+        self.status_label.setText(f"A importação falhou e nenhum registro foi gravado.\n{message}")
+
+    def cancel_or_close(self):
+        if self.loader.is_busy():
+            self._cancel_event.set()
+            self.status_label.setText("Cancelando...")
+        elif self.result is not None:
+            self.accept()
+        else:
+            self.reject()
+
+    def reject(self):
+        # Fechar a janela durante a importação também a cancela
+        if self.loader.is_busy():
+            self._cancel_event.set()
+            return
+        super().reject()
+
+    def save_report(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Salvar Relatório de Erros", "erros_importacao.csv", "CSV (*.csv)"
+        )
+        if not path:
+            return
+        try:
+            self.result.write_report(path)
+        except OSError as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao salvar relatório: {str(e)}")
+
+
+def import_file(parent, entity, title):
+    """Pede um arquivo CSV ao usuário e o importa; retorna True se algo foi gravado."""
+    path, _ = QFileDialog.getOpenFileName(parent, title, "", "CSV (*.csv *.txt)")
+    if not path:
+        return False
+    dialog = ImportDialog(parent, entity, path)
+    dialog.exec()
+    return dialog.result is not None and dialog.result.imported > 0
@@ -1,18 +1,58 @@
 from PyQt5.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
-    QTabWidget, QStatusBar, QToolBar
+    QTabWidget, QStatusBar, QToolBar, QLabel
 )
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
+import os
 
 from .tabs.maquinario_tab import MaquinarioTab
 from .tabs.funcionarios_tab import FuncionariosTab
 from .tabs.financeiro_tab import FinanceiroTab
 from .tabs.producao_tab import ProducaoTab
+from .change_notifier import ChangeNotifier
+from .query_stats_dialog import QueryStatsDialog, describe_action
+from database.instrumentation import monitor
+
+class LazyTab(QWidget):
+    """Espaço reservado de uma aba, que só constrói a aba real quando pedida."""
+    
+    def __init__(self, factory):
+        super().__init__()
+        self.factory = factory
+        self.widget = None
+        
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+    
+    def ensure_built(self):
+        """Constrói a aba (e dispara o carregamento dos seus dados) se necessário."""
+        if self.widget is None:
+            self.widget = self.factory()
+            self.layout().addWidget(self.widget)
+        return self.widget
+
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # Intervalo entre a construção de cada aba na pré-carga em segundo plano
+    PREFETCH_INTERVAL_MS = 500
+    # Intervalo de atualização do custo em SQL da última ação, na barra de status
+    SQL_STATUS_INTERVAL_MS = 500
+    # Intervalo de atualização da situação da réplica local, na barra de status
+    SYNC_STATUS_INTERVAL_MS = 2000
+    
+    def __init__(self, prefetch_tabs=None, sql_debug=None):
         super().__init__()
         
+        # Pré-carregar as demais abas depois da primeira (opcional, via .env)
+        if prefetch_tabs is None:
+            prefetch_tabs = os.getenv("PREFETCH_TABS", "false").lower() in ("1", "true", "sim")
+        self.prefetch_tabs = prefetch_tabs
+        
+        # Exibir o custo em consultas SQL de cada ação (opcional, via .env)
+        if sql_debug is None:
+            sql_debug = os.getenv("SQL_DEBUG", "false").lower() in ("1", "true", "sim")
+        self.sql_debug = sql_debug
+        
         self.setWindowTitle("Sistema de Gerenciamento de Fazenda")
         self.setGeometry(100, 100, 1200, 800)
         
@@ -27,6 +67,12 @@ class MainWindow(QMainWindow):
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Sistema iniciado com sucesso")
+        if self.sql_debug:
+            self.sql_status_label = QLabel()
+            self.status_bar.addPermanentWidget(self.sql_status_label)
+            self.sql_status_timer = QTimer(self)
+            self.sql_status_timer.timeout.connect(self.update_sql_status)
+            self.sql_status_timer.start(self.SQL_STATUS_INTERVAL_MS)
         
         # Criar barra de ferramentas
         self.toolbar = QToolBar("Barra de Ferramentas Principal")
@@ -44,29 +90,113 @@ class MainWindow(QMainWindow):
         
         # Botões de rodapé
         self.setup_footer()
+        
+        # Receber as alterações feitas por outros terminais
+        self.change_notifier = ChangeNotifier(self)
+        self.change_notifier.changed.connect(self.on_database_change)
+        self.change_notifier.start()
+        
+        # Situação da sincronização, no modo réplica local
+        if self.change_notifier.sync_status() is not None:
+            self.sync_status_label = QLabel()
+            self.status_bar.addPermanentWidget(self.sync_status_label)
+            self.sync_status_timer = QTimer(self)
+            self.sync_status_timer.timeout.connect(self.update_sync_status)
+            self.sync_status_timer.start(self.SYNC_STATUS_INTERVAL_MS)
+            self.update_sync_status()
+            self.toolbar.addAction("Sincronizar", self.change_notifier.sync_now)
     
     def setup_toolbar(self):
-        # Barra de ferramentas vazia
-        pass
+        if self.sql_debug:
+            self.toolbar.addAction("Consultas SQL", self.show_query_stats)
+    
+    def update_sql_status(self):
+        """Mostra quantas consultas a última ação fez e quanto tempo levaram."""
+        self.sql_status_label.setText(describe_action(monitor.last))
+    
+    def update_sync_status(self):
+        """Mostra se a réplica local está sincronizada e quantas alterações aguardam envio."""
+        self.sync_status_label.setText(self.change_notifier.sync_status())
+    
+    def show_query_stats(self):
+        """Abre o painel com o custo em SQL de cada ação."""
+        dialog = QueryStatsDialog(self)
+        dialog.exec()
     
     def setup_tabs(self):
+        # As abas são criadas como espaços reservados e só são construídas
+        # (com suas consultas) na primeira vez em que são ativadas
+        self.lazy_tabs = {}
+        
         # Tab de Financeiro (Despesas e Receitas)
-        self.financeiro_tab = FinanceiroTab()
-        self.tab_widget.addTab(self.financeiro_tab, "Financeiro")
+        self.add_lazy_tab("financeiro", FinanceiroTab, "Financeiro")
         
         # Tab de Maquinário
-        self.maquinario_tab = MaquinarioTab()
-        self.tab_widget.addTab(self.maquinario_tab, "Maquinário")
+        self.add_lazy_tab("maquinario", MaquinarioTab, "Maquinário")
         
         # Tab de Produção
-        self.producao_tab = ProducaoTab()
-        self.tab_widget.addTab(self.producao_tab, "Produção")
+        self.add_lazy_tab("producao", ProducaoTab, "Produção")
         
         # Tab de Funcionários
-        self.funcionarios_tab = FuncionariosTab()
-        self.tab_widget.addTab(self.funcionarios_tab, "Funcionários")
+        self.add_lazy_tab("funcionarios", FuncionariosTab, "Funcionários")
+        
+        self.tab_widget.currentChanged.connect(self.on_tab_changed)
+        self.on_tab_changed(self.tab_widget.currentIndex())
+        
+        if self.prefetch_tabs:
+            QTimer.singleShot(self.PREFETCH_INTERVAL_MS, self.prefetch_next_tab)
+    
+    def add_lazy_tab(self, name, factory, title):
+        """Adiciona uma aba construída sob demanda."""
+        placeholder = LazyTab(factory)
+        self.lazy_tabs[name] = placeholder
+        self.tab_widget.addTab(placeholder, title)
+    
+    def on_tab_changed(self, index):
+        """Constrói a aba ativada, caso ainda não tenha sido construída."""
+        placeholder = self.tab_widget.widget(index)
+        if isinstance(placeholder, LazyTab):
+            placeholder.ensure_built()
+    
+    def prefetch_next_tab(self):
+        """Constrói a próxima aba pendente, uma por vez, sem travar a interface."""
+        for placeholder in self.lazy_tabs.values():
+            if placeholder.widget is None:
+                placeholder.ensure_built()
+                QTimer.singleShot(self.PREFETCH_INTERVAL_MS, self.prefetch_next_tab)
+                return
+    
+    def on_database_change(self, table, operation, row_id):
+        """Repassa uma alteração externa às abas já construídas."""
+        for placeholder in self.lazy_tabs.values():
+            if placeholder.widget is not None:
+                placeholder.widget.apply_change(table, operation, row_id)
+    
+    @property
+    def financeiro_tab(self):
+        return self.lazy_tabs["financeiro"].ensure_built()
+    
+    @property
+    def maquinario_tab(self):
+        return self.lazy_tabs["maquinario"].ensure_built()
+    
+    @property
+    def producao_tab(self):
+        return self.lazy_tabs["producao"].ensure_built()
+    
+    @property
+    def funcionarios_tab(self):
+        return self.lazy_tabs["funcionarios"].ensure_built()
     
     def setup_footer(self):
         # Rodapé sem botões
         footer_layout = QHBoxLayout()
-        self.layout.addLayout(footer_layout) 
\ No newline at end of file
+        self.layout.addLayout(footer_layout) 
+    
+    def closeEvent(self, event):
+        self.change_notifier.stop()
+        # Fechar as sessões das abas construídas
+        for placeholder in self.lazy_tabs.values():
+            if placeholder.widget is not None:
+                placeholder.widget.db.close()
+        super().closeEvent(event)
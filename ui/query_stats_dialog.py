@@ -0,0 +1,84 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QTableWidget, QTableWidgetItem,
+    QHeaderView, QAbstractItemView
+)
+
+from database.instrumentation import monitor, LATENCY_BUCKETS_MS
+
+
+def describe_action(record):
+    """Resumo de uma execução de ação para a barra de status."""
+    if record is None:
+        return "SQL: nenhuma ação registrada"
+    text = f"SQL: {record.name} — {record.queries} consulta(s), {record.duration * 1000:.0f} ms"
+    if record.repeated:
+        text += " — provável N+1"
+    return text
+
+
+def histogram_labels():
+    labels = [f"≤{limit} ms" for limit in LATENCY_BUCKETS_MS]
+    return labels + [f">{LATENCY_BUCKETS_MS[-1]} ms"]
+
+
+class QueryStatsDialog(QDialog):
+    """Painel de depuração com o custo em consultas SQL de cada ação da interface."""
+
+    COLUMNS = ["Ação", "Execuções", "Consultas", "Consultas/execução", "Tempo total (ms)",
+               "Maior consulta (ms)", "Prováveis N+1"] + histogram_labels()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Consultas SQL por Ação")
+        self.setMinimumSize(1000, 450)
+        self.setup_ui()
+        self.load_stats()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.last_label = QLabel()
+        layout.addWidget(self.last_label)
+
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        buttons_layout = QHBoxLayout()
+        self.refresh_button = QPushButton("Atualizar")
+        self.refresh_button.clicked.connect(self.load_stats)
+        buttons_layout.addWidget(self.refresh_button)
+        self.reset_button = QPushButton("Zerar")
+        self.reset_button.clicked.connect(self.reset_stats)
+        buttons_layout.addWidget(self.reset_button)
+        buttons_layout.addStretch()
+        self.close_button = QPushButton("Fechar")
+        self.close_button.clicked.connect(self.accept)
+        buttons_layout.addWidget(self.close_button)
+        layout.addLayout(buttons_layout)
+
+    def load_stats(self):
+        """Exibe os totais acumulados, da ação mais custosa para a menos custosa."""
+        self.last_label.setText(describe_action(monitor.last))
+        summaries = monitor.snapshot()
+        self.table.setRowCount(len(summaries))
+        for i, summary in enumerate(summaries):
+            por_execucao = summary.queries / summary.executions if summary.executions else summary.queries
+            values = [
+                summary.name,
+                str(summary.executions),
+                str(summary.queries),
+                f"{por_execucao:.1f}",
+                f"{summary.duration * 1000:.1f}",
+                f"{summary.max_query * 1000:.1f}",
+                str(summary.repeated),
+            ] + [str(count) for count in summary.histogram]
+            for j, value in enumerate(values):
+                self.table.setItem(i, j, QTableWidgetItem(value))
+
+    def reset_stats(self):
+        monitor.reset()
+        self.load_stats()
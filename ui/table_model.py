@@ -0,0 +1,378 @@
+import logging
+
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from sqlalchemy import String, select, tuple_
+
+from database import session_scope
+from .workers import BackgroundLoader
+
+logger = logging.getLogger(__name__)
+
+
+class TableColumn:
+    """Descreve uma coluna exibida por um LazyTableModel."""
+
+    def __init__(self, title, expression=None, formatter=None):
+        self.title = title
+        self.expression = expression  # None para colunas sem dados (ex.: Ações)
+        self.formatter = formatter
+
+
+class LazyTableModel(QAbstractTableModel):
+    """Modelo de tabela que busca as linhas do banco sob demanda.
+
+    As linhas são lidas em blocos com paginação por chave (keyset) sobre o id,
+    à medida que a view pede mais dados via canFetchMore/fetchMore. Apenas os
+    valores brutos das colunas são mantidos em memória; a formatação acontece
+    em data(), ou seja, somente para as células visíveis.
+
+    A ordenação pelo cabeçalho também é feita no banco (ORDER BY na coluna
+    original, com desempate pelo id); a paginação segue por chave sobre o par
+    (valor, id), e as linhas com valor nulo vêm por último, em uma segunda fase.
+
+    As consultas rodam em segundo plano (BackgroundLoader); um refresh()
+    descarta o resultado de qualquer bloco ainda em andamento.
+
+    Alterações feitas por outros terminais chegam via apply_change() e são
+    aplicadas linha a linha, sem recarregar a tabela inteira.
+
+    Colunas de outras tabelas (ex.: o nome do fornecedor de uma despesa)
+    exigem from_clause com as junções, como entity.__table__.outerjoin(...).
+    """
+
+    # Acima deste número de ids pendentes, recarregar tudo é mais barato
+    MAX_PENDING_CHANGES = 500
+
+    load_failed = pyqtSignal(str)
+    loading_changed = pyqtSignal(bool)
+
+    def __init__(self, entity, columns, chunk_size=200, parent=None, from_clause=None):
+        super().__init__(parent)
+        self.entity = entity
+        self.columns = columns
+        self.chunk_size = chunk_size
+        self.from_clause = from_clause if from_clause is not None else entity.__table__
+
+        # Posição de cada coluna na tupla da linha (a posição 0 é sempre o id)
+        self._value_index = []
+        self._expressions = [entity.id]
+        for column in columns:
+            if column.expression is None:
+                self._value_index.append(None)
+            else:
+                self._value_index.append(len(self._expressions))
+                self._expressions.append(column.expression)
+
+        self._rows = []
+        self._exhausted = False
+        self._filters = []  # Condições WHERE aplicadas a todas as consultas
+
+        # Ordenação atual: posição do valor na tupla da linha (None = por id)
+        self._sort_index = None
+        self._descending = False
+        self._null_phase = False  # Buscando as linhas com valor nulo na coluna ordenada
+
+        self.loader = BackgroundLoader(self)
+        self.loader.loaded.connect(self._append_rows)
+        self.loader.failed.connect(self._on_load_failed)
+        self.loader.busy_changed.connect(self.loading_changed)
+
+        # Ids alterados em outros terminais, aguardando a releitura
+        self._pending_ids = set()
+        self.change_loader = BackgroundLoader(self)
+        self.change_loader.loaded.connect(self._merge_rows)
+        self.change_loader.failed.connect(self._on_change_failed)
+
+    def refresh(self):
+        """Descarta as linhas carregadas e busca novamente o primeiro bloco."""
+        self.loader.cancel()
+        self.change_loader.cancel()
+        self._pending_ids.clear()
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = False
+        self._null_phase = False
+        self.endResetModel()
+        self.fetchMore(QModelIndex())
+
+    def clear(self):
+        """Esvazia a tabela sem consultar o banco, até o próximo refresh()."""
+        self.loader.cancel()
+        self.change_loader.cancel()
+        self._pending_ids.clear()
+        self.beginResetModel()
+        self._rows = []
+        self._exhausted = True
+        self.endResetModel()
+
+    def set_filters(self, conditions):
+        """Troca as condições de filtro (executadas no banco) e recarrega as linhas."""
+        self._filters = list(conditions)
+        self.refresh()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Ordena pela coluna informada, no banco de dados."""
+        sort_index = self._value_index[column] if 0 <= column < len(self.columns) else None
+        descending = order == Qt.DescendingOrder
+        if (sort_index, descending) == (self._sort_index, self._descending):
+            return
+        self._sort_index = sort_index
+        self._descending = descending
+        self.refresh()
+
+    def _select(self, *expressions):
+        return select(*expressions).select_from(self.from_clause)
+
+    def _id_order(self):
+        return self.entity.id.desc() if self._descending else self.entity.id
+
+    def build_query(self, last_row):
+        """Monta a consulta do próximo bloco de linhas após last_row (a última carregada)."""
+        query = self._select(*self._expressions).where(*self._filters).limit(self.chunk_size)
+        entity_id = self.entity.id
+
+        if self._sort_index is None:
+            query = query.order_by(self._id_order())
+            if last_row is not None:
+                last_id = last_row[0]
+                query = query.where(entity_id < last_id if self._descending else entity_id > last_id)
+            return query
+
+        expression = self._expressions[self._sort_index]
+        if self._null_phase:
+            # Segunda fase: linhas sem valor na coluna ordenada, por id
+            query = query.where(expression.is_(None)).order_by(self._id_order())
+            if last_row is not None and last_row[self._sort_index] is None:
+                last_id = last_row[0]
+                query = query.where(entity_id < last_id if self._descending else entity_id > last_id)
+            return query
+
+        query = query.where(expression.isnot(None)).order_by(
+            expression.desc() if self._descending else expression, self._id_order()
+        )
+        if last_row is not None:
+            key = tuple_(expression, entity_id)
+            last_key = tuple_(last_row[self._sort_index], last_row[0])
+            query = query.where(key < last_key if self._descending else key > last_key)
+        return query
+
+    def _sorts_by_text(self):
+        """Indica se a ordenação atual é por texto, cuja ordem depende da collation do banco."""
+        return self._sort_index is not None and isinstance(self._expressions[self._sort_index].type, String)
+
+    def _precedes(self, row, other):
+        """Indica se row vem antes de other na ordenação atual (como no ORDER BY).
+
+        Não vale para colunas de texto: o < do Python não segue a collation
+        do banco (maiúsculas, acentos); ver _update_row.
+        """
+        if self._sort_index is not None:
+            value, other_value = row[self._sort_index], other[self._sort_index]
+            if value is None and other_value is not None:
+                return False
+            if other_value is None and value is not None:
+                return True
+            if value != other_value:
+                return value > other_value if self._descending else value < other_value
+        return row[0] > other[0] if self._descending else row[0] < other[0]
+
+    def export_columns(self):
+        """Retorna [(título, formatador)] das colunas com dados, na ordem de export_query()."""
+        return [(c.title, c.formatter) for c in self.columns if c.expression is not None]
+
+    def export_query(self):
+        """Monta a consulta de todas as linhas que passam pelos filtros, para exportação."""
+        expressions = [c.expression for c in self.columns if c.expression is not None]
+        query = self._select(*expressions).where(*self._filters)
+        if self._sort_index is not None:
+            expression = self._expressions[self._sort_index]
+            query = query.order_by((expression.desc() if self._descending else expression).nulls_last())
+        return query.order_by(self._id_order())
+
+    def apply_change(self, operation, row_id):
+        """Aplica uma alteração (I/U/D) feita no registro row_id por outro terminal.
+
+        A operação R indica alterações demais para reler uma a uma: recarrega tudo.
+        """
+        if operation == "R":
+            self.refresh()
+            return
+        if operation == "D":
+            self._pending_ids.discard(row_id)
+            self._remove_row(row_id)
+            return
+
+        self._pending_ids.add(row_id)
+        if len(self._pending_ids) > self.MAX_PENDING_CHANGES:
+            self.refresh()
+        elif not self.change_loader.is_busy():
+            self._fetch_pending()
+
+    def _fetch_pending(self):
+        ids = list(self._pending_ids)
+        self._pending_ids.clear()
+        query = self._select(*self._expressions).where(self.entity.id.in_(ids), *self._filters)
+        self.change_loader.submit(self.fetch_changed_rows, ids, query)
+
+    def fetch_changed_rows(self, ids, query):
+        """Relê as linhas alteradas (chamado fora da thread da interface)."""
+        return ids, self.fetch_chunk(query)
+
+    def _merge_rows(self, result):
+        ids, rows = result
+        found = {row[0]: row for row in rows}
+        for row_id in ids:
+            if row_id in found:
+                if not self._update_row(found[row_id]):
+                    self.refresh()
+                    return
+            else:
+                self._remove_row(row_id)  # Excluído ou fora dos filtros
+
+        if self._pending_ids:
+            self._fetch_pending()
+
+    def _on_change_failed(self, message):
+        logger.error(f"Erro ao atualizar {self.entity.__tablename__}: {message}")
+        self._pending_ids.clear()
+
+    def _insert_position(self, values):
+        """Posição em que a linha entraria, mantendo a ordenação atual."""
+        low, high = 0, len(self._rows)
+        while low < high:
+            middle = (low + high) // 2
+            if self._precedes(self._rows[middle], values):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _find_row(self, row_id):
+        """Retorna a posição da linha com o id informado, ou None."""
+        if self._sort_index is None:
+            position = self._insert_position((row_id,))
+            if position < len(self._rows) and self._rows[position][0] == row_id:
+                return position
+            return None
+        for position, row in enumerate(self._rows):
+            if row[0] == row_id:
+                return position
+        return None
+
+    def _update_row(self, values):
+        """Atualiza ou insere a linha na posição da ordenação atual.
+
+        Retorna False se a posição só pode ser conhecida relendo do banco:
+        linha nova ou com outro valor na coluna de texto ordenada.
+        """
+        position = self._find_row(values[0])
+        if self._sorts_by_text():
+            if position is None or self._rows[position][self._sort_index] != values[self._sort_index]:
+                return False
+            self._rows[position] = values
+            self.dataChanged.emit(self.index(position, 0), self.index(position, len(self.columns) - 1))
+            return True
+        if position is not None:
+            still_ordered = (
+                (position == 0 or self._precedes(self._rows[position - 1], values))
+                and (position == len(self._rows) - 1 or self._precedes(values, self._rows[position + 1]))
+            )
+            if still_ordered:
+                self._rows[position] = values
+                self.dataChanged.emit(
+                    self.index(position, 0), self.index(position, len(self.columns) - 1)
+                )
+                return True
+            self._remove_row(values[0])
+
+        position = self._insert_position(values)
+        if self._exhausted or position < len(self._rows):
+            # Linhas após o último bloco carregado chegam pelo fetchMore
+            self.beginInsertRows(QModelIndex(), position, position)
+            self._rows.insert(position, values)
+            self.endInsertRows()
+        return True
+
+    def _remove_row(self, row_id):
+        position = self._find_row(row_id)
+        if position is not None:
+            self.beginRemoveRows(QModelIndex(), position, position)
+            del self._rows[position]
+            self.endRemoveRows()
+
+    def row_id(self, row):
+        """Retorna o id do registro exibido na linha informada."""
+        return self._rows[row][0]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self.columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid():
+            return False
+        return not self._exhausted and not self.loader.is_busy()
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted or self.loader.is_busy():
+            return
+
+        last_row = self._rows[-1] if self._rows else None
+        self.loader.submit(self.fetch_chunk, self.build_query(last_row))
+
+    def fetch_chunk(self, query):
+        """Executa a consulta de um bloco (chamado fora da thread da interface)."""
+        with session_scope() as session:
+            return [tuple(row) for row in session.execute(query)]
+
+    def _on_load_failed(self, message):
+        logger.error(f"Erro ao carregar {self.entity.__tablename__}: {message}")
+        self._exhausted = True
+        self.load_failed.emit(message)
+
+    def _append_rows(self, rows):
+        if len(rows) < self.chunk_size:
+            if self._sort_index is not None and not self._null_phase:
+                self._null_phase = True  # Falta buscar as linhas com valor nulo
+            else:
+                self._exhausted = True
+
+        if rows:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+            self._rows.extend(rows)
+            self.endInsertRows()
+
+        if self._null_phase and len(rows) < self.chunk_size and not self._exhausted:
+            self.fetchMore(QModelIndex())
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+
+        if role == Qt.UserRole:
+            return self.row_id(index.row())
+
+        if role != Qt.DisplayRole:
+            return None
+
+        value_index = self._value_index[index.column()]
+        if value_index is None:
+            return None
+
+        value = self._rows[index.row()][value_index]
+        formatter = self.columns[index.column()].formatter
+        if formatter:
+            return formatter(value)
+        return "" if value is None else str(value)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.columns[section].title
+        return super().headerData(section, orientation, role)
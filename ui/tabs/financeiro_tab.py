@@ -1,19 +1,66 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
-    QTableWidgetItem, QPushButton, QLabel, QDialog,
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView, QTableWidget,
+    QTableWidgetItem, QAbstractItemView, QPushButton, QLabel, QDialog,
     QFormLayout, QLineEdit, QDateEdit, QTextEdit, QComboBox,
     QMessageBox, QHeaderView, QCheckBox, QTabWidget,
     QSplitter, QGroupBox
 )
-from PyQt5.QtCore import Qt, QDate
+from PyQt5.QtCore import Qt, QDate, QTimer
 
-from database import get_session, Despesa, Entrada, Fornecedor
+from database import session_scope, TabSession, Despesa, Entrada, Fornecedor, Cliente
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from database.models import search_key
+from database.reports import financial_summary
+from ..formatters import format_currency, format_date, format_bool, format_number
+from ..delegates import ActionButtonDelegate
+from ..table_model import LazyTableModel, TableColumn
+from ..workers import BackgroundLoader
+from ..import_dialog import import_file
+from ..export_dialog import export_table
+from ..filter_bar import FilterBar, current_month
+from ..completers import SearchCompleter, fornecedor_search, cliente_search
+from ..actions import track_actions
 import datetime
 
+CATEGORIAS_ENTRADA = [
+    "Venda de Produção", "Prestação de Serviços", "Aluguel", 
+    "Subsídios", "Outros"
+]
+
+CATEGORIAS_DESPESA = [
+    "Insumos", "Combustível", "Manutenção", "Salários", 
+    "Impostos", "Aluguel", "Serviços", "Outros"
+]
+
+FORMAS_PAGAMENTO = [
+    "Dinheiro", "Cartão de Crédito", "Cartão de Débito", 
+    "Transferência", "PIX", "Boleto", "Cheque"
+]
+
+def buscar_cadastro(entity, nome):
+    """Retorna o id do Fornecedor/Cliente com o nome informado (ignorando maiúsculas e acentos), ou None."""
+    with session_scope() as session:
+        cadastro_id = session.scalar(select(entity.id).where(entity.nome == nome))
+        if cadastro_id is None:
+            cadastro_id = session.scalar(
+                select(entity.id).where(entity.nome_busca == search_key(nome)).order_by(entity.id).limit(1)
+            )
+        return cadastro_id
+
+
+@track_actions
 class FinanceiroTab(QWidget):
+    # Espera após uma alteração externa antes de recalcular o resumo
+    RESUMO_DEBOUNCE_MS = 1000
+    
     def __init__(self):
         super().__init__()
         
+        # Sessão da aba: registros editados pelos diálogos são lidos e gravados nela
+        self.db = TabSession()
+        
         # Layout principal
         self.layout = QVBoxLayout(self)
         
@@ -49,14 +96,56 @@ class FinanceiroTab(QWidget):
         self.refresh_entrada_button.clicked.connect(self.load_entradas)
         self.entradas_action_layout.addWidget(self.refresh_entrada_button)
         
+        self.import_entrada_button = QPushButton("Importar CSV")
+        self.import_entrada_button.clicked.connect(self.import_entradas)
+        self.entradas_action_layout.addWidget(self.import_entrada_button)
+        
+        self.export_entrada_button = QPushButton("Exportar")
+        self.export_entrada_button.clicked.connect(lambda: export_table(self, self.entradas_model, "entradas"))
+        self.entradas_action_layout.addWidget(self.export_entrada_button)
+        
+        # Indicador exibido enquanto os dados são carregados em segundo plano
+        self.entradas_loading_label = QLabel("Carregando...")
+        self.entradas_loading_label.setVisible(False)
+        self.entradas_action_layout.addWidget(self.entradas_loading_label)
+        
         self.entradas_group_layout.addLayout(self.entradas_action_layout)
         
+        # Filtros de entradas (executados no banco; padrão: mês atual)
+        self.entradas_filters = FilterBar()
+        self.entradas_filters.add_date_range("Período:", Entrada.data, *current_month())
+        self.entradas_filters.add_choice("Categoria:", Entrada.categoria, CATEGORIAS_ENTRADA)
+        self.entradas_filters.add_choice(
+            "Situação:", Entrada.recebido, [("Recebido", True), ("Pendente", False)], editable=False
+        )
+        self.entradas_filters.add_choice("Forma:", Entrada.forma_pagamento, FORMAS_PAGAMENTO)
+        self.entradas_filters.finish()
+        self.entradas_filters.changed.connect(self.load_entradas)
+        self.entradas_group_layout.addWidget(self.entradas_filters)
+        
         # Tabela de entradas
-        self.entradas_table = QTableWidget()
-        self.entradas_table.setColumnCount(6)  # Aumentado para incluir coluna do botão Editar
-        self.entradas_table.setHorizontalHeaderLabels([
-            "Descrição", "Valor (R$)", "Data", "Categoria", "Recebido", "Ações"
+        self.entradas_model = LazyTableModel(Entrada, [
+            TableColumn("Descrição", Entrada.descricao),
+            TableColumn("Valor (R$)", Entrada.valor, format_currency),
+            TableColumn("Data", Entrada.data, format_date),
+            TableColumn("Categoria", Entrada.categoria),
+            TableColumn("Recebido", Entrada.recebido, format_bool),
+            TableColumn("Ações"),
         ])
+        self.entradas_model.loading_changed.connect(self.entradas_loading_label.setVisible)
+        self.entradas_model.load_failed.connect(
+            lambda erro: QMessageBox.critical(self, "Erro", f"Erro ao carregar entradas: {erro}")
+        )
+        
+        self.entradas_table = QTableView()
+        self.entradas_table.setModel(self.entradas_model)
+        self.entradas_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        # Ordenação pelo cabeçalho feita no banco, sobre os valores originais
+        self.entradas_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.entradas_table.setSortingEnabled(True)
+        # Botões da coluna Ações desenhados pelo delegate, sem um widget por linha
+        self.entrada_actions_delegate = ActionButtonDelegate({"Editar": self.edit_entrada_from_button}, self.entradas_table)
+        self.entradas_table.setItemDelegateForColumn(5, self.entrada_actions_delegate)
         self.entradas_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         # Definir largura da coluna de ações
         self.entradas_table.horizontalHeader().setSectionResizeMode(5, QHeaderView.ResizeToContents)
@@ -88,16 +177,65 @@ class FinanceiroTab(QWidget):
         self.refresh_despesa_button.clicked.connect(self.load_despesas)
         self.despesas_action_layout.addWidget(self.refresh_despesa_button)
         
+        self.import_despesa_button = QPushButton("Importar CSV")
+        self.import_despesa_button.clicked.connect(self.import_despesas)
+        self.despesas_action_layout.addWidget(self.import_despesa_button)
+        
+        self.export_despesa_button = QPushButton("Exportar")
+        self.export_despesa_button.clicked.connect(lambda: export_table(self, self.despesas_model, "despesas"))
+        self.despesas_action_layout.addWidget(self.export_despesa_button)
+        
+        # Indicador exibido enquanto os dados são carregados em segundo plano
+        self.despesas_loading_label = QLabel("Carregando...")
+        self.despesas_loading_label.setVisible(False)
+        self.despesas_action_layout.addWidget(self.despesas_loading_label)
+        
         self.despesas_group_layout.addLayout(self.despesas_action_layout)
         
+        # Filtros de despesas (executados no banco; padrão: mês atual)
+        self.despesas_filters = FilterBar()
+        self.despesas_filters.add_date_range("Período:", Despesa.data, *current_month())
+        self.despesas_filters.add_choice("Categoria:", Despesa.categoria, CATEGORIAS_DESPESA)
+        self.despesas_filters.add_prefix("Fornecedor:", placeholder="Início do nome", build=lambda texto: (
+            Despesa.fornecedor_id.in_(select(Fornecedor.id).where(fornecedor_search.condition(texto)))
+        ))
+        self.despesas_filters.add_choice(
+            "Situação:", Despesa.pago, [("Pago", True), ("Pendente", False)], editable=False
+        )
+        self.despesas_filters.add_choice("Forma:", Despesa.forma_pagamento, FORMAS_PAGAMENTO)
+        self.despesas_filters.finish()
+        self.despesas_filters.changed.connect(self.load_despesas)
+        self.despesas_group_layout.addWidget(self.despesas_filters)
+        
         # Tabela de despesas
-        self.despesas_table = QTableWidget()
-        self.despesas_table.setColumnCount(12)  # Aumentado para incluir coluna do botão Editar
-        self.despesas_table.setHorizontalHeaderLabels([
-            "Descrição", "Valor (R$)", "Fornecedor", "Produto Retirado", "Data de Retirada",
-            "Data de Pagamento", "Categoria", "Forma Pagamento", "Status",
-            "Usuário", "Registro", "Ações"
-        ])
+        self.despesas_model = LazyTableModel(Despesa, [
+            TableColumn("Descrição", Despesa.descricao),
+            TableColumn("Valor (R$)", Despesa.valor, format_currency),
+            TableColumn("Fornecedor", Fornecedor.nome),
+            TableColumn("Produto Retirado", Despesa.produto_retirado, format_bool),
+            TableColumn("Data de Retirada", Despesa.data_retirada, format_date),
+            TableColumn("Data de Pagamento", Despesa.data_pagamento, format_date),
+            TableColumn("Categoria", Despesa.categoria),
+            TableColumn("Forma Pagamento", Despesa.forma_pagamento),
+            TableColumn("Status", Despesa.pago, lambda pago: "Pago" if pago else "Pendente"),
+            TableColumn("Usuário", Despesa.usuario_adicionou),
+            TableColumn("Registro", Despesa.data_registro, lambda data: format_date(data, "%d/%m/%Y %H:%M")),
+            TableColumn("Ações"),
+        ], from_clause=Despesa.__table__.outerjoin(Fornecedor.__table__))
+        self.despesas_model.loading_changed.connect(self.despesas_loading_label.setVisible)
+        self.despesas_model.load_failed.connect(
+            lambda erro: QMessageBox.critical(self, "Erro", f"Erro ao carregar despesas: {erro}")
+        )
+        
+        self.despesas_table = QTableView()
+        self.despesas_table.setModel(self.despesas_model)
+        self.despesas_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        # Ordenação pelo cabeçalho feita no banco, sobre os valores originais
+        self.despesas_table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.despesas_table.setSortingEnabled(True)
+        # Botões da coluna Ações desenhados pelo delegate, sem um widget por linha
+        self.despesa_actions_delegate = ActionButtonDelegate({"Editar": self.edit_despesa_from_button}, self.despesas_table)
+        self.despesas_table.setItemDelegateForColumn(11, self.despesa_actions_delegate)
         self.despesas_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         # Definir largura da coluna de ações
         self.despesas_table.horizontalHeader().setSectionResizeMode(11, QHeaderView.ResizeToContents)
@@ -106,193 +244,226 @@ class FinanceiroTab(QWidget):
         self.despesas_layout.addWidget(self.despesas_group)
         self.splitter.addWidget(self.despesas_widget)
         
-        # Dicionários para armazenar os botões de editar
-        self.edit_entrada_buttons = {}
-        self.edit_despesa_buttons = {}
+        # Resumo financeiro
+        self.setup_relatorios()
         
-        # Carregar dados iniciais
+        # Carregar dados iniciais (o resumo é recalculado junto com as tabelas)
         self.load_entradas()
         self.load_despesas()
-        
-        # Relatórios futuros
-        self.setup_relatorios()
     
     def setup_relatorios(self):
-        """Configura a área de relatórios financeiros (implementação futura)."""
+        """Configura o painel de resumo financeiro (agregado no banco de dados)."""
         relatorios_group = QGroupBox("Resumo Financeiro")
-        relatorios_layout = QVBoxLayout(relatorios_group)
+        relatorios_layout = QHBoxLayout(relatorios_group)
+        relatorios_group.setMaximumHeight(220)
+        
+        # Período e totais
+        totais_layout = QFormLayout()
+        
+        self.periodo_input = QComboBox()
+        self.periodo_input.addItems(["Mês atual", "Últimos 3 meses", "Últimos 12 meses", "Ano atual"])
+        self.periodo_input.setCurrentIndex(2)
+        self.periodo_input.currentIndexChanged.connect(self.load_resumo)
+        totais_layout.addRow("Período:", self.periodo_input)
+        
+        self.total_entradas_label = QLabel("-")
+        totais_layout.addRow("Entradas:", self.total_entradas_label)
+        self.total_despesas_label = QLabel("-")
+        totais_layout.addRow("Despesas:", self.total_despesas_label)
+        self.saldo_label = QLabel("-")
+        self.saldo_label.setStyleSheet("font-weight: bold;")
+        totais_layout.addRow("Saldo:", self.saldo_label)
+        self.despesas_pagas_label = QLabel("-")
+        totais_layout.addRow("Despesas pagas:", self.despesas_pagas_label)
+        self.despesas_pendentes_label = QLabel("-")
+        totais_layout.addRow("Despesas pendentes:", self.despesas_pendentes_label)
+        self.entradas_pendentes_label = QLabel("-")
+        totais_layout.addRow("A receber:", self.entradas_pendentes_label)
+        
+        relatorios_layout.addLayout(totais_layout)
+        
+        # Entradas x despesas por mês (poucas linhas, já agregadas no banco)
+        self.resumo_mensal_table = QTableWidget()
+        self.resumo_mensal_table.setColumnCount(4)
+        self.resumo_mensal_table.setHorizontalHeaderLabels(["Mês", "Entradas", "Despesas", "Saldo"])
+        self.resumo_mensal_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.resumo_mensal_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        relatorios_layout.addWidget(self.resumo_mensal_table, 2)
+        
+        # Despesas por categoria
+        self.resumo_categoria_table = QTableWidget()
+        self.resumo_categoria_table.setColumnCount(3)
+        self.resumo_categoria_table.setHorizontalHeaderLabels(["Categoria", "Total", "%"])
+        self.resumo_categoria_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.resumo_categoria_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        relatorios_layout.addWidget(self.resumo_categoria_table, 1)
+        
+        # Maiores fornecedores do período
+        self.resumo_fornecedor_table = QTableWidget()
+        self.resumo_fornecedor_table.setColumnCount(2)
+        self.resumo_fornecedor_table.setHorizontalHeaderLabels(["Fornecedor", "Total"])
+        self.resumo_fornecedor_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.resumo_fornecedor_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        relatorios_layout.addWidget(self.resumo_fornecedor_table, 1)
+        
+        # Maiores clientes do período
+        self.resumo_cliente_table = QTableWidget()
+        self.resumo_cliente_table.setColumnCount(2)
+        self.resumo_cliente_table.setHorizontalHeaderLabels(["Cliente", "Total"])
+        self.resumo_cliente_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.resumo_cliente_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        relatorios_layout.addWidget(self.resumo_cliente_table, 1)
         
-        # Mensagem de implementação futura
-        message_label = QLabel(
-            "Os relatórios financeiros detalhados serão implementados em uma versão futura."
+        self.layout.addWidget(relatorios_group)
+        
+        # Consulta do resumo em segundo plano
+        self.resumo_loader = BackgroundLoader(self)
+        self.resumo_loader.loaded.connect(self.show_resumo)
+        self.resumo_loader.failed.connect(
+            lambda erro: QMessageBox.critical(self, "Erro", f"Erro ao carregar resumo financeiro: {erro}")
         )
-        message_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        relatorios_layout.addWidget(message_label)
         
-        self.layout.addWidget(relatorios_group)
+        # Alterações de outros terminais chegam em rajadas: recalcular uma vez só
+        self.resumo_timer = QTimer(self)
+        self.resumo_timer.setSingleShot(True)
+        self.resumo_timer.setInterval(self.RESUMO_DEBOUNCE_MS)
+        self.resumo_timer.timeout.connect(self.load_resumo)
+    
+    def periodo_resumo(self):
+        """Retorna as datas de início e fim do período selecionado no resumo."""
+        hoje = datetime.date.today()
+        if self.periodo_input.currentIndex() == 3:  # Ano atual
+            return hoje.replace(month=1, day=1), hoje.replace(month=12, day=31)
+        
+        meses_anteriores = {0: 0, 1: 2, 2: 11}[self.periodo_input.currentIndex()]
+        ano, mes = divmod(hoje.year * 12 + hoje.month - 1 - meses_anteriores, 12)
+        return datetime.date(ano, mes + 1, 1), hoje
+    
+    def load_resumo(self):
+        """Recalcula o resumo financeiro do período selecionado."""
+        inicio, fim = self.periodo_resumo()
+        self.resumo_loader.submit(self.query_resumo, inicio, fim)
+    
+    def query_resumo(self, inicio, fim):
+        """Executa as agregações do resumo (chamado fora da thread da interface)."""
+        with session_scope() as session:
+            return financial_summary(session, inicio, fim)
+    
+    def show_resumo(self, resumo):
+        """Exibe o resumo financeiro calculado."""
+        self.total_entradas_label.setText(format_currency(resumo.total_entradas))
+        self.total_despesas_label.setText(format_currency(resumo.total_despesas))
+        self.saldo_label.setText(f"R$ {format_number(resumo.saldo)}")
+        self.saldo_label.setStyleSheet(
+            f"font-weight: bold; color: {'darkgreen' if resumo.saldo >= 0 else 'darkred'};"
+        )
+        self.despesas_pagas_label.setText(format_currency(resumo.despesas_pagas))
+        self.despesas_pendentes_label.setText(format_currency(resumo.despesas_pendentes))
+        self.entradas_pendentes_label.setText(format_currency(resumo.entradas_pendentes))
+        
+        self.resumo_mensal_table.setRowCount(len(resumo.meses))
+        for i, (mes, entradas, despesas, saldo) in enumerate(resumo.meses):
+            self.resumo_mensal_table.setItem(i, 0, QTableWidgetItem(mes.strftime("%m/%Y")))
+            self.resumo_mensal_table.setItem(i, 1, QTableWidgetItem(format_currency(entradas)))
+            self.resumo_mensal_table.setItem(i, 2, QTableWidgetItem(format_currency(despesas)))
+            self.resumo_mensal_table.setItem(i, 3, QTableWidgetItem(f"R$ {format_number(saldo)}"))
+        
+        total = resumo.total_despesas
+        self.resumo_categoria_table.setRowCount(len(resumo.categorias))
+        for i, (categoria, valor) in enumerate(resumo.categorias):
+            self.resumo_categoria_table.setItem(i, 0, QTableWidgetItem(categoria))
+            self.resumo_categoria_table.setItem(i, 1, QTableWidgetItem(format_currency(valor)))
+            percentual = format_number(valor * 100 / total, 1) if total else "-"
+            self.resumo_categoria_table.setItem(i, 2, QTableWidgetItem(percentual))
+        
+        self.resumo_fornecedor_table.setRowCount(len(resumo.fornecedores))
+        for i, (fornecedor, valor) in enumerate(resumo.fornecedores):
+            self.resumo_fornecedor_table.setItem(i, 0, QTableWidgetItem(fornecedor))
+            self.resumo_fornecedor_table.setItem(i, 1, QTableWidgetItem(format_currency(valor)))
+        
+        self.resumo_cliente_table.setRowCount(len(resumo.clientes))
+        for i, (cliente, valor) in enumerate(resumo.clientes):
+            self.resumo_cliente_table.setItem(i, 0, QTableWidgetItem(cliente))
+            self.resumo_cliente_table.setItem(i, 1, QTableWidgetItem(format_currency(valor)))
     
     def load_entradas(self):
-        """Carrega as entradas do banco de dados para a tabela."""
-        try:
-            session = get_session()
-            entradas = session.query(Entrada).all()
-            
-            self.entradas_table.setRowCount(0)  # Limpar tabela
-            self.edit_entrada_buttons = {}  # Limpar referências de botões
-            
-            for i, entrada in enumerate(entradas):
-                self.entradas_table.insertRow(i)
-                self.entradas_table.setItem(i, 0, QTableWidgetItem(entrada.descricao))
-                
-                valor = "-"
-                if entrada.valor:
-                    # Formatação com separador de milhar
-                    valor = f"R$ {float(entrada.valor):,.2f}".replace(".", "X").replace(",", ".").replace("X", ",")
-                self.entradas_table.setItem(i, 1, QTableWidgetItem(valor))
-                
-                data = "-"
-                if entrada.data:
-                    data = entrada.data.strftime("%d/%m/%Y")
-                self.entradas_table.setItem(i, 2, QTableWidgetItem(data))
-                
-                self.entradas_table.setItem(i, 3, QTableWidgetItem(entrada.categoria or ""))
-                
-                recebido = "Sim" if entrada.recebido else "Não"
-                self.entradas_table.setItem(i, 4, QTableWidgetItem(recebido))
-                
-                # Adiciona botão editar na última coluna
-                edit_btn = QPushButton("Editar")
-                edit_btn.setMaximumWidth(60)  # Reduz largura do botão
-                edit_btn.setStyleSheet("font-size: 10px;")  # Reduz tamanho da fonte
-                
-                # Conectar o botão à edição do registro específico
-                edit_btn.clicked.connect(lambda checked, row=i: self.edit_entrada_from_button(row))
-                
-                # Armazenar referência ao botão para evitar coleta de lixo
-                self.edit_entrada_buttons[i] = edit_btn
-                
-                # Adicionar à tabela
-                self.entradas_table.setCellWidget(i, 5, edit_btn)
-            
-            session.close()
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao carregar entradas: {str(e)}")
+        """Recarrega as entradas que passam pelos filtros, a partir do primeiro bloco."""
+        self.entradas_model.set_filters(self.entradas_filters.conditions())
+        self.load_resumo()
     
-    def edit_entrada_from_button(self, row):
-        """Edita a entrada na linha especificada pelo botão."""
-        session = get_session()
-        entradas = session.query(Entrada).all()
+    def edit_entrada_from_button(self, entrada_id):
+        """Edita a entrada identificada pelo id da linha do botão."""
+        entrada = self.db.get(Entrada, entrada_id, options=[joinedload(Entrada.cliente)])
         
-        if row >= len(entradas):
+        if entrada is None:
             QMessageBox.warning(self, "Aviso", "Entrada não encontrada.")
-            session.close()
             return
         
-        entrada = entradas[row]
-        
-        dialog = EntradaDialog(self, entrada)
+        dialog = EntradaDialog(self, entrada, self.db)
         if dialog.exec() == QDialog.Accepted:
             self.load_entradas()
-        
-        session.close()
     
     def load_despesas(self):
-        """Carrega as despesas do banco de dados para a tabela."""
-        try:
-            session = get_session()
-            despesas = session.query(Despesa).all()
-            
-            self.despesas_table.setRowCount(0)  # Limpar tabela
-            self.edit_despesa_buttons = {}  # Limpar referências de botões
-            
-            for i, despesa in enumerate(despesas):
-                self.despesas_table.insertRow(i)
-                self.despesas_table.setItem(i, 0, QTableWidgetItem(despesa.descricao))
-                
-                valor = "-"
-                if despesa.valor:
-                    valor = f"R$ {float(despesa.valor):,.2f}".replace(".", "X").replace(",", ".").replace("X", ",")
-                self.despesas_table.setItem(i, 1, QTableWidgetItem(valor))
-                
-                self.despesas_table.setItem(i, 2, QTableWidgetItem(despesa.fornecedor or ""))
-                self.despesas_table.setItem(i, 3, QTableWidgetItem(despesa.produto or ""))
-                
-                data_retirada = "-"
-                if despesa.data_retirada:
-                    data_retirada = despesa.data_retirada.strftime("%d/%m/%Y")
-                self.despesas_table.setItem(i, 4, QTableWidgetItem(data_retirada))
-                
-                data_pagamento = "-"
-                if despesa.data_pagamento:
-                    data_pagamento = despesa.data_pagamento.strftime("%d/%m/%Y")
-                self.despesas_table.setItem(i, 5, QTableWidgetItem(data_pagamento))
-                
-                self.despesas_table.setItem(i, 6, QTableWidgetItem(despesa.categoria or ""))
-                self.despesas_table.setItem(i, 7, QTableWidgetItem(despesa.forma_pagamento or ""))
-                self.despesas_table.setItem(i, 8, QTableWidgetItem(despesa.status or ""))
-                self.despesas_table.setItem(i, 9, QTableWidgetItem(despesa.usuario or ""))
-                
-                data_registro = "-"
-                if despesa.data_registro:
-                    data_registro = despesa.data_registro.strftime("%d/%m/%Y %H:%M")
-                self.despesas_table.setItem(i, 10, QTableWidgetItem(data_registro))
-                
-                # Adiciona botão editar na última coluna
-                edit_btn = QPushButton("Editar")
-                edit_btn.setMaximumWidth(60)  # Reduz largura do botão
-                edit_btn.setStyleSheet("font-size: 10px;")  # Reduz tamanho da fonte
-                
-                # Conectar o botão à edição do registro específico
-                edit_btn.clicked.connect(lambda checked, row=i: self.edit_despesa_from_button(row))
-                
-                # Armazenar referência ao botão para evitar coleta de lixo
-                self.edit_despesa_buttons[i] = edit_btn
-                
-                # Adicionar à tabela
-                self.despesas_table.setCellWidget(i, 11, edit_btn)
-            
-            session.close()
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao carregar despesas: {str(e)}")
+        """Recarrega as despesas que passam pelos filtros, a partir do primeiro bloco."""
+        self.despesas_model.set_filters(self.despesas_filters.conditions())
+        self.load_resumo()
     
-    def edit_despesa_from_button(self, row):
-        """Edita a despesa na linha especificada pelo botão."""
-        session = get_session()
-        despesas = session.query(Despesa).all()
+    def apply_change(self, table, operation, row_id):
+        """Aplica uma alteração feita no banco por outro terminal."""
+        if table == Entrada.__tablename__:
+            self.db.expire(Entrada, row_id)
+            self.entradas_model.apply_change(operation, row_id)
+        elif table == Despesa.__tablename__:
+            self.db.expire(Despesa, row_id)
+            self.despesas_model.apply_change(operation, row_id)
+        else:
+            return
+        self.resumo_timer.start()
+    
+    def edit_despesa_from_button(self, despesa_id):
+        """Edita a despesa identificada pelo id da linha do botão."""
+        despesa = self.db.get(Despesa, despesa_id, options=[joinedload(Despesa.fornecedor)])
         
-        if row >= len(despesas):
+        if despesa is None:
             QMessageBox.warning(self, "Aviso", "Despesa não encontrada.")
-            session.close()
             return
         
-        despesa = despesas[row]
-        
-        dialog = DespesaDialog(self, despesa)
+        dialog = DespesaDialog(self, despesa, self.db)
         if dialog.exec() == QDialog.Accepted:
             self.load_despesas()
-        
-        session.close()
     
     def add_entrada(self):
         """Abre o diálogo para adicionar uma nova entrada."""
-        dialog = EntradaDialog(self)
+        dialog = EntradaDialog(self, db=self.db)
         if dialog.exec() == QDialog.Accepted:
             self.load_entradas()
     
     def add_despesa(self):
         """Abre o diálogo para adicionar uma nova despesa."""
-        dialog = DespesaDialog(self)
+        dialog = DespesaDialog(self, db=self.db)
         if dialog.exec() == QDialog.Accepted:
             self.load_despesas()
     
+    def import_entradas(self):
+        """Importa entradas de um arquivo CSV (cadastrando os clientes novos)."""
+        if import_file(self, Entrada, "Importar Entradas"):
+            cliente_search.invalidate()
+            self.load_entradas()
+    
+    def import_despesas(self):
+        """Importa despesas de um arquivo CSV (cadastrando os fornecedores novos)."""
+        if import_file(self, Despesa, "Importar Despesas"):
+            fornecedor_search.invalidate()
+            self.load_despesas()
+    
     def delete_entrada(self):
         """Exclui a entrada selecionada."""
-        selected_items = self.entradas_table.selectedItems()
-        if not selected_items:
+        selected_rows = self.entradas_table.selectionModel().selectedRows()
+        if not selected_rows:
             QMessageBox.warning(self, "Aviso", "Selecione uma entrada para excluir.")
             return
         
-        row = selected_items[0].row()
+        entrada_id = self.entradas_model.row_id(selected_rows[0].row())
         
         confirm = QMessageBox.question(
             self,
@@ -303,30 +474,25 @@ class FinanceiroTab(QWidget):
         
         if confirm == QMessageBox.Yes:
             try:
-                session = get_session()
-                entradas = session.query(Entrada).all()
+                entrada = self.db.get(Entrada, entrada_id)
                 
-                if row < len(entradas):
-                    entrada = entradas[row]
-                    session.delete(entrada)
-                    session.commit()
+                if entrada is not None:
+                    self.db.delete(entrada)
                     QMessageBox.information(self, "Sucesso", "Entrada excluída com sucesso.")
                     self.load_entradas()
                 else:
                     QMessageBox.warning(self, "Aviso", "Entrada não encontrada.")
-                
-                session.close()
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Erro ao excluir entrada: {str(e)}")
     
     def delete_despesa(self):
         """Exclui a despesa selecionada."""
-        selected_items = self.despesas_table.selectedItems()
-        if not selected_items:
+        selected_rows = self.despesas_table.selectionModel().selectedRows()
+        if not selected_rows:
             QMessageBox.warning(self, "Aviso", "Selecione uma despesa para excluir.")
             return
         
-        row = selected_items[0].row()
+        despesa_id = self.despesas_model.row_id(selected_rows[0].row())
         
         confirm = QMessageBox.question(
             self,
@@ -337,29 +503,27 @@ class FinanceiroTab(QWidget):
         
         if confirm == QMessageBox.Yes:
             try:
-                session = get_session()
-                despesas = session.query(Despesa).all()
+                despesa = self.db.get(Despesa, despesa_id)
                 
-                if row < len(despesas):
-                    despesa = despesas[row]
-                    session.delete(despesa)
-                    session.commit()
+                if despesa is not None:
+                    self.db.delete(despesa)
                     QMessageBox.information(self, "Sucesso", "Despesa excluída com sucesso.")
                     self.load_despesas()
                 else:
                     QMessageBox.warning(self, "Aviso", "Despesa não encontrada.")
-                
-                session.close()
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Erro ao excluir despesa: {str(e)}")
 
 
+@track_actions
 class DespesaDialog(QDialog):
     """Diálogo para adicionar ou editar despesa."""
     
-    def __init__(self, parent=None, despesa=None):
+    def __init__(self, parent=None, despesa=None, db=None):
         super().__init__(parent)
         self.despesa = despesa
+        # Sessão da aba que abriu o diálogo, onde o registro foi carregado
+        self.db = db or TabSession()
         self.setup_ui()
         
         if despesa:
@@ -384,11 +548,11 @@ class DespesaDialog(QDialog):
         self.valor_input = QLineEdit()
         form_layout.addRow("Valor (R$):", self.valor_input)
         
-        # Fornecedor como ComboBox com botão Editar Fornecedor
+        # Fornecedor com autocompletar (busca por prefixo no banco) e botão Editar Fornecedor
         fornecedor_layout = QHBoxLayout()
-        self.fornecedor_input = QComboBox()
-        self.fornecedor_input.setEditable(True)
-        self.carregar_fornecedores()
+        self.fornecedor_input = QLineEdit()
+        self.fornecedor_input.setPlaceholderText("Digite o início do nome")
+        self.fornecedor_completer = SearchCompleter(self.fornecedor_input, fornecedor_search)
         fornecedor_layout.addWidget(self.fornecedor_input)
         
         self.editar_fornecedor_button = QPushButton("Editar")
@@ -431,10 +595,7 @@ class DespesaDialog(QDialog):
         # Categoria com botão Editar
         categoria_layout = QHBoxLayout()
         self.categoria_input = QComboBox()
-        self.categoria_input.addItems([
-            "Insumos", "Combustível", "Manutenção", "Salários", 
-            "Impostos", "Aluguel", "Serviços", "Outros"
-        ])
+        self.categoria_input.addItems(CATEGORIAS_DESPESA)
         self.categoria_input.setEditable(True)
         categoria_layout.addWidget(self.categoria_input)
         
@@ -446,10 +607,7 @@ class DespesaDialog(QDialog):
         # Forma de pagamento com botão Editar
         forma_pagamento_layout = QHBoxLayout()
         self.forma_pagamento_input = QComboBox()
-        self.forma_pagamento_input.addItems([
-            "Dinheiro", "Cartão de Crédito", "Cartão de Débito", 
-            "Transferência", "PIX", "Boleto", "Cheque"
-        ])
+        self.forma_pagamento_input.addItems(FORMAS_PAGAMENTO)
         self.forma_pagamento_input.setEditable(True)
         forma_pagamento_layout.addWidget(self.forma_pagamento_input)
         
@@ -476,32 +634,13 @@ class DespesaDialog(QDialog):
         
         layout.addLayout(buttons_layout)
     
-    def carregar_fornecedores(self):
-        """Carrega a lista de fornecedores no ComboBox."""
-        try:
-            session = get_session()
-            fornecedores = session.query(Fornecedor).order_by(Fornecedor.nome).all()
-            
-            self.fornecedor_input.clear()
-            self.fornecedor_input.addItem("")  # Item vazio
-            
-            for fornecedor in fornecedores:
-                self.fornecedor_input.addItem(fornecedor.nome)
-                
-            session.close()
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao carregar fornecedores: {str(e)}")
-    
     def abrir_dialogo_fornecedor(self):
         """Abre o diálogo para adicionar um novo fornecedor."""
         dialog = FornecedorDialog(self)
         if dialog.exec() == QDialog.Accepted:
-            self.carregar_fornecedores()
             # Selecionar o fornecedor recém-adicionado
             if dialog.nome_fornecedor:  # Usar nome diretamente ao invés do objeto fornecedor
-                index = self.fornecedor_input.findText(dialog.nome_fornecedor)
-                if index >= 0:
-                    self.fornecedor_input.setCurrentIndex(index)
+                self.fornecedor_input.setText(dialog.nome_fornecedor)
     
     def populate_fields(self):
         """Preenche os campos com os dados da despesa a ser editada."""
@@ -512,11 +651,7 @@ class DespesaDialog(QDialog):
         
         # Fornecedor
         if self.despesa.fornecedor:
-            index = self.fornecedor_input.findText(self.despesa.fornecedor)
-            if index >= 0:
-                self.fornecedor_input.setCurrentIndex(index)
-            else:
-                self.fornecedor_input.setCurrentText(self.despesa.fornecedor)
+            self.fornecedor_input.setText(self.despesa.fornecedor.nome)
         
         # Produto Retirado
         self.produto_retirado_input.setChecked(self.despesa.produto_retirado)
@@ -580,15 +715,42 @@ class DespesaDialog(QDialog):
             QMessageBox.warning(self, "Aviso", "O valor da despesa deve ser um número válido.")
             return
         
+        nome_fornecedor = self.fornecedor_input.text().strip()
+        fornecedor_id = None
+        if nome_fornecedor:
+            try:
+                fornecedor_id = buscar_cadastro(Fornecedor, nome_fornecedor)
+            except Exception as e:
+                QMessageBox.critical(self, "Erro", f"Erro ao buscar fornecedor: {str(e)}")
+                return
+            if fornecedor_id is None:
+                confirm = QMessageBox.question(
+                    self,
+                    "Novo Fornecedor",
+                    f"O fornecedor '{nome_fornecedor}' não está cadastrado. Deseja cadastrá-lo?",
+                    QMessageBox.Yes | QMessageBox.No
+                )
+                if confirm != QMessageBox.Yes:
+                    return
+        
         try:
-            session = get_session()
+            # O relacionamento é atribuído, e não só o id: despesa.fornecedor já está
+            # carregado e, sem expirar no commit, continuaria no fornecedor anterior
+            if fornecedor_id is not None:
+                fornecedor = self.db.get(Fornecedor, fornecedor_id)
+            elif nome_fornecedor:
+                # Cadastrado junto com a despesa, na mesma transação
+                fornecedor = Fornecedor(nome=nome_fornecedor)
+            else:
+                fornecedor = None
             
-            # Criar ou atualizar despesa
+            # Criar ou atualizar despesa (na sessão da aba)
             if not self.despesa:
                 self.despesa = Despesa()
-                session.add(self.despesa)
                 # Para novas despesas, definir a data de adição atual
                 self.despesa.data_adicionou = datetime.datetime.now().date()
+                self.despesa.data_registro = datetime.datetime.now()
+            self.despesa = self.db.attach(self.despesa)
             
             # Atualizar dados
             self.despesa.descricao = self.descricao_input.text().strip()
@@ -598,7 +760,7 @@ class DespesaDialog(QDialog):
             self.despesa.data = self.data_pagamento_input.date().toPyDate()
             
             # Novas colunas
-            self.despesa.fornecedor = self.fornecedor_input.currentText().strip()
+            self.despesa.fornecedor = fornecedor
             self.despesa.produto_retirado = self.produto_retirado_input.isChecked()
             self.despesa.data_retirada = self.data_retirada_input.date().toPyDate()
             self.despesa.data_pagamento = self.data_pagamento_input.date().toPyDate()
@@ -610,7 +772,9 @@ class DespesaDialog(QDialog):
             self.despesa.observacoes = self.obs_input.toPlainText().strip()
             
             # Commit
-            session.commit()
+            self.db.commit()
+            if nome_fornecedor and fornecedor_id is None:
+                fornecedor_search.invalidate()
             
             # Fechar diálogo
             self.accept()
@@ -620,20 +784,20 @@ class DespesaDialog(QDialog):
                 "Sucesso",
                 "Despesa salva com sucesso!"
             )
-            
-            session.close()
         except Exception as e:
+            self.db.rollback()
             QMessageBox.critical(self, "Erro", f"Erro ao salvar despesa: {str(e)}")
-            session.rollback()
-            session.close()
 
 
+@track_actions
 class EntradaDialog(QDialog):
     """Diálogo para adicionar ou editar entrada."""
     
-    def __init__(self, parent=None, entrada=None):
+    def __init__(self, parent=None, entrada=None, db=None):
         super().__init__(parent)
         self.entrada = entrada
+        # Sessão da aba que abriu o diálogo, onde o registro foi carregado
+        self.db = db or TabSession()
         self.setup_ui()
         
         if entrada:
@@ -668,10 +832,7 @@ class EntradaDialog(QDialog):
         # Categoria com botão Editar
         categoria_layout = QHBoxLayout()
         self.categoria_input = QComboBox()
-        self.categoria_input.addItems([
-            "Venda de Produção", "Prestação de Serviços", "Aluguel", 
-            "Subsídios", "Outros"
-        ])
+        self.categoria_input.addItems(CATEGORIAS_ENTRADA)
         self.categoria_input.setEditable(True)
         categoria_layout.addWidget(self.categoria_input)
         
@@ -681,15 +842,15 @@ class EntradaDialog(QDialog):
         
         form_layout.addRow("Categoria:", categoria_layout)
         
-        # Cliente como ComboBox com botão Editar
+        # Cliente com autocompletar (busca por prefixo no banco) e botão Editar
         cliente_layout = QHBoxLayout()
-        self.cliente_input = QComboBox()
-        self.cliente_input.setEditable(True)
-        self.carregar_clientes()  # Método a ser implementado
+        self.cliente_input = QLineEdit()
+        self.cliente_input.setPlaceholderText("Digite o início do nome")
+        self.cliente_completer = SearchCompleter(self.cliente_input, cliente_search)
         cliente_layout.addWidget(self.cliente_input)
         
         self.editar_cliente_button = QPushButton("Editar")
-        # self.editar_cliente_button.clicked.connect(self.editar_clientes)
+        self.editar_cliente_button.clicked.connect(self.abrir_dialogo_cliente)
         cliente_layout.addWidget(self.editar_cliente_button)
         
         form_layout.addRow("Cliente:", cliente_layout)
@@ -697,10 +858,7 @@ class EntradaDialog(QDialog):
         # Forma de pagamento com botão Editar
         forma_pagamento_layout = QHBoxLayout()
         self.forma_pagamento_input = QComboBox()
-        self.forma_pagamento_input.addItems([
-            "Dinheiro", "Cartão de Crédito", "Cartão de Débito", 
-            "Transferência", "PIX", "Boleto", "Cheque"
-        ])
+        self.forma_pagamento_input.addItems(FORMAS_PAGAMENTO)
         self.forma_pagamento_input.setEditable(True)
         forma_pagamento_layout.addWidget(self.forma_pagamento_input)
         
@@ -732,13 +890,11 @@ class EntradaDialog(QDialog):
         
         layout.addLayout(buttons_layout)
     
-    def carregar_clientes(self):
-        """Carrega a lista de clientes no ComboBox."""
-        # Implementação futura: carregar clientes do banco de dados
-        # Por enquanto, adiciona apenas alguns clientes fictícios
-        self.cliente_input.clear()
-        self.cliente_input.addItem("")  # Item vazio
-        self.cliente_input.addItems(["Cliente 1", "Cliente 2", "Cliente 3"])
+    def abrir_dialogo_cliente(self):
+        """Abre o diálogo para adicionar um novo cliente."""
+        dialog = ClienteDialog(self)
+        if dialog.exec() == QDialog.Accepted and dialog.nome_cliente:
+            self.cliente_input.setText(dialog.nome_cliente)
     
     def populate_fields(self):
         """Preenche os campos com os dados da entrada a ser editada."""
@@ -763,16 +919,12 @@ class EntradaDialog(QDialog):
             else:
                 self.categoria_input.setCurrentText(self.entrada.categoria)
         
-        # Cliente como ComboBox
+        # Cliente
         if self.entrada.cliente:
-            index = self.cliente_input.findText(self.entrada.cliente)
-            if index >= 0:
-                self.cliente_input.setCurrentIndex(index)
-            else:
-                self.cliente_input.setCurrentText(self.entrada.cliente)
+            self.cliente_input.setText(self.entrada.cliente.nome)
         
-        # Forma de pagamento (campo a ser adicionado no modelo Entrada)
-        if hasattr(self.entrada, 'forma_pagamento') and self.entrada.forma_pagamento:
+        # Forma de pagamento
+        if self.entrada.forma_pagamento:
             index = self.forma_pagamento_input.findText(self.entrada.forma_pagamento)
             if index >= 0:
                 self.forma_pagamento_input.setCurrentIndex(index)
@@ -804,30 +956,53 @@ class EntradaDialog(QDialog):
             QMessageBox.warning(self, "Aviso", "O valor da entrada deve ser um número válido.")
             return
         
+        nome_cliente = self.cliente_input.text().strip()
+        cliente_id = None
+        if nome_cliente:
+            try:
+                cliente_id = buscar_cadastro(Cliente, nome_cliente)
+            except Exception as e:
+                QMessageBox.critical(self, "Erro", f"Erro ao buscar cliente: {str(e)}")
+                return
+            if cliente_id is None:
+                confirm = QMessageBox.question(
+                    self,
+                    "Novo Cliente",
+                    f"O cliente '{nome_cliente}' não está cadastrado. Deseja cadastrá-lo?",
+                    QMessageBox.Yes | QMessageBox.No
+                )
+                if confirm != QMessageBox.Yes:
+                    return
+        
         try:
-            session = get_session()
+            # Como na despesa, o relacionamento é atribuído para não ficar no cliente anterior
+            if cliente_id is not None:
+                cliente = self.db.get(Cliente, cliente_id)
+            elif nome_cliente:
+                # Cadastrado junto com a entrada, na mesma transação
+                cliente = Cliente(nome=nome_cliente)
+            else:
+                cliente = None
             
-            # Criar ou atualizar entrada
-            if not self.entrada:
-                self.entrada = Entrada()
-                session.add(self.entrada)
+            # Criar ou atualizar entrada (na sessão da aba)
+            self.entrada = self.db.attach(self.entrada or Entrada())
             
             # Atualizar dados
             self.entrada.descricao = self.descricao_input.text().strip()
             self.entrada.valor = valor
             self.entrada.data = self.data_input.date().toPyDate()
             self.entrada.categoria = self.categoria_input.currentText()
-            self.entrada.cliente = self.cliente_input.currentText().strip() # Alterado para ComboBox
+            self.entrada.cliente = cliente
             
-            # Forma de pagamento (campo a ser adicionado no modelo Entrada)
-            if hasattr(self.entrada, 'forma_pagamento'):
-                self.entrada.forma_pagamento = self.forma_pagamento_input.currentText()
+            self.entrada.forma_pagamento = self.forma_pagamento_input.currentText()
             
             self.entrada.recebido = self.recebido_input.isChecked()
             self.entrada.observacoes = self.obs_input.toPlainText().strip()
             
             # Commit
-            session.commit()
+            self.db.commit()
+            if nome_cliente and cliente_id is None:
+                cliente_search.invalidate()
             
             # Fechar diálogo
             self.accept()
@@ -837,14 +1012,12 @@ class EntradaDialog(QDialog):
                 "Sucesso",
                 "Entrada salva com sucesso!"
             )
-            
-            session.close()
         except Exception as e:
+            self.db.rollback()
             QMessageBox.critical(self, "Erro", f"Erro ao salvar entrada: {str(e)}")
-            session.rollback()
-            session.close()
 
 
+@track_actions
 class FornecedorDialog(QDialog):
     """Diálogo para adicionar um novo fornecedor."""
     
@@ -908,37 +1081,36 @@ class FornecedorDialog(QDialog):
             return
         
         try:
-            session = get_session()
-            
-            # Verificar se já existe um fornecedor com o mesmo nome
-            nome = self.nome_input.text().strip()
-            existing = session.query(Fornecedor).filter(Fornecedor.nome == nome).first()
-            
-            if existing:
-                QMessageBox.warning(
-                    self, 
-                    "Aviso", 
-                    f"Já existe um fornecedor com o nome '{nome}'."
-                )
-                session.close()
-                return
-            
-            # Criar novo fornecedor
-            self.fornecedor = Fornecedor()
-            session.add(self.fornecedor)
-            
-            # Atualizar dados
-            self.fornecedor.nome = nome
-            self.nome_fornecedor = nome  # Salvar o nome como string para usar depois
-            self.fornecedor.telefone = self.telefone_input.text().strip()
-            self.fornecedor.email = self.email_input.text().strip()
-            self.fornecedor.cnpj = self.cnpj_input.text().strip()
-            self.fornecedor.endereco = self.endereco_input.toPlainText().strip()
-            self.fornecedor.observacoes = self.obs_input.toPlainText().strip()
-            self.fornecedor.data_cadastro = datetime.datetime.now().date()
+            # Unidade de trabalho própria: confirmada ao sair do bloco, desfeita em caso de erro
+            with session_scope() as session:
+                # Verificar se já existe um fornecedor com o mesmo nome
+                nome = self.nome_input.text().strip()
+                existing = session.query(Fornecedor).filter(Fornecedor.nome == nome).first()
+                
+                if existing:
+                    QMessageBox.warning(
+                        self, 
+                        "Aviso", 
+                        f"Já existe um fornecedor com o nome '{nome}'."
+                    )
+                    return
+                
+                # Criar novo fornecedor
+                self.fornecedor = Fornecedor()
+                session.add(self.fornecedor)
+                
+                # Atualizar dados
+                self.fornecedor.nome = nome
+                self.nome_fornecedor = nome  # Salvar o nome como string para usar depois
+                self.fornecedor.telefone = self.telefone_input.text().strip()
+                self.fornecedor.email = self.email_input.text().strip()
+                self.fornecedor.cnpj = self.cnpj_input.text().strip()
+                self.fornecedor.endereco = self.endereco_input.toPlainText().strip()
+                self.fornecedor.observacoes = self.obs_input.toPlainText().strip()
+                self.fornecedor.data_cadastro = datetime.datetime.now().date()
             
-            # Commit
-            session.commit()
+            # O novo nome precisa aparecer no autocompletar
+            fornecedor_search.invalidate()
             
             # Fechar diálogo
             self.accept()
@@ -948,9 +1120,93 @@ class FornecedorDialog(QDialog):
                 "Sucesso",
                 "Fornecedor cadastrado com sucesso!"
             )
-            
-            session.close()
         except Exception as e:
             QMessageBox.critical(self, "Erro", f"Erro ao salvar fornecedor: {str(e)}")
-            session.rollback()
-            session.close() 
\ No newline at end of file
+
+
+@track_actions
+class ClienteDialog(QDialog):
+    """Diálogo para adicionar um novo cliente."""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.nome_cliente = None
+        self.setup_ui()
+        self.setWindowTitle("Novo Cliente")
+    
+    def setup_ui(self):
+        """Configura a interface do diálogo."""
+        self.setMinimumWidth(400)
+        
+        layout = QVBoxLayout(self)
+        
+        # Formulário
+        form_layout = QFormLayout()
+        
+        self.nome_input = QLineEdit()
+        form_layout.addRow("Nome:", self.nome_input)
+        
+        self.telefone_input = QLineEdit()
+        form_layout.addRow("Telefone:", self.telefone_input)
+        
+        self.email_input = QLineEdit()
+        form_layout.addRow("E-mail:", self.email_input)
+        
+        self.cpf_cnpj_input = QLineEdit()
+        form_layout.addRow("CPF/CNPJ:", self.cpf_cnpj_input)
+        
+        self.endereco_input = QTextEdit()
+        self.endereco_input.setMaximumHeight(80)
+        form_layout.addRow("Endereço:", self.endereco_input)
+        
+        self.obs_input = QTextEdit()
+        self.obs_input.setMaximumHeight(80)
+        form_layout.addRow("Observações:", self.obs_input)
+        
+        layout.addLayout(form_layout)
+        
+        # Botões
+        buttons_layout = QHBoxLayout()
+        
+        self.cancel_button = QPushButton("Cancelar")
+        self.cancel_button.clicked.connect(self.reject)
+        buttons_layout.addWidget(self.cancel_button)
+        
+        self.save_button = QPushButton("Salvar")
+        self.save_button.clicked.connect(self.save_cliente)
+        buttons_layout.addWidget(self.save_button)
+        
+        layout.addLayout(buttons_layout)
+    
+    def save_cliente(self):
+        """Salva o cliente no banco de dados."""
+        nome = self.nome_input.text().strip()
+        if not nome:
+            QMessageBox.warning(self, "Aviso", "O nome do cliente é obrigatório.")
+            return
+        
+        try:
+            with session_scope() as session:
+                if session.scalar(select(Cliente.id).where(Cliente.nome == nome)) is not None:
+                    QMessageBox.warning(self, "Aviso", f"Já existe um cliente com o nome '{nome}'.")
+                    return
+                
+                session.add(Cliente(
+                    nome=nome,
+                    telefone=self.telefone_input.text().strip(),
+                    email=self.email_input.text().strip(),
+                    cpf_cnpj=self.cpf_cnpj_input.text().strip(),
+                    endereco=self.endereco_input.toPlainText().strip(),
+                    observacoes=self.obs_input.toPlainText().strip(),
+                    data_cadastro=datetime.datetime.now().date()
+                ))
+            self.nome_cliente = nome
+            
+            # O novo nome precisa aparecer no autocompletar
+            cliente_search.invalidate()
+            
+            self.accept()
+            
+            QMessageBox.information(self, "Sucesso", "Cliente cadastrado com sucesso!")
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Erro ao salvar cliente: {str(e)}")
@@ -1,17 +1,29 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
-    QTableWidgetItem, QPushButton, QLabel, QDialog,
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView, QTableWidget, QTableWidgetItem,
+    QAbstractItemView, QPushButton, QLabel, QDialog,
     QFormLayout, QLineEdit, QDateEdit, QTextEdit, QComboBox,
-    QMessageBox, QHeaderView, QCheckBox
+    QMessageBox, QHeaderView, QCheckBox, QDoubleSpinBox
 )
 from PyQt5.QtCore import Qt, QDate
 
-from database import get_session, Funcionario
+from database import session_scope, TabSession, Funcionario
+from database.payroll import preview_payroll, run_payroll
+from database.reports import month_range
+from ..formatters import format_currency, format_date, format_bool
+from ..delegates import ActionButtonDelegate
+from ..table_model import LazyTableModel, TableColumn
+from ..export_dialog import export_table
+from ..workers import BackgroundLoader
+from ..actions import track_actions
 
+@track_actions
 class FuncionariosTab(QWidget):
     def __init__(self):
         super().__init__()
         
+        # Sessão da aba: registros editados pelos diálogos são lidos e gravados nela
+        self.db = TabSession()
+        
         # Layout principal
         self.layout = QVBoxLayout(self)
         
@@ -35,15 +47,45 @@ class FuncionariosTab(QWidget):
         self.refresh_button.clicked.connect(self.load_funcionarios)
         self.action_layout.addWidget(self.refresh_button)
         
+        self.export_button = QPushButton("Exportar")
+        self.export_button.clicked.connect(lambda: export_table(self, self.model, "funcionarios"))
+        self.action_layout.addWidget(self.export_button)
+        
+        self.payroll_button = QPushButton("Folha de Pagamento")
+        self.payroll_button.clicked.connect(self.run_payroll)
+        self.action_layout.addWidget(self.payroll_button)
+        
+        # Indicador exibido enquanto os dados são carregados em segundo plano
+        self.loading_label = QLabel("Carregando...")
+        self.loading_label.setVisible(False)
+        self.action_layout.addWidget(self.loading_label)
+        
         self.layout.addLayout(self.action_layout)
         
         # Tabela de funcionários
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)  # Aumentado para incluir coluna do botão Editar
-        self.table.setHorizontalHeaderLabels([
-            "Nome", "CPF", "Cargo", "Salário (R$)", 
-            "Data Contratação", "Ativo", "Ações"
+        self.model = LazyTableModel(Funcionario, [
+            TableColumn("Nome", Funcionario.nome),
+            TableColumn("CPF", Funcionario.cpf),
+            TableColumn("Cargo", Funcionario.cargo),
+            TableColumn("Salário (R$)", Funcionario.salario, format_currency),
+            TableColumn("Data Contratação", Funcionario.data_contratacao, format_date),
+            TableColumn("Ativo", Funcionario.ativo, format_bool),
+            TableColumn("Ações"),
         ])
+        self.model.loading_changed.connect(self.loading_label.setVisible)
+        self.model.load_failed.connect(
+            lambda erro: QMessageBox.critical(self, "Erro", f"Erro ao carregar funcionários: {erro}")
+        )
+        
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        # Ordenação pelo cabeçalho feita no banco, sobre os valores originais
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        # Botões da coluna Ações desenhados pelo delegate, sem um widget por linha
+        self.actions_delegate = ActionButtonDelegate({"Editar": self.edit_funcionario_from_button}, self.table)
+        self.table.setItemDelegateForColumn(6, self.actions_delegate)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         # Definir largura da coluna de ações
         self.table.horizontalHeader().setSectionResizeMode(6, QHeaderView.ResizeToContents)
@@ -51,113 +93,58 @@ class FuncionariosTab(QWidget):
         
         # Carregar dados iniciais
         self.load_funcionarios()
-        
-        # Dicionário para armazenar os botões de editar
-        self.edit_buttons = {}
     
     def load_funcionarios(self):
-        """Carrega os funcionários do banco de dados para a tabela."""
-        try:
-            session = get_session()
-            funcionarios = session.query(Funcionario).all()
-            
-            self.table.setRowCount(0)  # Limpar tabela
-            self.edit_buttons = {}  # Limpar referências de botões
-            
-            for i, funcionario in enumerate(funcionarios):
-                self.table.insertRow(i)
-                self.table.setItem(i, 0, QTableWidgetItem(funcionario.nome))
-                self.table.setItem(i, 1, QTableWidgetItem(funcionario.cpf or ""))
-                self.table.setItem(i, 2, QTableWidgetItem(funcionario.cargo or ""))
-                
-                salario = "-"
-                if funcionario.salario:
-                    salario = f"R$ {float(funcionario.salario):,.2f}".replace(".", "X").replace(",", ".").replace("X", ",")
-                self.table.setItem(i, 3, QTableWidgetItem(salario))
-                
-                data = "-"
-                if funcionario.data_contratacao:
-                    data = funcionario.data_contratacao.strftime("%d/%m/%Y")
-                self.table.setItem(i, 4, QTableWidgetItem(data))
-                
-                ativo = "Sim" if funcionario.ativo else "Não"
-                self.table.setItem(i, 5, QTableWidgetItem(ativo))
-                
-                # Adiciona botão editar na última coluna
-                edit_btn = QPushButton("Editar")
-                edit_btn.setMaximumWidth(60)  # Reduz largura do botão
-                edit_btn.setStyleSheet("font-size: 10px;")  # Reduz tamanho da fonte
-                
-                # Conectar o botão à edição do registro específico
-                edit_btn.clicked.connect(lambda checked, row=i: self.edit_funcionario_from_button(row))
-                
-                # Armazenar referência ao botão para evitar coleta de lixo
-                self.edit_buttons[i] = edit_btn
-                
-                # Adicionar à tabela
-                self.table.setCellWidget(i, 6, edit_btn)
-            
-            session.close()
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao carregar funcionários: {str(e)}")
+        """Recarrega os funcionários do banco de dados, a partir do primeiro bloco."""
+        self.model.refresh()
     
-    def edit_funcionario_from_button(self, row):
-        """Edita o funcionário na linha especificada pelo botão."""
-        session = get_session()
-        funcionarios = session.query(Funcionario).all()
+    def apply_change(self, table, operation, row_id):
+        """Aplica uma alteração feita no banco por outro terminal."""
+        if table == Funcionario.__tablename__:
+            self.db.expire(Funcionario, row_id)
+            self.model.apply_change(operation, row_id)
+    
+    def edit_funcionario_from_button(self, funcionario_id):
+        """Edita o funcionário identificado pelo id da linha do botão."""
+        funcionario = self.db.get(Funcionario, funcionario_id)
         
-        if row >= len(funcionarios):
+        if funcionario is None:
             QMessageBox.warning(self, "Aviso", "Funcionário não encontrado.")
-            session.close()
             return
         
-        funcionario = funcionarios[row]
-        
-        dialog = FuncionarioDialog(self, funcionario)
+        dialog = FuncionarioDialog(self, funcionario, self.db)
         if dialog.exec() == QDialog.Accepted:
             self.load_funcionarios()
-        
-        session.close()
     
     def add_funcionario(self):
         """Abre o diálogo para adicionar um novo funcionário."""
-        dialog = FuncionarioDialog(self)
+        dialog = FuncionarioDialog(self, db=self.db)
         if dialog.exec() == QDialog.Accepted:
             self.load_funcionarios()
     
     def edit_funcionario(self):
         """Abre o diálogo para editar o funcionário selecionado."""
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        selected_rows = self.table.selectionModel().selectedRows()
+        if not selected_rows:
             QMessageBox.warning(self, "Aviso", "Selecione um funcionário para editar.")
             return
         
-        row = selected_items[0].row()
-        
-        session = get_session()
-        funcionarios = session.query(Funcionario).all()
-        
-        if row >= len(funcionarios):
-            QMessageBox.warning(self, "Aviso", "Funcionário não encontrado.")
-            session.close()
-            return
-        
-        funcionario = funcionarios[row]
-        
-        dialog = FuncionarioDialog(self, funcionario)
-        if dialog.exec() == QDialog.Accepted:
-            self.load_funcionarios()
-        
-        session.close()
+        row = selected_rows[0].row()
+        self.edit_funcionario_from_button(self.model.row_id(row))
+    
+    def run_payroll(self):
+        """Abre o diálogo da folha de pagamento mensal."""
+        dialog = PayrollDialog(self)
+        dialog.exec()
     
     def delete_funcionario(self):
         """Exclui o funcionário selecionado."""
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        selected_rows = self.table.selectionModel().selectedRows()
+        if not selected_rows:
             QMessageBox.warning(self, "Aviso", "Selecione um funcionário para excluir.")
             return
         
-        row = selected_items[0].row()
+        funcionario_id = self.model.row_id(selected_rows[0].row())
         
         confirm = QMessageBox.question(
             self,
@@ -168,29 +155,27 @@ class FuncionariosTab(QWidget):
         
         if confirm == QMessageBox.Yes:
             try:
-                session = get_session()
-                funcionarios = session.query(Funcionario).all()
+                funcionario = self.db.get(Funcionario, funcionario_id)
                 
-                if row < len(funcionarios):
-                    funcionario = funcionarios[row]
-                    session.delete(funcionario)
-                    session.commit()
+                if funcionario is not None:
+                    self.db.delete(funcionario)
                     QMessageBox.information(self, "Sucesso", "Funcionário excluído com sucesso.")
                     self.load_funcionarios()
                 else:
                     QMessageBox.warning(self, "Aviso", "Funcionário não encontrado.")
-                
-                session.close()
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Erro ao excluir funcionário: {str(e)}")
 
 
+@track_actions
 class FuncionarioDialog(QDialog):
     """Diálogo para adicionar ou editar funcionário."""
     
-    def __init__(self, parent=None, funcionario=None):
+    def __init__(self, parent=None, funcionario=None, db=None):
         super().__init__(parent)
         self.funcionario = funcionario
+        # Sessão da aba que abriu o diálogo, onde o registro foi carregado
+        self.db = db or TabSession()
         self.setup_ui()
         
         if funcionario:
@@ -302,12 +287,8 @@ class FuncionarioDialog(QDialog):
             return
         
         try:
-            session = get_session()
-            
-            # Criar ou atualizar funcionário
-            if not self.funcionario:
-                self.funcionario = Funcionario()
-                session.add(self.funcionario)
+            # Criar ou atualizar funcionário (na sessão da aba)
+            self.funcionario = self.db.attach(self.funcionario or Funcionario())
             
             # Atualizar dados
             self.funcionario.nome = self.nome_input.text().strip()
@@ -327,7 +308,7 @@ class FuncionarioDialog(QDialog):
             self.funcionario.endereco = self.endereco_input.toPlainText().strip()
             
             # Commit
-            session.commit()
+            self.db.commit()
             
             # Fechar diálogo
             self.accept()
@@ -337,9 +318,175 @@ class FuncionarioDialog(QDialog):
                 "Sucesso",
                 "Funcionário salvo com sucesso!"
             )
-            
-            session.close()
         except Exception as e:
+            self.db.rollback()
             QMessageBox.critical(self, "Erro", f"Erro ao salvar funcionário: {str(e)}")
-            session.rollback()
-            session.close() 
\ No newline at end of file
+
+
+@track_actions
+class PayrollDialog(QDialog):
+    """Gera, de uma vez, os pagamentos do mês de todos os funcionários ativos.
+
+    O cálculo e a gravação rodam em segundo plano; a prévia é exibida antes
+    de gravar, e todos os pagamentos são confirmados em uma única transação.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.preview = None
+        self.setWindowTitle("Folha de Pagamento")
+        self.setMinimumSize(700, 500)
+        self.setup_ui()
+        
+        self.loader = BackgroundLoader(self)
+        self.loader.loaded.connect(self.show_preview)
+        self.loader.failed.connect(self.show_failure)
+        self.loader.busy_changed.connect(self.set_busy)
+        
+        self.writer = BackgroundLoader(self)
+        self.writer.loaded.connect(self.show_result)
+        self.writer.failed.connect(self.show_failure)
+        self.writer.busy_changed.connect(self.set_busy)
+    
+    def setup_ui(self):
+        """Configura a interface do diálogo."""
+        layout = QVBoxLayout(self)
+        form_layout = QFormLayout()
+        
+        self.mes_input = QDateEdit()
+        self.mes_input.setDisplayFormat("MM/yyyy")
+        self.mes_input.setCalendarPopup(True)
+        self.mes_input.setDate(QDate.currentDate())
+        self.mes_input.dateChanged.connect(self.mes_changed)
+        form_layout.addRow("Mês de referência:", self.mes_input)
+        
+        self.data_pagamento_input = QDateEdit()
+        self.data_pagamento_input.setDisplayFormat("dd/MM/yyyy")
+        self.data_pagamento_input.setCalendarPopup(True)
+        form_layout.addRow("Data de pagamento:", self.data_pagamento_input)
+        
+        self.bonus_input = QDoubleSpinBox()
+        self.bonus_input.setRange(0, 100)
+        self.bonus_input.setDecimals(1)
+        self.bonus_input.setSuffix(" %")
+        self.bonus_input.valueChanged.connect(self.clear_preview)
+        form_layout.addRow("Bônus sobre o salário:", self.bonus_input)
+        
+        self.despesa_input = QCheckBox("Lançar o total como despesa \"Salários\"")
+        self.despesa_input.setChecked(True)
+        form_layout.addRow("", self.despesa_input)
+        
+        layout.addLayout(form_layout)
+        
+        self.preview_table = QTableWidget()
+        self.preview_table.setColumnCount(6)
+        self.preview_table.setHorizontalHeaderLabels(
+            ["Funcionário", "Cargo", "Salário", "Adiantamentos", "Bônus", "A pagar"]
+        )
+        self.preview_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.preview_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.preview_table)
+        
+        self.status_label = QLabel("Clique em Calcular para ver a prévia da folha.")
+        self.status_label.setWordWrap(True)
+        layout.addWidget(self.status_label)
+        
+        buttons_layout = QHBoxLayout()
+        
+        self.cancel_button = QPushButton("Fechar")
+        self.cancel_button.clicked.connect(self.reject)
+        buttons_layout.addWidget(self.cancel_button)
+        
+        self.preview_button = QPushButton("Calcular")
+        self.preview_button.clicked.connect(self.load_preview)
+        buttons_layout.addWidget(self.preview_button)
+        
+        self.save_button = QPushButton("Gerar Pagamentos")
+        self.save_button.setEnabled(False)
+        self.save_button.clicked.connect(self.save_payroll)
+        buttons_layout.addWidget(self.save_button)
+        
+        layout.addLayout(buttons_layout)
+        self.mes_changed()
+    
+    def mes_changed(self, *args):
+        """Restringe a data de pagamento ao mês escolhido e descarta a prévia."""
+        inicio, fim = month_range(self.mes_input.date().toPyDate())
+        self.data_pagamento_input.setDateRange(QDate(inicio), QDate(fim))
+        self.data_pagamento_input.setDate(QDate(fim))
+        self.clear_preview()
+    
+    def clear_preview(self, *args):
+        self.preview = None
+        self.preview_table.setRowCount(0)
+        self.save_button.setEnabled(False)
+    
+    def set_busy(self, busy):
+        self.preview_button.setEnabled(not busy)
+        self.save_button.setEnabled(not busy and bool(self.preview and self.preview.linhas))
+        if busy:
+            self.status_label.setText("Processando...")
+    
+    def load_preview(self):
+        """Calcula a prévia da folha em segundo plano."""
+        self.clear_preview()
+        self.loader.submit(self.query_preview, self.mes_input.date().toPyDate(), self.bonus_input.value())
+    
+    def query_preview(self, mes, bonus_percentual):
+        """Executa o cálculo da folha (chamado fora da thread da interface)."""
+        with session_scope() as session:
+            return preview_payroll(session, mes, bonus_percentual)
+    
+    def show_preview(self, preview):
+        """Exibe a prévia calculada."""
+        self.preview = preview
+        self.preview_table.setRowCount(len(preview.linhas))
+        for i, linha in enumerate(preview.linhas):
+            self.preview_table.setItem(i, 0, QTableWidgetItem(linha.nome))
+            self.preview_table.setItem(i, 1, QTableWidgetItem(linha.cargo or ""))
+            self.preview_table.setItem(i, 2, QTableWidgetItem(format_currency(linha.salario)))
+            self.preview_table.setItem(i, 3, QTableWidgetItem(format_currency(linha.adiantamentos)))
+            self.preview_table.setItem(i, 4, QTableWidgetItem(format_currency(linha.bonus)))
+            self.preview_table.setItem(i, 5, QTableWidgetItem(format_currency(linha.total)))
+        
+        status = f"{len(preview.linhas)} funcionários, total {format_currency(preview.total)}."
+        if preview.ja_pagos:
+            status += f" {len(preview.ja_pagos)} já receberam o salário de {preview.mes:%m/%Y} e ficaram de fora."
+        self.status_label.setText(status)
+        self.save_button.setEnabled(bool(preview.linhas))
+    
+    def save_payroll(self):
+        """Grava todos os pagamentos da prévia, após confirmação."""
+        if not self.preview or not self.preview.linhas:
+            return
+        
+        confirm = QMessageBox.question(
+            self,
+            "Confirmar Folha",
+            f"Gerar os pagamentos de {len(self.preview.linhas)} funcionários "
+            f"({format_currency(self.preview.total)}) referentes a {self.preview.mes:%m/%Y}?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        if confirm != QMessageBox.Yes:
+            return
+        
+        self.writer.submit(
+            self.write_payroll, self.preview,
+            self.data_pagamento_input.date().toPyDate(), self.despesa_input.isChecked()
+        )
+    
+    def write_payroll(self, preview, data_pagamento, lancar_despesa):
+        """Grava a folha em uma única transação (chamado fora da thread da interface)."""
+        with session_scope() as session:
+            return run_payroll(session, preview, data_pagamento, lancar_despesa)
+    
+    def show_result(self, gravados):
+        self.preview = None
+        self.save_button.setEnabled(False)
+        self.status_label.setText(f"{gravados} pagamentos gravados.")
+        QMessageBox.information(self, "Sucesso", f"Folha gerada: {gravados} pagamentos gravados.")
+        self.accept()
+    
+    def show_failure(self, message):
+        self.status_label.setText("")
+        QMessageBox.critical(self, "Erro", f"Erro na folha de pagamento: {message}")
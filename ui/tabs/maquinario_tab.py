@@ -1,17 +1,44 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
-    QTableWidgetItem, QPushButton, QLabel, QDialog,
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView,
+    QAbstractItemView, QPushButton, QLabel, QDialog,
     QFormLayout, QLineEdit, QDateEdit, QTextEdit, QComboBox,
-    QMessageBox, QHeaderView
+    QMessageBox, QHeaderView, QSplitter, QGroupBox
 )
 from PyQt5.QtCore import Qt, QDate
 
-from database import get_session, Maquinario
+import logging
 
+from sqlalchemy import select
+
+from database import session_scope, TabSession, Maquinario, Manutencao
+from database.reports import manutencao_por_maquinario
+from ..formatters import format_currency, format_date
+from ..delegates import ActionButtonDelegate
+from ..table_model import LazyTableModel, TableColumn
+from ..workers import BackgroundLoader
+from ..export_dialog import export_table
+from ..actions import track_actions
+
+logger = logging.getLogger(__name__)
+
+
+def maquinarios_das_manutencoes(ids):
+    """Maquinários das manutenções informadas e se alguma delas não existe mais (chamado fora da thread da interface)."""
+    with session_scope() as session:
+        encontradas = dict(session.execute(
+            select(Manutencao.id, Manutencao.maquinario_id).where(Manutencao.id.in_(ids))
+        ).all())
+    return set(encontradas.values()), len(encontradas) < len(ids)
+
+
+@track_actions
 class MaquinarioTab(QWidget):
     def __init__(self):
         super().__init__()
         
+        # Sessão da aba: registros editados pelos diálogos são lidos e gravados nela
+        self.db = TabSession()
+        
         # Layout principal
         self.layout = QVBoxLayout(self)
         
@@ -35,129 +62,274 @@ class MaquinarioTab(QWidget):
         self.refresh_button.clicked.connect(self.load_maquinarios)
         self.action_layout.addWidget(self.refresh_button)
         
+        self.export_button = QPushButton("Exportar")
+        self.export_button.clicked.connect(lambda: export_table(self, self.model, "maquinario"))
+        self.action_layout.addWidget(self.export_button)
+        
+        # Indicador exibido enquanto os dados são carregados em segundo plano
+        self.loading_label = QLabel("Carregando...")
+        self.loading_label.setVisible(False)
+        self.action_layout.addWidget(self.loading_label)
+        
         self.layout.addLayout(self.action_layout)
         
-        # Tabela de maquinários
-        self.table = QTableWidget()
-        self.table.setColumnCount(7)  # Aumentado para incluir coluna do botão Editar
-        self.table.setHorizontalHeaderLabels([
-            "Nome", "Modelo", "Ano", "Valor (R$)", 
-            "Data Aquisição", "Status", "Ações"
-        ])
+        # Tabela de maquinários, com os totais de manutenção agregados uma vez por maquinário
+        manutencoes = manutencao_por_maquinario()
+        self.model = LazyTableModel(Maquinario, [
+            TableColumn("Nome", Maquinario.nome),
+            TableColumn("Modelo", Maquinario.modelo),
+            TableColumn("Ano", Maquinario.ano),
+            TableColumn("Valor (R$)", Maquinario.valor_aquisicao, format_currency),
+            TableColumn("Data Aquisição", Maquinario.data_aquisicao, format_date),
+            TableColumn("Status", Maquinario.status),
+            TableColumn("Custo Manutenção (R$)", manutencoes.c.custo_total, format_currency),
+            TableColumn("Última Manutenção", manutencoes.c.ultima_manutencao, format_date),
+            TableColumn("Ações"),
+        ], from_clause=Maquinario.__table__.outerjoin(manutencoes, manutencoes.c.maquinario_id == Maquinario.id))
+        self.model.loading_changed.connect(self.loading_label.setVisible)
+        self.model.load_failed.connect(
+            lambda erro: QMessageBox.critical(self, "Erro", f"Erro ao carregar maquinários: {erro}")
+        )
+        
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        # Ordenação pelo cabeçalho feita no banco, sobre os valores originais
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        # Botões da coluna Ações desenhados pelo delegate, sem um widget por linha
+        self.actions_delegate = ActionButtonDelegate({"Editar": self.edit_maquinario_from_button}, self.table)
+        self.table.setItemDelegateForColumn(8, self.actions_delegate)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         # Definir largura da coluna de ações
-        self.table.horizontalHeader().setSectionResizeMode(6, QHeaderView.ResizeToContents)
-        self.layout.addWidget(self.table)
+        self.table.horizontalHeader().setSectionResizeMode(8, QHeaderView.ResizeToContents)
+        self.table.selectionModel().selectionChanged.connect(self.load_manutencoes)
+        self.model.modelReset.connect(self.load_manutencoes)
+        
+        # Manutenções alteradas em outros terminais, aguardando a busca dos seus maquinários
+        self.manutencoes_alteradas = set()
+        self.manutencao_loader = BackgroundLoader(self)
+        self.manutencao_loader.loaded.connect(self.maquinarios_alterados)
+        self.manutencao_loader.failed.connect(self.maquinarios_alterados_failed)
+        
+        self.splitter = QSplitter(Qt.Vertical)
+        self.splitter.addWidget(self.table)
+        self.setup_manutencoes()
+        self.layout.addWidget(self.splitter)
         
         # Carregar dados iniciais
         self.load_maquinarios()
+    
+    def setup_manutencoes(self):
+        """Configura o painel com o histórico de manutenção do maquinário selecionado."""
+        self.manutencoes_group = QGroupBox("Histórico de Manutenção")
+        manutencoes_layout = QVBoxLayout(self.manutencoes_group)
+        
+        manutencoes_action_layout = QHBoxLayout()
+        self.add_manutencao_button = QPushButton("Registrar Manutenção")
+        self.add_manutencao_button.clicked.connect(self.add_manutencao)
+        manutencoes_action_layout.addWidget(self.add_manutencao_button)
+        
+        self.delete_manutencao_button = QPushButton("Excluir Manutenção")
+        self.delete_manutencao_button.clicked.connect(self.delete_manutencao)
+        manutencoes_action_layout.addWidget(self.delete_manutencao_button)
+        
+        self.manutencao_label = QLabel("Selecione um maquinário para ver o histórico.")
+        manutencoes_action_layout.addWidget(self.manutencao_label)
+        manutencoes_action_layout.addStretch()
+        manutencoes_layout.addLayout(manutencoes_action_layout)
+        
+        # Histórico lido sob demanda, somente do maquinário selecionado
+        self.manutencoes_model = LazyTableModel(Manutencao, [
+            TableColumn("Data", Manutencao.data, format_date),
+            TableColumn("Descrição", Manutencao.descricao),
+            TableColumn("Custo (R$)", Manutencao.custo, format_currency),
+            TableColumn("Responsável", Manutencao.responsavel),
+            TableColumn("Ações"),
+        ])
+        self.manutencoes_model.load_failed.connect(
+            lambda erro: QMessageBox.critical(self, "Erro", f"Erro ao carregar manutenções: {erro}")
+        )
         
-        # Dicionário para armazenar os botões de editar
-        self.edit_buttons = {}
+        self.manutencoes_table = QTableView()
+        self.manutencoes_table.setModel(self.manutencoes_model)
+        self.manutencoes_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.manutencoes_table.horizontalHeader().setSortIndicator(0, Qt.DescendingOrder)
+        self.manutencoes_table.setSortingEnabled(True)
+        self.manutencao_actions_delegate = ActionButtonDelegate(
+            {"Editar": self.edit_manutencao_from_button}, self.manutencoes_table
+        )
+        self.manutencoes_table.setItemDelegateForColumn(4, self.manutencao_actions_delegate)
+        self.manutencoes_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.manutencoes_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.ResizeToContents)
+        manutencoes_layout.addWidget(self.manutencoes_table)
+        
+        self.splitter.addWidget(self.manutencoes_group)
+        self.maquinario_id = None
+        self.manutencoes_model.clear()  # Vazio até um maquinário ser selecionado
+        self.update_manutencao_buttons()
     
     def load_maquinarios(self):
-        """Carrega os maquinários do banco de dados para a tabela."""
-        try:
-            session = get_session()
-            maquinarios = session.query(Maquinario).all()
-            
-            self.table.setRowCount(0)  # Limpar tabela
-            self.edit_buttons = {}  # Limpar referências de botões
-            
-            for i, maquinario in enumerate(maquinarios):
-                self.table.insertRow(i)
-                self.table.setItem(i, 0, QTableWidgetItem(maquinario.nome))
-                self.table.setItem(i, 1, QTableWidgetItem(maquinario.modelo))
-                self.table.setItem(i, 2, QTableWidgetItem(str(maquinario.ano or "")))
-                
-                valor = "-"
-                if maquinario.valor_aquisicao:
-                    # Formatação com separador de milhar
-                    valor = f"R$ {float(maquinario.valor_aquisicao):,.2f}".replace(".", "X").replace(",", ".").replace("X", ",")
-                self.table.setItem(i, 3, QTableWidgetItem(valor))
-                
-                data = "-"
-                if maquinario.data_aquisicao:
-                    data = maquinario.data_aquisicao.strftime("%d/%m/%Y")
-                self.table.setItem(i, 4, QTableWidgetItem(data))
-                
-                self.table.setItem(i, 5, QTableWidgetItem(maquinario.status or ""))
-                
-                # Adiciona botão editar na última coluna
-                edit_btn = QPushButton("Editar")
-                edit_btn.setMaximumWidth(60)  # Reduz largura do botão
-                edit_btn.setStyleSheet("font-size: 10px;")  # Reduz tamanho da fonte
-                
-                # Conectar o botão à edição do registro específico
-                edit_btn.clicked.connect(lambda checked, row=i: self.edit_maquinario_from_button(row))
-                
-                # Armazenar referência ao botão para evitar coleta de lixo
-                self.edit_buttons[i] = edit_btn
+        """Recarrega os maquinários do banco de dados, a partir do primeiro bloco."""
+        self.model.refresh()
+    
+    def selected_maquinario_id(self):
+        """Retorna o id do maquinário selecionado, ou None."""
+        selected_rows = self.table.selectionModel().selectedRows()
+        if not selected_rows:
+            return None
+        return self.model.row_id(selected_rows[0].row())
+    
+    def load_manutencoes(self, *args):
+        """Carrega o histórico de manutenção do maquinário selecionado."""
+        maquinario_id = self.selected_maquinario_id()
+        if maquinario_id == self.maquinario_id:
+            return  # Mesma seleção (ex.: a linha foi só atualizada)
+        self.maquinario_id = maquinario_id
+        self.update_manutencao_buttons()
+        if maquinario_id is None:
+            self.manutencao_label.setText("Selecione um maquinário para ver o histórico.")
+            self.manutencoes_model.clear()
+            return
+        row = self.table.selectionModel().selectedRows()[0].row()
+        self.manutencao_label.setText(f"Maquinário: {self.model.data(self.model.index(row, 0))}")
+        self.manutencoes_model.set_filters([Manutencao.maquinario_id == maquinario_id])
+    
+    def update_manutencao_buttons(self):
+        self.add_manutencao_button.setEnabled(self.maquinario_id is not None)
+        self.delete_manutencao_button.setEnabled(self.maquinario_id is not None)
+    
+    def manutencao_saved(self, maquinario_id):
+        """Atualiza o histórico e os totais da linha do maquinário, sem recarregar a tabela."""
+        if maquinario_id == self.maquinario_id:
+            self.manutencoes_model.refresh()
+        self.model.apply_change("U", maquinario_id)
+    
+    def add_manutencao(self):
+        """Abre o diálogo para registrar uma manutenção do maquinário selecionado."""
+        if self.maquinario_id is None:
+            QMessageBox.warning(self, "Aviso", "Selecione um maquinário.")
+            return
+        maquinario_id = self.maquinario_id
+        dialog = ManutencaoDialog(self, maquinario_id, db=self.db)
+        if dialog.exec() == QDialog.Accepted:
+            self.manutencao_saved(maquinario_id)
+    
+    def edit_manutencao_from_button(self, manutencao_id):
+        """Edita a manutenção identificada pelo id da linha do botão."""
+        manutencao = self.db.get(Manutencao, manutencao_id)
+        
+        if manutencao is None:
+            QMessageBox.warning(self, "Aviso", "Manutenção não encontrada.")
+            return
+        
+        dialog = ManutencaoDialog(self, manutencao.maquinario_id, manutencao, self.db)
+        if dialog.exec() == QDialog.Accepted:
+            self.manutencao_saved(manutencao.maquinario_id)
+    
+    def delete_manutencao(self):
+        """Exclui a manutenção selecionada no histórico."""
+        selected_rows = self.manutencoes_table.selectionModel().selectedRows()
+        if not selected_rows:
+            QMessageBox.warning(self, "Aviso", "Selecione uma manutenção para excluir.")
+            return
+        
+        manutencao_id = self.manutencoes_model.row_id(selected_rows[0].row())
+        
+        confirm = QMessageBox.question(
+            self,
+            "Confirmar Exclusão",
+            "Tem certeza que deseja excluir esta manutenção?",
+            QMessageBox.Yes | QMessageBox.No
+        )
+        
+        if confirm == QMessageBox.Yes:
+            try:
+                manutencao = self.db.get(Manutencao, manutencao_id)
                 
-                # Adicionar à tabela
-                self.table.setCellWidget(i, 6, edit_btn)
-            
-            session.close()
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao carregar maquinários: {str(e)}")
+                if manutencao is not None:
+                    maquinario_id = manutencao.maquinario_id
+                    self.db.delete(manutencao)
+                    self.manutencao_saved(maquinario_id)
+                else:
+                    QMessageBox.warning(self, "Aviso", "Manutenção não encontrada.")
+            except Exception as e:
+                QMessageBox.critical(self, "Erro", f"Erro ao excluir manutenção: {str(e)}")
+    
+    def apply_change(self, table, operation, row_id):
+        """Aplica uma alteração feita no banco por outro terminal."""
+        if table == Maquinario.__tablename__:
+            self.db.expire(Maquinario, row_id)
+            self.model.apply_change(operation, row_id)
+        elif table == Manutencao.__tablename__:
+            self.db.expire(Manutencao, row_id)
+            if self.maquinario_id is not None:
+                self.manutencoes_model.apply_change(operation, row_id)
+            if operation == "R":
+                self.model.refresh()
+                return
+            # O custo total e a última manutenção do maquinário mudaram
+            self.manutencoes_alteradas.add(row_id)
+            if not self.manutencao_loader.is_busy():
+                self.fetch_maquinarios_alterados()
     
-    def edit_maquinario_from_button(self, row):
-        """Edita o maquinário na linha especificada pelo botão."""
-        session = get_session()
-        maquinarios = session.query(Maquinario).all()
+    def fetch_maquinarios_alterados(self):
+        ids = list(self.manutencoes_alteradas)
+        self.manutencoes_alteradas.clear()
+        self.manutencao_loader.submit(maquinarios_das_manutencoes, ids)
+    
+    def maquinarios_alterados(self, result):
+        """Relê as linhas dos maquinários cujas manutenções mudaram."""
+        maquinario_ids, excluida = result
+        if excluida:
+            # Não se sabe mais de qual maquinário era a manutenção excluída: relê as linhas carregadas
+            maquinario_ids = {self.model.row_id(row) for row in range(self.model.rowCount())}
+        for maquinario_id in maquinario_ids:
+            if maquinario_id is not None:
+                self.model.apply_change("U", maquinario_id)
+        if self.manutencoes_alteradas:
+            self.fetch_maquinarios_alterados()
+    
+    def maquinarios_alterados_failed(self, message):
+        logger.error(f"Erro ao atualizar os totais de manutenção: {message}")
+        self.manutencoes_alteradas.clear()
+    
+    def edit_maquinario_from_button(self, maquinario_id):
+        """Edita o maquinário identificado pelo id da linha do botão."""
+        maquinario = self.db.get(Maquinario, maquinario_id)
         
-        if row >= len(maquinarios):
+        if maquinario is None:
             QMessageBox.warning(self, "Aviso", "Maquinário não encontrado.")
-            session.close()
             return
         
-        maquinario = maquinarios[row]
-        
-        dialog = MaquinarioDialog(self, maquinario)
+        dialog = MaquinarioDialog(self, maquinario, self.db)
         if dialog.exec() == QDialog.Accepted:
             self.load_maquinarios()
-        
-        session.close()
     
     def add_maquinario(self):
         """Abre o diálogo para adicionar um novo maquinário."""
-        dialog = MaquinarioDialog(self)
+        dialog = MaquinarioDialog(self, db=self.db)
         if dialog.exec() == QDialog.Accepted:
             self.load_maquinarios()
     
     def edit_maquinario(self):
         """Abre o diálogo para editar o maquinário selecionado."""
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        selected_rows = self.table.selectionModel().selectedRows()
+        if not selected_rows:
             QMessageBox.warning(self, "Aviso", "Selecione um maquinário para editar.")
             return
         
-        row = selected_items[0].row()
-        
-        session = get_session()
-        maquinarios = session.query(Maquinario).all()
-        
-        if row >= len(maquinarios):
-            QMessageBox.warning(self, "Aviso", "Maquinário não encontrado.")
-            session.close()
-            return
-        
-        maquinario = maquinarios[row]
-        
-        dialog = MaquinarioDialog(self, maquinario)
-        if dialog.exec() == QDialog.Accepted:
-            self.load_maquinarios()
-        
-        session.close()
+        row = selected_rows[0].row()
+        self.edit_maquinario_from_button(self.model.row_id(row))
     
     def delete_maquinario(self):
         """Exclui o maquinário selecionado."""
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        selected_rows = self.table.selectionModel().selectedRows()
+        if not selected_rows:
             QMessageBox.warning(self, "Aviso", "Selecione um maquinário para excluir.")
             return
         
-        row = selected_items[0].row()
+        maquinario_id = self.model.row_id(selected_rows[0].row())
         
         confirm = QMessageBox.question(
             self,
@@ -168,29 +340,27 @@ class MaquinarioTab(QWidget):
         
         if confirm == QMessageBox.Yes:
             try:
-                session = get_session()
-                maquinarios = session.query(Maquinario).all()
+                maquinario = self.db.get(Maquinario, maquinario_id)
                 
-                if row < len(maquinarios):
-                    maquinario = maquinarios[row]
-                    session.delete(maquinario)
-                    session.commit()
+                if maquinario is not None:
+                    self.db.delete(maquinario)
                     QMessageBox.information(self, "Sucesso", "Maquinário excluído com sucesso.")
                     self.load_maquinarios()
                 else:
                     QMessageBox.warning(self, "Aviso", "Maquinário não encontrado.")
-                
-                session.close()
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Erro ao excluir maquinário: {str(e)}")
 
 
+@track_actions
 class MaquinarioDialog(QDialog):
     """Diálogo para adicionar ou editar maquinário."""
     
-    def __init__(self, parent=None, maquinario=None):
+    def __init__(self, parent=None, maquinario=None, db=None):
         super().__init__(parent)
         self.maquinario = maquinario
+        # Sessão da aba que abriu o diálogo, onde o registro foi carregado
+        self.db = db or TabSession()
         self.setup_ui()
         
         if maquinario:
@@ -282,12 +452,8 @@ class MaquinarioDialog(QDialog):
             return
         
         try:
-            session = get_session()
-            
-            # Criar ou atualizar maquinário
-            if not self.maquinario:
-                self.maquinario = Maquinario()
-                session.add(self.maquinario)
+            # Criar ou atualizar maquinário (na sessão da aba)
+            self.maquinario = self.db.attach(self.maquinario or Maquinario())
             
             # Atualizar dados
             self.maquinario.nome = self.nome_input.text().strip()
@@ -310,7 +476,7 @@ class MaquinarioDialog(QDialog):
             self.maquinario.observacoes = self.obs_input.toPlainText().strip()
             
             # Commit
-            session.commit()
+            self.db.commit()
             
             # Fechar diálogo
             self.accept()
@@ -320,9 +486,112 @@ class MaquinarioDialog(QDialog):
                 "Sucesso",
                 "Maquinário salvo com sucesso!"
             )
-            
-            session.close()
         except Exception as e:
+            self.db.rollback()
             QMessageBox.critical(self, "Erro", f"Erro ao salvar maquinário: {str(e)}")
-            session.rollback()
-            session.close() 
\ No newline at end of file
+
+
+@track_actions
+class ManutencaoDialog(QDialog):
+    """Diálogo para registrar ou editar uma manutenção de maquinário."""
+    
+    def __init__(self, parent=None, maquinario_id=None, manutencao=None, db=None):
+        super().__init__(parent)
+        self.maquinario_id = maquinario_id
+        self.manutencao = manutencao
+        # Sessão da aba que abriu o diálogo, onde o registro foi carregado
+        self.db = db or TabSession()
+        self.setup_ui()
+        
+        if manutencao:
+            self.setWindowTitle("Editar Manutenção")
+            self.populate_fields()
+        else:
+            self.setWindowTitle("Registrar Manutenção")
+    
+    def setup_ui(self):
+        """Configura a interface do diálogo."""
+        self.setMinimumWidth(400)
+        
+        layout = QVBoxLayout(self)
+        
+        # Formulário
+        form_layout = QFormLayout()
+        
+        self.data_input = QDateEdit()
+        self.data_input.setDisplayFormat("dd/MM/yyyy")
+        self.data_input.setCalendarPopup(True)
+        self.data_input.setDate(QDate.currentDate())
+        form_layout.addRow("Data:", self.data_input)
+        
+        self.descricao_input = QTextEdit()
+        self.descricao_input.setMaximumHeight(80)
+        form_layout.addRow("Descrição:", self.descricao_input)
+        
+        self.custo_input = QLineEdit()
+        form_layout.addRow("Custo (R$):", self.custo_input)
+        
+        self.responsavel_input = QLineEdit()
+        form_layout.addRow("Responsável:", self.responsavel_input)
+        
+        layout.addLayout(form_layout)
+        
+        # Botões
+        buttons_layout = QHBoxLayout()
+        
+        self.cancel_button = QPushButton("Cancelar")
+        self.cancel_button.clicked.connect(self.reject)
+        buttons_layout.addWidget(self.cancel_button)
+        
+        self.save_button = QPushButton("Salvar")
+        self.save_button.clicked.connect(self.save_manutencao)
+        buttons_layout.addWidget(self.save_button)
+        
+        layout.addLayout(buttons_layout)
+    
+    def populate_fields(self):
+        """Preenche os campos com os dados da manutenção a ser editada."""
+        if self.manutencao.data:
+            self.data_input.setDate(QDate(self.manutencao.data))
+        self.descricao_input.setText(self.manutencao.descricao or "")
+        if self.manutencao.custo:
+            valor_formatado = f"{float(self.manutencao.custo):,.2f}".replace(".", "X").replace(",", ".").replace("X", ",")
+            self.custo_input.setText(valor_formatado)
+        self.responsavel_input.setText(self.manutencao.responsavel or "")
+    
+    def save_manutencao(self):
+        """Salva a manutenção no banco de dados."""
+        descricao = self.descricao_input.toPlainText().strip()
+        if not descricao:
+            QMessageBox.warning(self, "Aviso", "A descrição da manutenção é obrigatória.")
+            return
+        
+        custo = None
+        if self.custo_input.text().strip():
+            try:
+                # Remover possíveis separadores de milhar e trocar vírgula por ponto
+                custo = float(self.custo_input.text().strip().replace(".", "").replace(",", "."))
+            except ValueError:
+                QMessageBox.warning(self, "Aviso", "O custo deve ser um número válido.")
+                return
+            if custo < 0:
+                QMessageBox.warning(self, "Aviso", "O custo não pode ser negativo.")
+                return
+        
+        try:
+            # Criar ou atualizar manutenção (na sessão da aba)
+            self.manutencao = self.db.attach(self.manutencao or Manutencao(maquinario_id=self.maquinario_id))
+            
+            self.manutencao.data = self.data_input.date().toPyDate()
+            self.manutencao.descricao = descricao
+            self.manutencao.custo = custo
+            self.manutencao.responsavel = self.responsavel_input.text().strip()
+            
+            # Commit
+            self.db.commit()
+            
+            # Fechar diálogo
+            self.accept()
+        except Exception as e:
+            self.db.rollback()
+            QMessageBox.critical(self, "Erro", f"Erro ao salvar manutenção: {str(e)}")
@@ -1,17 +1,51 @@
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QTableWidget, 
-    QTableWidgetItem, QPushButton, QLabel, QDialog,
+    QWidget, QVBoxLayout, QHBoxLayout, QTableView, QTableWidget, QTableWidgetItem,
+    QAbstractItemView, QPushButton, QLabel, QDialog,
     QFormLayout, QLineEdit, QDateEdit, QTextEdit, QComboBox,
     QMessageBox, QHeaderView
 )
 from PyQt5.QtCore import Qt, QDate
 
-from database import get_session, Producao
+from database import session_scope, TabSession, Producao
+from database.reports import production_analytics, producao_metricas
+from ..formatters import (
+    format_number, format_optional_number, format_currency, format_signed_currency, format_date
+)
+from ..delegates import ActionButtonDelegate
+from ..table_model import LazyTableModel, TableColumn
+from ..export_dialog import export_table
+from ..filter_bar import FilterBar
+from ..workers import BackgroundLoader
+from ..actions import track_actions
+import datetime
+
+PRODUTOS = [
+    "Soja", "Milho", "Trigo", "Feijão", "Algodão", 
+    "Café", "Cana-de-açúcar", "Outro"
+]
+
+# Mês em que começa a safra (julho a junho do ano seguinte)
+INICIO_SAFRA = 7
 
+def safras(quantidade=6):
+    """Retorna [(rótulo, (início, fim))] das safras mais recentes, a atual primeiro."""
+    hoje = datetime.date.today()
+    ano = hoje.year if hoje.month >= INICIO_SAFRA else hoje.year - 1
+    opcoes = []
+    for a in range(ano, ano - quantidade, -1):
+        inicio = datetime.date(a, INICIO_SAFRA, 1)
+        fim = datetime.date(a + 1, INICIO_SAFRA, 1) - datetime.timedelta(days=1)
+        opcoes.append((f"Safra {a}/{a + 1}", (inicio, fim)))
+    return opcoes
+
+@track_actions
 class ProducaoTab(QWidget):
     def __init__(self):
         super().__init__()
         
+        # Sessão da aba: registros editados pelos diálogos são lidos e gravados nela
+        self.db = TabSession()
+        
         # Layout principal
         self.layout = QVBoxLayout(self)
         
@@ -35,142 +69,124 @@ class ProducaoTab(QWidget):
         self.refresh_button.clicked.connect(self.load_producoes)
         self.action_layout.addWidget(self.refresh_button)
         
+        self.export_button = QPushButton("Exportar")
+        self.export_button.clicked.connect(lambda: export_table(self, self.model, "producao"))
+        self.action_layout.addWidget(self.export_button)
+        
+        self.analytics_button = QPushButton("Análise de Rentabilidade")
+        self.analytics_button.clicked.connect(self.show_analytics)
+        self.action_layout.addWidget(self.analytics_button)
+        
+        # Indicador exibido enquanto os dados são carregados em segundo plano
+        self.loading_label = QLabel("Carregando...")
+        self.loading_label.setVisible(False)
+        self.action_layout.addWidget(self.loading_label)
+        
         self.layout.addLayout(self.action_layout)
         
-        # Tabela de produções
-        self.table = QTableWidget()
-        self.table.setColumnCount(8)  # Aumentado para incluir coluna do botão Editar
-        self.table.setHorizontalHeaderLabels([
-            "Produto", "Quantidade", "Unidade", "Data Início", 
-            "Data Fim", "Área (ha)", "Custo Total (R$)", "Ações"
+        # Filtros (executados no banco; padrão: safra atual)
+        opcoes_safra = safras()
+        self.filters = FilterBar()
+        self.filters.add_choice("Produto:", Producao.produto, PRODUTOS)
+        self.filters.add_choice(
+            "Safra:", Producao.data_inicio, opcoes_safra, editable=False,
+            build=lambda periodo: Producao.data_inicio.between(*periodo),
+            default=opcoes_safra[0][0]
+        )
+        self.filters.finish()
+        self.filters.changed.connect(self.load_producoes)
+        self.layout.addWidget(self.filters)
+        
+        # Tabela de produções (indicadores calculados no banco, linha a linha)
+        metricas = producao_metricas()
+        self.model = LazyTableModel(Producao, [
+            TableColumn("Produto", Producao.produto),
+            TableColumn("Quantidade", Producao.quantidade, format_number),
+            TableColumn("Unidade", Producao.unidade),
+            TableColumn("Data Início", Producao.data_inicio, format_date),
+            TableColumn("Data Fim", Producao.data_fim, format_date),
+            TableColumn("Área (ha)", Producao.area, format_optional_number),
+            TableColumn("Custo Total (R$)", Producao.custo_total, format_currency),
+            TableColumn("Valor Venda (R$)", Producao.valor_venda, format_currency),
+            TableColumn("Margem (R$)", metricas["margem"], format_signed_currency),
+            TableColumn("Custo/ha (R$)", metricas["custo_ha"], format_currency),
+            TableColumn("Produtividade/ha", metricas["produtividade"], format_optional_number),
+            TableColumn("Receita/dia (R$)", metricas["receita_dia"], format_currency),
+            TableColumn("Ações"),
         ])
+        self.model.loading_changed.connect(self.loading_label.setVisible)
+        self.model.load_failed.connect(
+            lambda erro: QMessageBox.critical(self, "Erro", f"Erro ao carregar produções: {erro}")
+        )
+        
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        # Ordenação pelo cabeçalho feita no banco, sobre os valores originais
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
+        # Botões da coluna Ações desenhados pelo delegate, sem um widget por linha
+        self.actions_delegate = ActionButtonDelegate({"Editar": self.edit_producao_from_button}, self.table)
+        self.table.setItemDelegateForColumn(12, self.actions_delegate)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         # Definir largura da coluna de ações
-        self.table.horizontalHeader().setSectionResizeMode(7, QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(12, QHeaderView.ResizeToContents)
         self.layout.addWidget(self.table)
         
         # Carregar dados iniciais
         self.load_producoes()
-        
-        # Dicionário para armazenar os botões de editar
-        self.edit_buttons = {}
     
     def load_producoes(self):
-        """Carrega as produções do banco de dados para a tabela."""
-        try:
-            session = get_session()
-            producoes = session.query(Producao).all()
-            
-            self.table.setRowCount(0)  # Limpar tabela
-            self.edit_buttons = {}  # Limpar referências de botões
-            
-            for i, producao in enumerate(producoes):
-                self.table.insertRow(i)
-                self.table.setItem(i, 0, QTableWidgetItem(producao.produto))
-                
-                # Formatação de quantidade com separador de milhar
-                quantidade = f"{producao.quantidade:,.2f}".replace(".", "X").replace(",", ".").replace("X", ",")
-                self.table.setItem(i, 1, QTableWidgetItem(quantidade))
-                
-                self.table.setItem(i, 2, QTableWidgetItem(producao.unidade or ""))
-                
-                data_inicio = "-"
-                if producao.data_inicio:
-                    data_inicio = producao.data_inicio.strftime("%d/%m/%Y")
-                self.table.setItem(i, 3, QTableWidgetItem(data_inicio))
-                
-                data_fim = "-"
-                if producao.data_fim:
-                    data_fim = producao.data_fim.strftime("%d/%m/%Y")
-                self.table.setItem(i, 4, QTableWidgetItem(data_fim))
-                
-                area = "-"
-                if producao.area:
-                    # Formatação com separador de milhar
-                    area = f"{producao.area:,.2f}".replace(".", "X").replace(",", ".").replace("X", ",")
-                self.table.setItem(i, 5, QTableWidgetItem(area))
-                
-                custo = "-"
-                if producao.custo_total:
-                    # Formatação com separador de milhar
-                    custo = f"R$ {float(producao.custo_total):,.2f}".replace(".", "X").replace(",", ".").replace("X", ",")
-                self.table.setItem(i, 6, QTableWidgetItem(custo))
-                
-                # Adiciona botão editar na última coluna
-                edit_btn = QPushButton("Editar")
-                edit_btn.setMaximumWidth(60)  # Reduz largura do botão
-                edit_btn.setStyleSheet("font-size: 10px;")  # Reduz tamanho da fonte
-                
-                # Conectar o botão à edição do registro específico
-                edit_btn.clicked.connect(lambda checked, row=i: self.edit_producao_from_button(row))
-                
-                # Armazenar referência ao botão para evitar coleta de lixo
-                self.edit_buttons[i] = edit_btn
-                
-                # Adicionar à tabela
-                self.table.setCellWidget(i, 7, edit_btn)
-            
-            session.close()
-        except Exception as e:
-            QMessageBox.critical(self, "Erro", f"Erro ao carregar produções: {str(e)}")
+        """Recarrega as produções que passam pelos filtros, a partir do primeiro bloco."""
+        self.model.set_filters(self.filters.conditions())
+    
+    def show_analytics(self):
+        """Abre a análise de rentabilidade por produto e safra."""
+        dialog = AnalyticsDialog(self)
+        dialog.exec()
+    
+    def apply_change(self, table, operation, row_id):
+        """Aplica uma alteração feita no banco por outro terminal."""
+        if table == Producao.__tablename__:
+            self.db.expire(Producao, row_id)
+            self.model.apply_change(operation, row_id)
     
-    def edit_producao_from_button(self, row):
-        """Edita a produção na linha especificada pelo botão."""
-        session = get_session()
-        producoes = session.query(Producao).all()
+    def edit_producao_from_button(self, producao_id):
+        """Edita a produção identificada pelo id da linha do botão."""
+        producao = self.db.get(Producao, producao_id)
         
-        if row >= len(producoes):
+        if producao is None:
             QMessageBox.warning(self, "Aviso", "Produção não encontrada.")
-            session.close()
             return
         
-        producao = producoes[row]
-        
-        dialog = ProducaoDialog(self, producao)
+        dialog = ProducaoDialog(self, producao, self.db)
         if dialog.exec() == QDialog.Accepted:
             self.load_producoes()
-        
-        session.close()
     
     def add_producao(self):
         """Abre o diálogo para adicionar uma nova produção."""
-        dialog = ProducaoDialog(self)
+        dialog = ProducaoDialog(self, db=self.db)
         if dialog.exec() == QDialog.Accepted:
             self.load_producoes()
     
     def edit_producao(self):
         """Abre o diálogo para editar a produção selecionada."""
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        selected_rows = self.table.selectionModel().selectedRows()
+        if not selected_rows:
             QMessageBox.warning(self, "Aviso", "Selecione uma produção para editar.")
             return
         
-        row = selected_items[0].row()
-        
-        session = get_session()
-        producoes = session.query(Producao).all()
-        
-        if row >= len(producoes):
-            QMessageBox.warning(self, "Aviso", "Produção não encontrada.")
-            session.close()
-            return
-        
-        producao = producoes[row]
-        
-        dialog = ProducaoDialog(self, producao)
-        if dialog.exec() == QDialog.Accepted:
-            self.load_producoes()
-        
-        session.close()
+        row = selected_rows[0].row()
+        self.edit_producao_from_button(self.model.row_id(row))
     
     def delete_producao(self):
         """Exclui a produção selecionada."""
-        selected_items = self.table.selectedItems()
-        if not selected_items:
+        selected_rows = self.table.selectionModel().selectedRows()
+        if not selected_rows:
             QMessageBox.warning(self, "Aviso", "Selecione uma produção para excluir.")
             return
         
-        row = selected_items[0].row()
+        producao_id = self.model.row_id(selected_rows[0].row())
         
         confirm = QMessageBox.question(
             self,
@@ -181,29 +197,27 @@ class ProducaoTab(QWidget):
         
         if confirm == QMessageBox.Yes:
             try:
-                session = get_session()
-                producoes = session.query(Producao).all()
+                producao = self.db.get(Producao, producao_id)
                 
-                if row < len(producoes):
-                    producao = producoes[row]
-                    session.delete(producao)
-                    session.commit()
+                if producao is not None:
+                    self.db.delete(producao)
                     QMessageBox.information(self, "Sucesso", "Produção excluída com sucesso.")
                     self.load_producoes()
                 else:
                     QMessageBox.warning(self, "Aviso", "Produção não encontrada.")
-                
-                session.close()
             except Exception as e:
                 QMessageBox.critical(self, "Erro", f"Erro ao excluir produção: {str(e)}")
 
 
+@track_actions
 class ProducaoDialog(QDialog):
     """Diálogo para adicionar ou editar produção."""
     
-    def __init__(self, parent=None, producao=None):
+    def __init__(self, parent=None, producao=None, db=None):
         super().__init__(parent)
         self.producao = producao
+        # Sessão da aba que abriu o diálogo, onde o registro foi carregado
+        self.db = db or TabSession()
         self.setup_ui()
         
         if producao:
@@ -225,10 +239,7 @@ class ProducaoDialog(QDialog):
         # Produto com botão Editar
         produto_layout = QHBoxLayout()
         self.produto_input = QComboBox()
-        self.produto_input.addItems([
-            "Soja", "Milho", "Trigo", "Feijão", "Algodão", 
-            "Café", "Cana-de-açúcar", "Outro"
-        ])
+        self.produto_input.addItems(PRODUTOS)
         self.produto_input.setEditable(True)
         produto_layout.addWidget(self.produto_input)
         
@@ -370,12 +381,8 @@ class ProducaoDialog(QDialog):
             return
         
         try:
-            session = get_session()
-            
-            # Criar ou atualizar produção
-            if not self.producao:
-                self.producao = Producao()
-                session.add(self.producao)
+            # Criar ou atualizar produção (na sessão da aba)
+            self.producao = self.db.attach(self.producao or Producao())
             
             # Atualizar dados
             self.producao.produto = self.produto_input.currentText().strip()
@@ -405,7 +412,7 @@ class ProducaoDialog(QDialog):
             self.producao.observacoes = self.obs_input.toPlainText().strip()
             
             # Commit
-            session.commit()
+            self.db.commit()
             
             # Fechar diálogo
             self.accept()
@@ -415,9 +422,95 @@ class ProducaoDialog(QDialog):
                 "Sucesso",
                 "Produção salva com sucesso!"
             )
-            
-            session.close()
         except Exception as e:
+            self.db.rollback()
             QMessageBox.critical(self, "Erro", f"Erro ao salvar produção: {str(e)}")
-            session.rollback()
-            session.close() 
\ No newline at end of file
+
+
+@track_actions
+class AnalyticsDialog(QDialog):
+    """Rentabilidade por produto e safra, com posição na safra e variação anual.
+
+    Todo o cálculo é feito no banco por production_analytics; o diálogo só
+    exibe as linhas agregadas.
+    """
+    
+    COLUMNS = [
+        ("Safra", lambda r: f"{r.safra}/{r.safra + 1}"),
+        ("Produto", lambda r: r.produto),
+        ("Unidade", lambda r: r.unidade or "-"),
+        ("Posição", lambda r: f"{r.posicao}º"),
+        ("Produções", lambda r: str(r.producoes)),
+        ("Área (ha)", lambda r: format_optional_number(r.area)),
+        ("Custo (R$)", lambda r: format_currency(r.custo)),
+        ("Receita (R$)", lambda r: format_currency(r.receita)),
+        ("Margem (R$)", lambda r: format_signed_currency(r.margem)),
+        ("Margem %", lambda r: format_optional_number(r.margem_percentual)),
+        ("Custo/ha (R$)", lambda r: format_currency(r.custo_ha)),
+        ("Produtividade/ha", lambda r: format_optional_number(r.produtividade)),
+        ("Receita/dia (R$)", lambda r: format_currency(r.receita_dia)),
+        ("Δ Margem (R$)", lambda r: format_signed_currency(r.margem_variacao)),
+        ("Δ Produtividade/ha", lambda r: format_optional_number(r.produtividade_variacao)),
+    ]
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Análise de Rentabilidade")
+        self.setMinimumSize(1000, 500)
+        self.setup_ui()
+        
+        self.loader = BackgroundLoader(self)
+        self.loader.loaded.connect(self.show_rows)
+        self.loader.failed.connect(
+            lambda erro: QMessageBox.critical(self, "Erro", f"Erro ao calcular a análise: {erro}")
+        )
+        self.loader.busy_changed.connect(self.loading_label.setVisible)
+        self.load_rows()
+    
+    def setup_ui(self):
+        """Configura a interface do diálogo."""
+        layout = QVBoxLayout(self)
+        
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(QLabel("Safras:"))
+        self.safras_input = QComboBox()
+        for quantidade in (3, 5, 10):
+            self.safras_input.addItem(f"Últimas {quantidade}", quantidade)
+        self.safras_input.currentIndexChanged.connect(self.load_rows)
+        options_layout.addWidget(self.safras_input)
+        self.loading_label = QLabel("Calculando...")
+        self.loading_label.setVisible(False)
+        options_layout.addWidget(self.loading_label)
+        options_layout.addStretch()
+        layout.addLayout(options_layout)
+        
+        self.table = QTableWidget()
+        self.table.setColumnCount(len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels([title for title, _ in self.COLUMNS])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        layout.addWidget(self.table)
+        
+        buttons_layout = QHBoxLayout()
+        buttons_layout.addStretch()
+        self.close_button = QPushButton("Fechar")
+        self.close_button.clicked.connect(self.accept)
+        buttons_layout.addWidget(self.close_button)
+        layout.addLayout(buttons_layout)
+    
+    def load_rows(self, *args):
+        """Recalcula a análise para o número de safras escolhido."""
+        quantidade = self.safras_input.currentData()
+        primeira_safra = safras(quantidade)[-1][1][0].year
+        self.loader.submit(self.query_rows, primeira_safra)
+    
+    def query_rows(self, primeira_safra):
+        """Executa a consulta da análise (chamado fora da thread da interface)."""
+        with session_scope() as session:
+            return production_analytics(session, primeira_safra, INICIO_SAFRA)
+    
+    def show_rows(self, rows):
+        self.table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            for j, (_, formatter) in enumerate(self.COLUMNS):
+                self.table.setItem(i, j, QTableWidgetItem(formatter(row)))
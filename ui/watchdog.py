@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import logging
+import threading
+import traceback
+
+from PyQt5.QtCore import QObject, QTimer
+
+from database.instrumentation import action_in_thread
+
+logger = logging.getLogger(__name__)
+
+# Pasta do projeto, para destacar na pilha os trechos do nosso código
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class EventLoopWatchdog(QObject):
+    """Detecta travamentos da interface medindo o atraso do loop de eventos do Qt.
+
+    Um QTimer na thread da interface marca um batimento a cada interval_ms;
+    uma thread própria confere os batimentos e, quando o atraso passa de
+    stall_ms, registra no log a ação em andamento (ex.:
+    ProducaoTab.delete_producao) e a pilha Python da thread da interface
+    naquele momento. Quando a interface volta a responder, registra a
+    duração total do travamento.
+
+    Fora dos travamentos, o custo é um timer e uma comparação por intervalo.
+    Deve ser criado na thread da interface.
+    """
+
+    def __init__(self, stall_ms=500, interval_ms=100, parent=None):
+        super().__init__(parent)
+        self.stall = stall_ms / 1000
+        self.interval = interval_ms / 1000
+        self.gui_thread_id = threading.get_ident()
+        self.stalls = 0          # Travamentos detectados
+        self.max_lag = 0.0       # Maior atraso observado, em segundos
+        self._beat = time.monotonic()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(interval_ms)
+        self._timer.timeout.connect(self._heartbeat)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._beat = time.monotonic()
+        self._timer.start()
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._watch, name="EventLoopWatchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._timer.stop()
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _heartbeat(self):
+        self._beat = time.monotonic()
+
+    def _watch(self):
+        stalled_beat = None  # Batimento anterior ao travamento em andamento
+        stall_action = None
+        while not self._stop_event.wait(self.interval / 2):
+            beat = self._beat
+            lag = time.monotonic() - beat - self.interval
+            self.max_lag = max(self.max_lag, lag)
+            if stalled_beat is None and lag >= self.stall:
+                stalled_beat = beat
+                stall_action = self._report_stall(lag)
+            elif stalled_beat is not None and beat != stalled_beat:
+                duration = beat - stalled_beat - self.interval
+                logger.warning(f"A interface voltou a responder após {duration * 1000:.0f} ms; travamento em {stall_action}")
+                stalled_beat = None
+
+    def _report_stall(self, lag):
+        """Registra o travamento em andamento com a pilha da thread da interface; retorna a ação."""
+        self.stalls += 1
+        record = action_in_thread(self.gui_thread_id)
+        frame = sys._current_frames().get(self.gui_thread_id)
+        stack = traceback.format_stack(frame) if frame is not None else []
+        name = record.name if record is not None else describe_frame(frame)
+        logger.warning(
+            f"Interface sem resposta há {lag * 1000:.0f} ms em {name}. "
+            f"Pilha da thread da interface:\n{''.join(stack)}"
+        )
+        return name
+
+    def summary(self):
+        """Resumo para o log ao encerrar a aplicação."""
+        return (
+            f"{self.stalls} travamento(s) da interface acima de {self.stall * 1000:.0f} ms; "
+            f"maior atraso do loop de eventos: {self.max_lag * 1000:.0f} ms"
+        )
+
+
+def describe_frame(frame):
+    """Função do projeto mais interna da pilha (quando o travamento não está em uma ação)."""
+    while frame is not None:
+        if frame.f_code.co_filename.startswith(PROJECT_DIR):
+            return f"{os.path.relpath(frame.f_code.co_filename, PROJECT_DIR)}:{frame.f_code.co_name}"
+        frame = frame.f_back
+    return "(fora do código da aplicação)"
@@ -0,0 +1,101 @@
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from database.instrumentation import current_action, resume
+
+
+class WorkerSignals(QObject):
+    """Sinais emitidos por um QueryWorker (entregues na thread da interface)."""
+
+    finished = pyqtSignal(int, object)  # (geração, resultado)
+    failed = pyqtSignal(int, str)       # (geração, mensagem de erro)
+
+
+class QueryWorker(QRunnable):
+    """Executa uma função de consulta em uma thread do QThreadPool.
+
+    As consultas contam para a ação da interface que agendou o trabalho
+    (ver database.instrumentation).
+    """
+
+    def __init__(self, generation, fn, *args, **kwargs):
+        super().__init__()
+        self.generation = generation
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = WorkerSignals()
+        self.cancelled = False
+        self.action = current_action()
+
+    def run(self):
+        if self.cancelled:
+            return  # Substituído por uma consulta mais nova antes de começar
+
+        try:
+            with resume(self.action):
+                result = self.fn(*self.args, **self.kwargs)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, str(e))
+        else:
+            self.signals.finished.emit(self.generation, result)
+
+
+class BackgroundLoader(QObject):
+    """Agenda consultas fora da thread da interface e entrega o resultado.
+
+    Cada chamada a submit() substitui a anterior: um trabalho que ainda não
+    começou é pulado e o resultado de um trabalho já em execução é descartado
+    quando chega, pois pertence a uma geração antiga.
+    """
+
+    loaded = pyqtSignal(object)
+    failed = pyqtSignal(str)
+    busy_changed = pyqtSignal(bool)
+
+    def __init__(self, parent=None, pool=None):
+        super().__init__(parent)
+        self.pool = pool or QThreadPool.globalInstance()
+        self._generation = 0
+        self._worker = None
+
+    def is_busy(self):
+        """Indica se há uma consulta da geração atual em andamento."""
+        return self._worker is not None
+
+    def submit(self, fn, *args, **kwargs):
+        """Agenda fn(*args, **kwargs), substituindo a consulta pendente."""
+        if self._worker is not None:
+            self._worker.cancelled = True
+        self._generation += 1
+
+        worker = QueryWorker(self._generation, fn, *args, **kwargs)
+        worker.signals.finished.connect(self._on_finished)
+        worker.signals.failed.connect(self._on_failed)
+        if self._worker is None:
+            self.busy_changed.emit(True)
+        self._worker = worker
+
+        self.pool.start(worker)
+
+    def cancel(self):
+        """Cancela a consulta pendente; seu resultado será ignorado."""
+        if self._worker is None:
+            return
+        self._worker.cancelled = True
+        self._worker = None
+        self._generation += 1
+        self.busy_changed.emit(False)
+
+    def _on_finished(self, generation, result):
+        if generation != self._generation:
+            return  # Resultado obsoleto, substituído por uma consulta mais nova
+        self._worker = None
+        self.busy_changed.emit(False)
+        self.loaded.emit(result)
+
+    def _on_failed(self, generation, message):
+        if generation != self._generation:
+            return
+        self._worker = None
+        self.busy_changed.emit(False)
+        self.failed.emit(message)